@@ -9,4 +9,22 @@ TUNED_MODEL_NAME = "my-tuned-gemini-model"
 
 # Add more configuration options as needed
 MAX_TOKENS = 1024
-TEMPERATURE = 0.7
\ No newline at end of file
+TEMPERATURE = 0.7
+
+# Token budgets enforced on training examples before upload
+MAX_INPUT_TOKENS = 10000
+MAX_OUTPUT_TOKENS = MAX_TOKENS
+
+# Prepared dataset cache
+PREPARED_DATA_CACHE_DIR = os.getenv("PREPARED_DATA_CACHE_DIR", os.path.join(".cache", "prepared_data"))
+PREPARED_DATA_CACHE_MAX_BYTES = int(os.getenv("PREPARED_DATA_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Model response cache used during evaluation
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1_000_000))
+
+# Registry of submitted tuning jobs, used to re-attach instead of resubmitting identical jobs
+TUNING_JOB_REGISTRY_PATH = os.getenv("TUNING_JOB_REGISTRY_PATH", os.path.join(".cache", "tuning_jobs.sqlite3"))
+
+# Tuning jobs allowed to run at once, counting jobs already running
+MAX_CONCURRENT_TUNING_JOBS = int(os.getenv("MAX_CONCURRENT_TUNING_JOBS", 4))
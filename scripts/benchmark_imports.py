@@ -0,0 +1,65 @@
+import os
+import sys
+import argparse
+import json
+import statistics
+import subprocess
+
+# Import probes run from the project root so `src` and `scripts` resolve
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that must not be loaded by data-only commands
+HEAVY_MODULE_PREFIXES = (
+    'google.generativeai',
+    'google.ai.generativelanguage',
+    'google_auth_oauthlib',
+    'grpc',
+)
+
+_PROBE = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))\n"
+)
+
+
+def measure_import(module, runs=5):
+    """Import a module in fresh interpreters and report timing and any heavy SDK modules it loads."""
+    timings = []
+    heavy_modules = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module)],
+            cwd=project_root, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        heavy_modules.update(m for m in result['modules'] if m.startswith(HEAVY_MODULE_PREFIXES))
+    return {
+        'module': module,
+        'runs': runs,
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'heavy_modules': sorted(heavy_modules),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the CLI entry point.")
+    parser.add_argument('--module', default='scripts.tuning_runner', help="Module to import")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument('--budget_ms', type=float, default=None, help="Fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    report = measure_import(args.module, args.runs)
+    print(json.dumps(report, indent=2))
+    if report['heavy_modules']:
+        sys.exit(f"{args.module} imports heavy SDK modules: {', '.join(report['heavy_modules'][:5])}")
+    if args.budget_ms is not None and report['median_ms'] > args.budget_ms:
+        sys.exit(f"{args.module} took {report['median_ms']:.0f} ms to import (budget {args.budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
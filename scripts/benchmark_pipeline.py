@@ -0,0 +1,172 @@
+import os
+import sys
+import argparse
+import json
+import random
+import subprocess
+import tempfile
+import time
+
+# Add the project root directory to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+_WORDS = (
+    "the model data tuning example answer question system user assistant gemini token batch "
+    "latency value result context prompt response capital country number story review summary"
+).split()
+
+_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+# Preparation runs in a fresh interpreter so peak RSS covers only that run
+_PROBE = (
+    "import json, resource, sys, time\n"
+    "sys.path.insert(0, {root!r})\n"
+    "from src.data_preparation.data_preparator import DataPreparator\n"
+    "start = time.perf_counter()\n"
+    "records = sum(1 for _ in DataPreparator({path!r}, workers={workers}).iter_prepared())\n"
+    "elapsed = time.perf_counter() - start\n"
+    "peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,\n"
+    "              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+    "print(json.dumps({{'seconds': elapsed, 'records': records, 'peak_rss_kb': peak_kb}}))\n"
+)
+
+
+def parse_size(text):
+    """Parse a record count such as 1000, 10k or 10M."""
+    text = text.strip().lower()
+    if text[-1:] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(text)
+
+
+def synthetic_records(count, seed=0):
+    """Yield count chat records in the OpenAI fine-tuning format, with varied lengths and roles."""
+    rng = random.Random(seed)
+
+    def sentence(low, high):
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high)))
+
+    for idx in range(count):
+        messages = []
+        if rng.random() < 0.5:
+            messages.append({"role": "system", "content": sentence(5, 20)})
+        for _ in range(rng.choice((1, 1, 1, 2))):
+            messages.append({"role": "user", "content": f"{idx} {sentence(5, 60)}"})
+            messages.append({"role": "assistant", "content": sentence(5, 120)})
+        yield {"messages": messages}
+
+
+def write_synthetic_jsonl(path, count, seed=0):
+    """Write count synthetic records to path and return the file size in bytes."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in synthetic_records(count, seed):
+            f.write(json.dumps(record))
+            f.write('\n')
+    return os.path.getsize(path)
+
+
+def benchmark_preparation(path, workers=1):
+    """Validate and format a JSONL file in a fresh interpreter; report throughput and peak memory."""
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(root=project_root, path=path, workers=workers)],
+        cwd=project_root, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    size = os.path.getsize(path)
+    return {
+        'records': result['records'],
+        'workers': workers,
+        'seconds': round(result['seconds'], 3),
+        'records_per_second': round(result['records'] / result['seconds']),
+        'mb_per_second': round(size / result['seconds'] / 1e6, 2),
+        'peak_rss_mb': round(result['peak_rss_kb'] / 1024, 1),
+    }
+
+
+def benchmark_tuning(records=10_000, jobs=4, latency=0.01, tuning_seconds=0.5, poll_interval=0.05):
+    """
+    Submit and wait on tuning jobs against the fake backend.
+
+    Submission overhead is the time tune_model spends beyond the simulated API
+    latency; polling overhead is how long after the simulated tuning finished
+    each job was seen as complete.
+    """
+    from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+    from src.model_tuning.api_client import GeminiApiClient
+    from src.model_tuning.fake_backend import FakeGeminiBackend
+    from src.model_tuning.model_catalog import ModelCatalog
+    from src.model_tuning.model_tuner import ModelTuner
+    from src.model_tuning.tuning_orchestrator import TuningJobSpec, TuningOrchestrator
+
+    tuning_data = [
+        GeminiFinetuningData(text_input=record["messages"][-2]["content"], output=record["messages"][-1]["content"])
+        for record in synthetic_records(records)
+    ]
+    backend = FakeGeminiBackend(latency=latency, tuning_seconds=tuning_seconds, seed=0)
+    api = GeminiApiClient(limits={endpoint: (1000.0, 1000) for endpoint in ('list', 'get', 'create', 'generate')})
+    with backend.install():
+        tuner = ModelTuner(catalog=ModelCatalog(None), api=api, credentials=backend.credentials)
+
+        start = time.perf_counter()
+        tuner.tune_model(tuning_data, name="benchmark-submission")
+        submission = time.perf_counter() - start
+
+        orchestrator = TuningOrchestrator(tuner, max_concurrency=jobs, initial_poll_interval=poll_interval,
+                                          max_poll_interval=poll_interval * 4)
+        completed = orchestrator.run_sync(
+            [TuningJobSpec(tuning_data, name=f"benchmark-{idx}") for idx in range(jobs)])
+
+    durations = [job.duration for job in completed if job.succeeded]
+    return {
+        'records': records,
+        'jobs': jobs,
+        'submission_seconds': round(submission, 4),
+        'submission_overhead_seconds': round(submission - latency, 4),
+        'mean_polls': round(sum(job.polls for job in completed) / len(completed), 2),
+        'mean_polling_overhead_seconds': round(sum(durations) / len(durations) - tuning_seconds - latency, 4),
+        'failed_jobs': sum(1 for job in completed if not job.succeeded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data preparation and tuning job handling offline.")
+    parser.add_argument('--sizes', default='1k,100k', help="Comma-separated dataset sizes, e.g. 1k,1M,10M")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes used to prepare data")
+    parser.add_argument('--data_dir', default=None, help="Keep generated datasets here instead of a temp dir")
+    parser.add_argument('--jobs', type=int, default=4, help="Concurrent tuning jobs submitted to the fake backend")
+    parser.add_argument('--latency', type=float, default=0.01, help="Simulated API latency in seconds")
+    parser.add_argument('--tuning_seconds', type=float, default=0.5, help="Simulated tuning duration")
+    parser.add_argument('--skip_tuning', action='store_true', help="Only benchmark data preparation")
+    parser.add_argument('--output', default=None, help="Also write the JSON report to this file")
+    parser.add_argument('--min_records_per_second', type=float, default=None,
+                        help="Fail if preparation throughput drops below this on any size")
+    args = parser.parse_args()
+
+    report = {'preparation': []}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or tmp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for size in map(parse_size, args.sizes.split(',')):
+            path = os.path.join(data_dir, f'synthetic_{size}.jsonl')
+            if not os.path.exists(path):
+                write_synthetic_jsonl(path, size)
+            report['preparation'].append(benchmark_preparation(path, args.workers))
+
+    if not args.skip_tuning:
+        report['tuning'] = benchmark_tuning(jobs=args.jobs, latency=args.latency, tuning_seconds=args.tuning_seconds)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.min_records_per_second is not None:
+        slow = [run for run in report['preparation'] if run['records_per_second'] < args.min_records_per_second]
+        if slow:
+            sys.exit(f"Preparation throughput below {args.min_records_per_second:.0f} records/s: "
+                     f"{', '.join(str(run['records']) for run in slow)} records")
+
+
+if __name__ == "__main__":
+    main()
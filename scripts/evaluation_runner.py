@@ -0,0 +1,62 @@
+import os
+import sys
+import argparse
+import logging
+
+# Add the project root directory to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from config.settings import MAX_TOKENS, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_PATH, TEMPERATURE
+from src.evaluation import Evaluator, save_results
+from src.response_cache import ResponseCache
+
+class EvaluationRunner:
+    def __init__(self):
+        self.logger = self.setup_logging()
+
+    @staticmethod
+    def setup_logging():
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        return logging.getLogger(__name__)
+
+    def run(self, model_name, test_file, output_results, max_in_flight=16, use_cache=None):
+        # The SDK is only imported once a model is actually queried
+        from src.model_tuning.base_model_tuner import BaseModelHandler
+
+        if use_cache is None:
+            # Sampling at a non-zero temperature should draw a new response on every run
+            use_cache = TEMPERATURE == 0
+
+        self.logger.info(f"Evaluating {model_name} on {test_file}")
+        evaluator = Evaluator.for_tuned_model(
+            BaseModelHandler(), model_name, max_in_flight=max_in_flight,
+            generation_config={"temperature": TEMPERATURE, "max_output_tokens": MAX_TOKENS},
+            response_cache=ResponseCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES) if use_cache else None,
+        )
+        # Progress is kept next to the results so an interrupted run picks up where it stopped
+        results = evaluator.evaluate(test_file, progress_file=output_results + '.partial.jsonl')
+        save_results(results, output_results)
+        self.logger.info(f"Saved {len(results)} results to {output_results}")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a tuned Gemini model on a JSONL test set.")
+    parser.add_argument('--model_name', required=True, help="Tuned model name, e.g. tunedModels/my-model")
+    parser.add_argument('--test_file', required=True, help="Path to the JSONL test data")
+    parser.add_argument('--output_results', required=True, help="Where to save the evaluation results JSON")
+    parser.add_argument('--max_in_flight', type=int, default=16, help="Concurrent generate_content requests")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument('--response_cache', dest='use_cache', action='store_true', default=None,
+                       help="Reuse cached responses even when sampling at a non-zero temperature")
+    cache.add_argument('--no_response_cache', dest='use_cache', action='store_false',
+                       help="Always query the model (the default at a non-zero temperature)")
+    args = parser.parse_args()
+
+    EvaluationRunner().run(args.model_name, args.test_file, args.output_results, max_in_flight=args.max_in_flight,
+                           use_cache=args.use_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,32 +7,274 @@ import logging
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
+from config.settings import (
+    MAX_INPUT_TOKENS,
+    MAX_OUTPUT_TOKENS,
+    PREPARED_DATA_CACHE_DIR,
+    MAX_CONCURRENT_TUNING_JOBS,
+    PREPARED_DATA_CACHE_MAX_BYTES,
+    TUNING_JOB_REGISTRY_PATH,
+)
+from src.data_preparation.cache import PreparedDataCache
+from src.data_preparation.chat_message_formatters import ChatFormatter
 from src.data_preparation.data_preparator import DataPreparator
-from src.model_tuning.model_tuner import ModelTuner
+from src.data_preparation.deduplication import Deduplicator
+from src.data_preparation.token_budget import LengthPolicy
+from src.data_preparation.incremental import IncrementalPreparator
+from src.data_preparation.quarantine import Quarantine
+from src.data_preparation.splitting import DatasetSplitter, ReservoirSampler
+from src.instrumentation import RunMetrics, profiling
 
 class TuningRunner:
     def __init__(self):
         self.logger = self.setup_logging()
+        self.cache = PreparedDataCache(PREPARED_DATA_CACHE_DIR, PREPARED_DATA_CACHE_MAX_BYTES)
+        self.metrics = RunMetrics.default()
 
     @staticmethod
     def setup_logging():
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         return logging.getLogger(__name__)
 
-    def run(self, data_file, model_name):
+    def clear_cache(self):
+        self.logger.info("Clearing prepared data cache")
+        self.cache.clear()
+
+    def preparator(self, data_file, workers=1, use_cache=True, verbose=False, dedupe=None, dedupe_threshold=0.8,
+                   length_policy='drop', max_input_tokens=MAX_INPUT_TOKENS, max_output_tokens=MAX_OUTPUT_TOKENS,
+                   multi_turn='last_turn', lenient=False, quarantine_file=None, max_error_rate=None,
+                   split=None, split_ratios=None, split_seed=0, sample_size=None, sample_seed=0):
+        """Build the DataPreparator for a set of preparation options."""
+        deduplicator = None
+        if dedupe:
+            deduplicator = Deduplicator(near_duplicates=dedupe == 'near', threshold=dedupe_threshold)
+        policy = None
+        if length_policy:
+            policy = LengthPolicy(max_input_tokens, max_output_tokens, action=length_policy)
+        quarantine = None
+        if lenient:
+            quarantine = Quarantine(quarantine_file or data_file + '.quarantine.jsonl', max_error_rate)
+        splitter = DatasetSplitter(split_ratios, split_seed, keep=split) if split else None
+        sampler = ReservoirSampler(sample_size, sample_seed) if sample_size else None
+        return DataPreparator(data_file, workers=workers, cache=self.cache if use_cache else None,
+                              verbose=verbose, deduplicator=deduplicator, length_policy=policy,
+                              formatter=ChatFormatter(multi_turn), quarantine=quarantine,
+                              splitter=splitter, sampler=sampler)
+
+    def prepare(self, data_file, prepared_output=None, **options):
+        self.logger.info(f"Preparing data from {data_file}")
+        data_preparator = self.preparator(data_file, **options)
+        with self.metrics.span('prepare'):
+            if prepared_output:
+                # Only prepare lines appended since the last run
+                incremental_preparator = IncrementalPreparator(data_preparator, prepared_output)
+                incremental_preparator.run()
+                records = incremental_preparator.load_output()
+                # Splitting and sampling apply to the whole prepared output, not just the appended lines
+                if data_preparator.splitter is not None:
+                    records = list(data_preparator.splitter.filter(records))
+                if data_preparator.sampler is not None:
+                    records = data_preparator.sampler.sample(records)
+                return records
+            return data_preparator.prepare_dataset()
+
+    def write_splits(self, data_file, output_dir, split_ratios=None, split_seed=0, **options):
+        """Prepare the data once and write every split to <output_dir>/<split>.jsonl."""
+        self.logger.info(f"Writing splits of {data_file} to {output_dir}")
+        data_preparator = self.preparator(data_file, **options)
+        splitter = DatasetSplitter(split_ratios, split_seed)
+        with self.metrics.span('prepare'):
+            return splitter.write_splits(data_preparator.iter_prepared(), output_dir)
+
+    def tuner(self, use_registry=True):
+        """Set up a ModelTuner; the SDK is only imported once it is needed."""
+        from src.model_tuning.job_registry import JobRegistry
+        from src.model_tuning.model_tuner import ModelTuner
+
+        self.logger.info("Setting up ModelTuner")
+        with self.metrics.span('setup'):
+            return ModelTuner(registry=JobRegistry(TUNING_JOB_REGISTRY_PATH) if use_registry else None)
+
+    def run(self, data_file, model_name, use_registry=True, hyperparameters=None, **prepare_options):
         self.logger.info("Starting Gemini model tuning process")
 
         # Prepare data
-        self.logger.info(f"Preparing data from {data_file}")
-        data_preparator = DataPreparator(data_file)
-        tuning_data = data_preparator.prepare_data()
+        tuning_data = self.prepare(data_file, **prepare_options)
 
         # Set up and tune the model
-        self.logger.info("Setting up ModelTuner")
-        model_tuner = ModelTuner()
+        model_tuner = self.tuner(use_registry)
 
         self.logger.info("Starting model tuning")
-        tuning_operation = model_tuner.tune_model(tuning_data, name=model_name)
+        tuning_operation = model_tuner.tune_model(tuning_data, name=model_name, **(hyperparameters or {}))
 
         # Return the model name
-        return tuning_operation.metadata.name
\ No newline at end of file
+        return tuning_operation.metadata.name
+
+    def sweep(self, data_file, sweep_spec, max_concurrency=MAX_CONCURRENT_TUNING_JOBS, name_prefix='sweep',
+              sweep_report=None, use_registry=True, **prepare_options):
+        """Prepare the data once and tune it with every trial of a sweep spec."""
+        from src.model_tuning.sweep import HyperparameterSweep, load_sweep_spec
+
+        trials = load_sweep_spec(sweep_spec)
+        tuning_data = self.prepare(data_file, **prepare_options)
+        sweep = HyperparameterSweep(self.tuner(use_registry), max_concurrency=max_concurrency,
+                                    quota=MAX_CONCURRENT_TUNING_JOBS, name_prefix=name_prefix)
+        report = sweep.run(tuning_data, trials)
+        if sweep_report:
+            report.write_json(sweep_report)
+            self.logger.info(f"Wrote sweep report to {sweep_report}")
+        return report
+
+    def resume(self):
+        """Re-attach to the tuning jobs still in flight after a restart and wait for them to finish."""
+        model_tuner = self.tuner()
+        for operation in model_tuner.resume_in_flight():
+            try:
+                model_tuner.wait_for_tuning_completion(operation)
+            except Exception as e:
+                self.logger.error(f"Tuning job {operation.name} failed: {str(e)}")
+        return [job.to_dict() for job in model_tuner.registry.jobs()]
+
+    def write_reports(self, metrics_report=None, prometheus_textfile=None):
+        """Export stage timings and counters collected during the run."""
+        report = self.metrics.to_dict()
+        self.logger.info("Stage timings: " + ", ".join(
+            f"{stage} {stats['seconds']:.3f}s" for stage, stats in report['stages'].items()))
+        if metrics_report:
+            self.metrics.write_json(metrics_report)
+            self.logger.info(f"Wrote run report to {metrics_report}")
+        if prometheus_textfile:
+            self.metrics.write_prometheus(prometheus_textfile)
+            self.logger.info(f"Wrote Prometheus metrics to {prometheus_textfile}")
+
+
+def parse_split_ratios(text):
+    """Parse 'train=0.8,validation=0.1,test=0.1' into a dict of ratios."""
+    ratios = {}
+    for part in text.split(','):
+        name, _, ratio = part.partition('=')
+        ratios[name.strip()] = float(ratio)
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare training data and start a Gemini tuning job.")
+    parser.add_argument('--data_file',
+                        help="JSONL training data: a file, a directory or glob of shards, optionally .gz or .zst")
+    parser.add_argument('--model_name', default=None, help="Display name for the tuned model")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes used to prepare data")
+    parser.add_argument('--verbose', action='store_true', help="Print word counts for every data point")
+    parser.add_argument('--dedupe', choices=['exact', 'near'], default=None,
+                        help="Drop exact duplicates, or exact and near duplicates")
+    parser.add_argument('--dedupe_threshold', type=float, default=0.8,
+                        help="Estimated Jaccard similarity above which examples count as near duplicates")
+    parser.add_argument('--length_policy', choices=['drop', 'truncate', 'flag', 'off'], default='drop',
+                        help="What to do with examples over the token budget")
+    parser.add_argument('--max_input_tokens', type=int, default=MAX_INPUT_TOKENS,
+                        help="Token budget for each example's input")
+    parser.add_argument('--max_output_tokens', type=int, default=MAX_OUTPUT_TOKENS,
+                        help="Token budget for each example's output")
+    parser.add_argument('--multi_turn', choices=['last_turn', 'history'], default='last_turn',
+                        help="Keep only the last user turn of a conversation, or render earlier turns as history")
+    parser.add_argument('--lenient', action='store_true',
+                        help="Quarantine invalid lines and continue instead of stopping at the first one")
+    parser.add_argument('--quarantine_file', default=None,
+                        help="Where --lenient writes rejected lines (default: <data_file>.quarantine.jsonl)")
+    parser.add_argument('--max_error_rate', type=float, default=None,
+                        help="With --lenient, abort once more than this fraction of lines is invalid")
+    parser.add_argument('--split', choices=['train', 'validation', 'test'], default=None,
+                        help="Only prepare and upload this split, assigned by a hash of each example's content")
+    parser.add_argument('--split_ratios', default='train=0.8,validation=0.1,test=0.1',
+                        help="Relative sizes of the splits")
+    parser.add_argument('--split_seed', type=int, default=0, help="Seed of the split assignment hash")
+    parser.add_argument('--write_splits', default=None, metavar='DIR',
+                        help="Write every split to DIR/<split>.jsonl in one pass instead of tuning")
+    parser.add_argument('--sample_size', type=int, default=None,
+                        help="Only keep a uniform sample of this many examples, e.g. for a pilot run")
+    parser.add_argument('--sample_seed', type=int, default=0, help="Seed of the sample")
+    parser.add_argument('--source_model', default=None, help="Base model to tune")
+    parser.add_argument('--epoch_count', type=int, default=None, help="Tuning epochs (default: the service's)")
+    parser.add_argument('--batch_size', type=int, default=None, help="Tuning batch size (default: the service's)")
+    parser.add_argument('--learning_rate', type=float, default=None,
+                        help="Tuning learning rate (default: the service's)")
+    parser.add_argument('--sweep', default=None, metavar='SPEC',
+                        help="Tune once per trial of a JSON grid or random search spec over the hyperparameters")
+    parser.add_argument('--max_concurrent_jobs', type=int, default=MAX_CONCURRENT_TUNING_JOBS,
+                        help="Sweep jobs allowed in flight at once")
+    parser.add_argument('--sweep_report', default=None, help="Write the sweep comparison report to this JSON file")
+    parser.add_argument('--no_cache', action='store_true', help="Bypass the prepared data cache")
+    parser.add_argument('--no_job_registry', action='store_true',
+                        help="Always submit a new tuning job, even if an identical one was already submitted")
+    parser.add_argument('--resume', action='store_true',
+                        help="Re-attach to registered tuning jobs that are still running and wait for them")
+    parser.add_argument('--prepared_output', default=None,
+                        help="Prepare incrementally into this JSONL file, processing only appended lines")
+    parser.add_argument('--clear_cache', action='store_true', help="Remove all cached prepared datasets")
+    parser.add_argument('--prepare_only', action='store_true',
+                        help="Validate and prepare the data without loading the Gemini SDK or tuning")
+    parser.add_argument('--metrics_report', default=None, help="Write stage timings and counters to this JSON file")
+    parser.add_argument('--prometheus_textfile', default=None,
+                        help="Write metrics in Prometheus text format, e.g. for the node_exporter textfile collector")
+    parser.add_argument('--profile', default=None, help="Run under cProfile and dump the stats to this file")
+    parser.add_argument('--trace_memory', action='store_true', help="Record peak memory with tracemalloc")
+    args = parser.parse_args()
+
+    runner = TuningRunner()
+    if args.clear_cache:
+        runner.clear_cache()
+        if not args.data_file:
+            return
+    if args.resume:
+        for job in runner.resume():
+            print(f"{job['display_name']}: {job['tuned_model']} {job['state']}")
+        return
+    if not args.data_file:
+        parser.error("--data_file is required")
+
+    prepare_options = dict(
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        prepared_output=args.prepared_output,
+        verbose=args.verbose,
+        dedupe=args.dedupe,
+        dedupe_threshold=args.dedupe_threshold,
+        length_policy=None if args.length_policy == 'off' else args.length_policy,
+        max_input_tokens=args.max_input_tokens,
+        max_output_tokens=args.max_output_tokens,
+        multi_turn=args.multi_turn,
+        lenient=args.lenient,
+        quarantine_file=args.quarantine_file,
+        max_error_rate=args.max_error_rate,
+        split=args.split,
+        split_ratios=parse_split_ratios(args.split_ratios),
+        split_seed=args.split_seed,
+        sample_size=args.sample_size,
+        sample_seed=args.sample_seed,
+    )
+    try:
+        with profiling(runner.metrics, cprofile_path=args.profile, trace_memory=args.trace_memory):
+            if args.write_splits:
+                # Every split is written, so selecting one split or a sample does not apply
+                options = {key: value for key, value in prepare_options.items()
+                           if key not in ('prepared_output', 'split', 'sample_size', 'sample_seed')}
+                for name, path in runner.write_splits(args.data_file, args.write_splits, **options).items():
+                    print(f"{name}: {path}")
+            elif args.sweep:
+                report = runner.sweep(args.data_file, args.sweep, args.max_concurrent_jobs,
+                                      name_prefix=args.model_name or 'sweep', sweep_report=args.sweep_report,
+                                      use_registry=not args.no_job_registry, **prepare_options)
+                print(report.format_table())
+            elif args.prepare_only:
+                runner.prepare(args.data_file, **prepare_options)
+            else:
+                hyperparameters = {name: getattr(args, name) for name in
+                                   ('source_model', 'epoch_count', 'batch_size', 'learning_rate')
+                                   if getattr(args, name) is not None}
+                print(runner.run(args.data_file, args.model_name, use_registry=not args.no_job_registry,
+                                 hyperparameters=hyperparameters, **prepare_options))
+    finally:
+        runner.write_reports(args.metrics_report, args.prometheus_textfile)
+
+
+if __name__ == "__main__":
+    main()
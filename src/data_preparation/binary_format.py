@@ -0,0 +1,115 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, Sequence
+
+from .exceptions import InvalidDataFormatError
+from .gemini_finetuning_data import GeminiFinetuningData
+from .prepared_dataset import OFFSET_TYPECODE, PreparedDataset
+
+# File layout (all integers little-endian):
+#   header   magic, format version, reserved, record count, offset table position
+#   blob     UTF-8 text, alternating text_input and output for each record
+#   padding  zero bytes up to an 8-byte boundary
+#   offsets  2n+1 uint64 boundaries into the blob, as used by PreparedDataset
+MAGIC = b'GFTD'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+_OFFSET_SIZE = array(OFFSET_TYPECODE).itemsize
+
+
+class PreparedDataWriter:
+    """Stream prepared records into the binary prepared dataset format."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0))
+        self._offsets = array(OFFSET_TYPECODE, [0])
+        self._blob_size = 0
+
+    def __len__(self) -> int:
+        return (len(self._offsets) - 1) // 2
+
+    def write(self, record: GeminiFinetuningData) -> None:
+        """Append one record."""
+        for text in (record.text_input, record.output):
+            encoded = text.encode('utf-8')
+            self._file.write(encoded)
+            self._blob_size += len(encoded)
+            self._offsets.append(self._blob_size)
+
+    def write_all(self, records: Iterable[GeminiFinetuningData]) -> int:
+        """Append every record from an iterable and return how many were written."""
+        for record in records:
+            self.write(record)
+        return len(self)
+
+    def close(self) -> None:
+        """Write the offset table and header, then move the file into place."""
+        offsets_position = HEADER.size + self._blob_size
+        padding = -offsets_position % _OFFSET_SIZE
+        self._file.write(b'\0' * padding)
+        offsets = self._offsets
+        if sys.byteorder != 'little':
+            offsets = array(OFFSET_TYPECODE, offsets)
+            offsets.byteswap()
+        offsets.tofile(self._file)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(self), offsets_position + padding))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard a partially written file."""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> 'PreparedDataWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def open_prepared_dataset(path: str) -> PreparedDataset:
+    """
+    Memory-map a prepared dataset file and return a zero-copy PreparedDataset over it.
+
+    Nothing is parsed up front: records are decoded from the page cache on access,
+    so several processes can share one file. The mapping stays open for as long as
+    the returned dataset (or any view of it) is alive.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise InvalidDataFormatError(f"Not a prepared dataset file: {path}")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, count, offsets_position = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise InvalidDataFormatError(f"Not a prepared dataset file: {path}")
+    if version != FORMAT_VERSION:
+        raise InvalidDataFormatError(f"Unsupported prepared dataset version {version} in {path}")
+    offsets_end = offsets_position + (2 * count + 1) * _OFFSET_SIZE
+    if offsets_end > len(mapped):
+        raise InvalidDataFormatError(f"Truncated prepared dataset file: {path}")
+
+    view = memoryview(mapped)
+    raw_offsets = view[offsets_position:offsets_end]
+    offsets: Sequence[int]
+    if sys.byteorder == 'little':
+        offsets = raw_offsets.cast(OFFSET_TYPECODE)
+    else:
+        swapped = array(OFFSET_TYPECODE, raw_offsets.tobytes())
+        swapped.byteswap()
+        offsets = swapped
+    return PreparedDataset(view[HEADER.size:offsets_position], offsets)
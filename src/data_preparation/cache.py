@@ -0,0 +1,180 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+from typing import Any, Dict, Iterable, List, Optional
+
+from .binary_format import FORMAT_VERSION, PreparedDataWriter, open_prepared_dataset
+from .gemini_finetuning_data import GeminiFinetuningData
+from .prepared_dataset import PreparedDataset
+from .sources import resolve_sources
+
+# Bump when the on-disk layout of cache entries changes
+CACHE_FORMAT_VERSION = f"3.{FORMAT_VERSION}"
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'prepared_data')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_ENTRY_SUFFIX = '.gftd'
+# Next to each entry: the summary of the run that prepared it, and the lines it quarantined
+_REPORT_SUFFIX = '.summary.json'
+_QUARANTINE_SUFFIX = '.quarantine.jsonl'
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def _package_source_digest() -> str:
+    digest = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            with open(os.path.join(package_dir, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def code_version(preparator) -> str:
+    """Hash the source of the preparation pipeline and of the preparator class hierarchy."""
+    digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+    digest.update(_package_source_digest().encode())
+    for cls in type(preparator).__mro__:
+        module = inspect.getmodule(cls)
+        if cls is object or module is None or module.__name__.startswith(__package__ + '.'):
+            continue
+        digest.update(cls.__qualname__.encode())
+        try:
+            digest.update(inspect.getsource(cls).encode())
+        except (OSError, TypeError):
+            pass
+    return digest.hexdigest()
+
+
+class PreparedDataCache:
+    """
+    Content-addressed on-disk cache of prepared datasets with size-bounded LRU eviction.
+
+    Each entry keeps the summary of the run that prepared it and the lines that
+    run quarantined, so a cache hit reports and quarantines the same as a fresh run.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+
+    def key_for(self, preparator) -> str:
+        """Build the cache key from the input file bytes, the pipeline settings and the code version."""
+        digest = hashlib.sha256(code_version(preparator).encode())
+        digest.update(json.dumps(preparator.pipeline_config(), sort_keys=True).encode())
+        sources = resolve_sources(preparator.file_path)
+        for index, source in enumerate(sources):
+            if len(sources) > 1:
+                # Keep shard boundaries and order in the key; compressed shards are hashed as stored
+                digest.update(f"\0shard {index} {os.path.getsize(source)}\0".encode())
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+
+    def _sidecar_paths(self, entry_path: str) -> List[str]:
+        base = entry_path[:-len(_ENTRY_SUFFIX)]
+        return [base + _REPORT_SUFFIX, base + _QUARANTINE_SUFFIX]
+
+    def quarantine_path(self, key: str) -> str:
+        """Where the lines quarantined while preparing an entry are kept."""
+        return os.path.join(self.cache_dir, key + _QUARANTINE_SUFFIX)
+
+    def get(self, key: str) -> Optional[PreparedDataset]:
+        """Return the memory-mapped cached dataset for a key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            dataset = open_prepared_dataset(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Discarding unreadable cache entry {path}: {str(e)}")
+            self._remove_entry(path)
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        self.logger.info(f"Prepared data cache hit: {key}")
+        return dataset
+
+    def put(self, key: str, data: Iterable[GeminiFinetuningData]) -> int:
+        """Stream a prepared dataset into the cache under a key and evict old entries beyond the size limit."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with PreparedDataWriter(self._entry_path(key)) as writer:
+            count = writer.write_all(data)
+        self.logger.info(f"Stored {count} prepared items in cache: {key}")
+        self.evict(keep=key)
+        return count
+
+    def put_report(self, key: str, summary: Dict[str, Any], quarantine_path: Optional[str] = None) -> None:
+        """Store the summary of the run that prepared an entry, and a copy of the lines it quarantined."""
+        if quarantine_path is not None and os.path.exists(quarantine_path):
+            shutil.copyfile(quarantine_path, self.quarantine_path(key))
+        report_path = os.path.join(self.cache_dir, key + _REPORT_SUFFIX)
+        with open(report_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(summary, f)
+        os.replace(report_path + '.tmp', report_path)
+
+    def get_report(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the summary stored with an entry, or None if there is none."""
+        try:
+            with open(os.path.join(self.cache_dir, key + _REPORT_SUFFIX), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            self.logger.warning(f"Ignoring unreadable summary of cache entry {key}: {str(e)}")
+            return None
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used entries, other than keep, until the cache fits in max_bytes."""
+        keep_path = self._entry_path(keep) if keep is not None else None
+        entries = []
+        for entry in self._entries():
+            if entry.path == keep_path:
+                continue
+            entries.append((entry.stat().st_mtime, self._entry_size(entry.path), entry.path))
+        total = sum(size for _, size, _ in entries)
+        if keep_path is not None and os.path.exists(keep_path):
+            total += self._entry_size(keep_path)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.logger.info(f"Evicting prepared data cache entry {path}")
+            self._remove_entry(path)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        for entry in self._entries():
+            self._remove_entry(entry.path)
+        self.logger.info(f"Cleared prepared data cache in {self.cache_dir}")
+
+    def _entries(self) -> List[os.DirEntry]:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith(_ENTRY_SUFFIX)]
+
+    def _entry_size(self, path: str) -> int:
+        return sum(os.path.getsize(p) for p in [path, *self._sidecar_paths(path)] if os.path.exists(p))
+
+    def _remove_entry(self, path: str) -> None:
+        for p in [path, *self._sidecar_paths(path)]:
+            self._remove(p)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
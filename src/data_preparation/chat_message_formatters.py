@@ -1,9 +1,129 @@
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 class Message(Dict[str, str]):
     role: str
     content: str
 
+DEFAULT_SYSTEM_TEMPLATE = "<instructions>\n{content}</instructions>\n\n"
+DEFAULT_USER_TEMPLATE = "<input>\n{content}\n</input>"
+DEFAULT_OUTPUT_TEMPLATE = "{content}"
+DEFAULT_HISTORY_TEMPLATE = "<history>\n{content}</history>\n\n"
+DEFAULT_TURN_TEMPLATE = "<{role}>\n{content}\n</{role}>\n"
+
+MULTI_TURN_STRATEGIES = ('last_turn', 'history')
+
+
+def _compile(template: str, **fixed: str) -> Tuple[str, str]:
+    """Split a template around its {content} placeholder so rendering is plain concatenation."""
+    parts = template.replace('{{', '\0').replace('}}', '\1').split('{content}')
+    if len(parts) != 2:
+        raise ValueError(f"Template must contain {{content}} exactly once: {template!r}")
+    prefix, suffix = (part.format(**fixed).replace('\0', '{').replace('\1', '}') for part in parts)
+    return prefix, suffix
+
+
+class ChatFormatter:
+    """
+    Render OpenAI chat records as Gemini (text_input, output) pairs in one pass over the messages.
+
+    Templates are compiled once into prefix/suffix pairs around their {content}
+    placeholder. The output is the last assistant message. How the rest of a
+    multi-turn conversation is rendered depends on the strategy:
+
+    - 'last_turn': the last system and last user message only, as before.
+    - 'history': turns before the final assistant reply are kept, in order, in a
+      history block ahead of the final user message, so no context is lost.
+    """
+
+    def __init__(self, strategy: str = 'last_turn', system_template: str = DEFAULT_SYSTEM_TEMPLATE,
+                 user_template: str = DEFAULT_USER_TEMPLATE, output_template: str = DEFAULT_OUTPUT_TEMPLATE,
+                 history_template: str = DEFAULT_HISTORY_TEMPLATE, turn_template: str = DEFAULT_TURN_TEMPLATE):
+        if strategy not in MULTI_TURN_STRATEGIES:
+            raise ValueError(f"strategy must be one of {MULTI_TURN_STRATEGIES}, got {strategy!r}")
+        self.strategy = strategy
+        self.templates = {
+            'system': system_template,
+            'user': user_template,
+            'output': output_template,
+            'history': history_template,
+            'turn': turn_template,
+        }
+        self._system = _compile(system_template)
+        self._user = _compile(user_template)
+        self._output = _compile(output_template)
+        self._history = _compile(history_template)
+        self._turns = {role: _compile(turn_template, role=role) for role in ('user', 'assistant')}
+
+    def config(self) -> Dict[str, Any]:
+        return {"strategy": self.strategy, "templates": self.templates}
+
+    def format(self, data: 'OpenAIChatFormat') -> Tuple[str, str]:
+        """Return the (text_input, output) pair for one record."""
+        messages = data['messages']
+        system, user_index, assistant_index = self._scan(messages)
+        if user_index < 0:
+            raise ValueError("User message is required but missing.")
+        if assistant_index < 0:
+            raise ValueError("Assistant message is required but missing.")
+        text_input = self._render_input(messages, system, user_index, assistant_index)
+        return text_input, self._output[0] + messages[assistant_index]["content"] + self._output[1]
+
+    def format_input(self, data: 'OpenAIChatFormat') -> str:
+        """Return the text_input for one record, which needs no assistant reply, e.g. to build a prompt."""
+        messages = data['messages']
+        system, user_index, assistant_index = self._scan(messages)
+        if user_index < 0:
+            raise ValueError("User message is required but missing.")
+        # Without a reply after the last user message, that message is the prompt and every turn leads up to it
+        return self._render_input(messages, system, user_index,
+                                  assistant_index if assistant_index > user_index else len(messages))
+
+    @staticmethod
+    def _scan(messages: List[Message]) -> Tuple[Optional[str], int, int]:
+        """The last system message, and the indices of the last user and last assistant messages (-1 if none)."""
+        system = None
+        user_index = assistant_index = -1
+        for index, message in enumerate(messages):
+            role = message["role"]
+            if role == "assistant":
+                assistant_index = index
+            elif role == "user":
+                user_index = index
+            elif role == "system":
+                system = message["content"]
+        return system, user_index, assistant_index
+
+    def _render_input(self, messages: List[Message], system: Optional[str], user_index: int,
+                      assistant_index: int) -> str:
+        parts = []
+        if system is not None:
+            parts.append(self._system[0] + system + self._system[1])
+
+        if self.strategy == 'history':
+            if user_index > assistant_index:
+                # Fall back to the last user message before the final reply
+                user_index = max((i for i in range(assistant_index) if messages[i]["role"] == "user"), default=-1)
+                if user_index < 0:
+                    raise ValueError("User message is required but missing.")
+            turns = [
+                self._turns[message["role"]][0] + message["content"] + self._turns[message["role"]][1]
+                for message in messages[:user_index] if message["role"] in self._turns
+            ]
+            if turns:
+                parts.append(self._history[0] + "".join(turns) + self._history[1])
+
+        parts.append(self._user[0] + messages[user_index]["content"] + self._user[1])
+        return "".join(parts)
+
+    def format_batch(self, records: Iterable['OpenAIChatFormat']) -> List[Tuple[str, str]]:
+        """Format many records at once."""
+        format_record = self.format
+        return [format_record(data) for data in records]
+
+
+DEFAULT_FORMATTER = ChatFormatter()
+
+
 class OpenAIChatFormat(dict):
     messages: List[Message]
 
@@ -13,24 +133,9 @@ class OpenAIChatFormat(dict):
     @classmethod
     def format_input(cls, data: 'OpenAIChatFormat') -> str:
         """Format input messages (system and user) with XML tags."""
-        messages = {msg["role"]: msg["content"] for msg in data['messages']}
-        
-        if "user" not in messages:
-            raise ValueError("User message is required but missing.")
-        
-        formatted_messages = [f"<input>\n{messages['user']}\n</input>"]
-        
-        if "system" in messages:
-            formatted_messages.insert(0, f"<instructions>\n{messages['system']}</instructions>\n\n")
-        
-        return "".join(formatted_messages)
+        return DEFAULT_FORMATTER.format_input(data)
 
     @classmethod
     def format_output(cls, data: 'OpenAIChatFormat') -> str:
         """Format the assistant's message with XML tags."""
-        messages = {msg["role"]: msg["content"] for msg in data['messages']}
-        
-        if "assistant" not in messages:
-            raise ValueError("Assistant message is required but missing.")
-        
-        return messages['assistant']
\ No newline at end of file
+        return DEFAULT_FORMATTER.format(data)[1]
@@ -1,15 +1,68 @@
 import json
 import logging
-from typing import List
-from .chat_message_formatters import OpenAIChatFormat
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.instrumentation import RunMetrics
+from .binary_format import PreparedDataWriter
+from .cache import PreparedDataCache
+from .chat_message_formatters import ChatFormatter, DEFAULT_FORMATTER, OpenAIChatFormat
+from .deduplication import Deduplicator
 from .gemini_finetuning_data import GeminiFinetuningData
 from .exceptions import InvalidDataFormatError, InvalidJSONError
+from .parallel import DEFAULT_CHUNK_SIZE, imap_ordered, read_chunk_lines, split_into_chunks
+from .prepared_dataset import PreparedDataset
+from .quarantine import Quarantine
+from .sources import ShardReader, SourceSpec, is_compressed, resolve_sources
+from .splitting import DatasetSplitter, ReservoirSampler
+from .statistics import DatasetStatistics
+from .token_budget import LengthPolicy
 
 class DataPreparator:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: SourceSpec, workers: Optional[int] = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 cache: Optional[PreparedDataCache] = None, verbose: bool = False,
+                 deduplicator: Optional[Deduplicator] = None, length_policy: Optional[LengthPolicy] = None,
+                 formatter: Optional[ChatFormatter] = None, quarantine: Optional[Quarantine] = None,
+                 splitter: Optional[DatasetSplitter] = None, sampler: Optional[ReservoirSampler] = None):
         self.file_path = file_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.verbose = verbose
+        self.deduplicator = deduplicator
+        self.length_policy = length_policy
+        self.formatter = formatter if formatter is not None else DEFAULT_FORMATTER
+        self.quarantine = quarantine
+        self.splitter = splitter
+        self.sampler = sampler
+        self.statistics: Optional[DatasetStatistics] = None
+        # Summary of the run that prepared a dataset served from the cache
+        self.cached_summary: Optional[Dict[str, Any]] = None
         self.logger = logging.getLogger(__name__)
 
+    def __getstate__(self):
+        # Worker processes only need what is used to parse and format lines
+        state = self.__dict__.copy()
+        state['statistics'] = None
+        state['deduplicator'] = None
+        state['length_policy'] = None
+        state['quarantine'] = None
+        state['splitter'] = None
+        state['sampler'] = None
+        return state
+
+    def pipeline_config(self) -> dict:
+        """Settings of the optional stages that change which records are produced."""
+        return {
+            "formatter": self.formatter.config(),
+            "deduplicator": self.deduplicator.config() if self.deduplicator is not None else None,
+            "length_policy": self.length_policy.config() if self.length_policy is not None else None,
+            "validation": self.quarantine.config() if self.quarantine is not None else None,
+            "split": self.splitter.config() if self.splitter is not None else None,
+            "sample": self.sampler.config() if self.sampler is not None else None,
+        }
+
     def validate_openai_chat_format(self, data: OpenAIChatFormat) -> bool:
         """Validate if the data follows the OpenAI chat format."""
         if not isinstance(data, OpenAIChatFormat) or "messages" not in data:
@@ -21,24 +74,73 @@ class DataPreparator:
                 return False
         return True
 
-    def load_and_validate_data(self) -> List[OpenAIChatFormat]:
-        """Load training data from a JSONL file and validate its format."""
-        data = []
+    def parse_line(self, line: bytes, line_number: int, source: Optional[str] = None) -> OpenAIChatFormat:
+        """Parse and validate a single JSONL line; source names the shard it came from, if any."""
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            raise InvalidJSONError(f"Invalid JSON in {_location(line_number, source)}")
+        if 'messages' not in item:
+            raise InvalidDataFormatError(f"Missing 'messages' key in {_location(line_number, source)}")
+        chat_format = OpenAIChatFormat(messages=item['messages'])
+        if not self.validate_openai_chat_format(chat_format):
+            raise InvalidDataFormatError(f"Invalid OpenAI chat format in {_location(line_number, source)}")
+        return chat_format
+
+    def format_record(self, item: OpenAIChatFormat) -> GeminiFinetuningData:
+        """Format a single OpenAI chat record for Gemini finetuning."""
+        text_input, output = self.formatter.format(item)
+        return GeminiFinetuningData(text_input=text_input, output=output)
+
+    def is_single_file(self) -> bool:
+        """Whether the source is one uncompressed file, which can be split into byte ranges."""
+        sources = resolve_sources(self.file_path)
+        return len(sources) == 1 and not is_compressed(sources[0])
+
+    def iter_source_lines(self) -> Iterator[Tuple[Optional[str], int, bytes]]:
+        """
+        Yield (shard, line number, line) for every line of the source.
+
+        A single uncompressed file is read directly and shard is None. Globs,
+        directories and compressed shards are streamed through a ShardReader that
+        decompresses up to self.workers shards in parallel; line numbers restart
+        at 1 in every shard.
+        """
+        sources = resolve_sources(self.file_path)
+        if len(sources) == 1 and not is_compressed(sources[0]):
+            with open(sources[0], 'rb') as f:
+                for line_number, line in enumerate(f, 1):
+                    yield None, line_number, line
+        else:
+            self.logger.info(f"Reading {len(sources)} shards with {self.workers} decompression threads")
+            yield from ShardReader(sources, workers=self.workers)
+
+    def iter_validated_data(self) -> Iterator[OpenAIChatFormat]:
+        """Lazily load and validate training data from a JSONL file, one record at a time."""
+        count = 0
+        line_number = 0
+        bytes_read = 0
+        # Stage times are summed locally and reported once, to keep the per-line cost small
+        read_seconds = 0.0
+        validate_seconds = 0.0
         self.logger.info(f"Starting to load and validate data from {self.file_path}")
 
         try:
-            with open(self.file_path, 'r') as f:
-                for line_number, line in enumerate(f, 1):
-                    try:
-                        item = json.loads(line)
-                        if 'messages' not in item:
-                            raise InvalidDataFormatError(f"Missing 'messages' key in line {line_number}")
-                        chat_format = OpenAIChatFormat(messages=item['messages'])
-                        if not self.validate_openai_chat_format(chat_format):
-                            raise InvalidDataFormatError(f"Invalid OpenAI chat format in line {line_number}")
-                        data.append(chat_format)
-                    except json.JSONDecodeError:
-                        raise InvalidJSONError(f"Invalid JSON in line {line_number}")
+            lines = self.iter_source_lines()
+            while True:
+                start = time.perf_counter()
+                entry = next(lines, None)
+                read_done = time.perf_counter()
+                read_seconds += read_done - start
+                if entry is None:
+                    break
+                source, source_line_number, line = entry
+                line_number += 1
+                bytes_read += len(line)
+                item = self.parse_line(line, source_line_number, source)
+                validate_seconds += time.perf_counter() - read_done
+                yield item
+                count += 1
         except FileNotFoundError:
             self.logger.error(f"File not found: {self.file_path}")
             raise
@@ -48,39 +150,316 @@ class DataPreparator:
         except Exception as e:
             self.logger.error(f"Unexpected error while loading file: {str(e)}")
             raise
+        finally:
+            metrics = RunMetrics.default()
+            metrics.add_time('prepare.read', read_seconds, count=line_number)
+            metrics.add_time('prepare.validate', validate_seconds, count=count)
+            metrics.incr('prepare.lines_read', line_number)
+            metrics.incr('prepare.bytes_read', bytes_read)
 
-        if not data:
+        if not count:
             error_msg = f"No valid data found in {self.file_path}"
             self.logger.error(error_msg)
             raise InvalidDataFormatError(error_msg)
 
-        self.logger.info(f"Successfully loaded and validated {len(data)} items from {self.file_path}")
-        return data
+        self.logger.info(f"Successfully loaded and validated {count} items from {self.file_path}")
+
+    def iter_formatted_data_lenient(self) -> Iterator[GeminiFinetuningData]:
+        """
+        Load, validate, and format the file in one pass, quarantining invalid lines.
+
+        Lines that are not valid JSON, not in the chat format or cannot be formatted
+        are handed to self.quarantine with their line number and the reason, and
+        processing continues with the next line.
+        """
+        count = 0
+        line_number = 0
+        bytes_read = 0
+        read_seconds = 0.0
+        format_seconds = 0.0
+        quarantine = self.quarantine
+        assert quarantine is not None
+        self.logger.info(f"Starting to load and validate data from {self.file_path}, quarantining invalid lines")
+
+        try:
+            lines = self.iter_source_lines()
+            while True:
+                start = time.perf_counter()
+                entry = next(lines, None)
+                read_done = time.perf_counter()
+                read_seconds += read_done - start
+                if entry is None:
+                    break
+                source, source_line_number, line = entry
+                line_number += 1
+                bytes_read += len(line)
+                try:
+                    record = self.format_record(self.parse_line(line, source_line_number, source))
+                except (InvalidDataFormatError, InvalidJSONError, ValueError, TypeError, KeyError) as e:
+                    quarantine.reject(source_line_number, line, e, source=source, lines_seen=line_number)
+                    continue
+                format_seconds += time.perf_counter() - read_done
+                count += 1
+                yield record
+            quarantine.finish(line_number)
+        except FileNotFoundError:
+            self.logger.error(f"File not found: {self.file_path}")
+            raise
+        except (InvalidDataFormatError, InvalidJSONError) as e:
+            self.logger.error(str(e))
+            raise
+        finally:
+            quarantine.close()
+            metrics = RunMetrics.default()
+            metrics.add_time('prepare.read', read_seconds, count=line_number)
+            metrics.add_time('prepare.validate_and_format', format_seconds, count=count)
+            metrics.incr('prepare.lines_read', line_number)
+            metrics.incr('prepare.bytes_read', bytes_read)
+            metrics.incr('prepare.quarantined', quarantine.rejected)
+
+        if not count:
+            error_msg = f"No valid data found in {self.file_path}"
+            self.logger.error(error_msg)
+            raise InvalidDataFormatError(error_msg)
+
+        self.logger.info(f"Successfully loaded and validated {count} items from {self.file_path}")
+
+    def load_and_validate_data(self) -> List[OpenAIChatFormat]:
+        """Load training data from a JSONL file and validate its format."""
+        return list(self.iter_validated_data())
+
+    def iter_formatted_data(self, data: Iterable[OpenAIChatFormat]) -> Iterator[GeminiFinetuningData]:
+        """Lazily format OpenAI chat records into the structure for Gemini finetuning."""
+        count = 0
+        format_seconds = 0.0
+        try:
+            for item in data:
+                start = time.perf_counter()
+                record = self.format_record(item)
+                format_seconds += time.perf_counter() - start
+                count += 1
+                yield record
+        finally:
+            RunMetrics.default().add_time('prepare.format', format_seconds, count=count)
 
     def format_data_for_gemini(self, data: List[OpenAIChatFormat]) -> List[GeminiFinetuningData]:
         """Format the OpenAI chat data into the required structure for Gemini finetuning."""
-        return [
-            GeminiFinetuningData(
-                text_input=OpenAIChatFormat.format_input(item),
-                output=OpenAIChatFormat.format_output(item)
-            )
-            for item in data
-        ]
-    
-    def prepare_data(self) -> List[GeminiFinetuningData]:
-        """Load, validate, and format data for Gemini finetuning."""
+        return [GeminiFinetuningData(text_input=text_input, output=output)
+                for text_input, output in self.formatter.format_batch(data)]
+
+    def iter_formatted_data_parallel(self) -> Iterator[GeminiFinetuningData]:
+        """
+        Load, validate, and format the file across a pool of worker processes.
+
+        The file is split into newline-aligned byte ranges which are processed
+        concurrently; results are yielded in file order and errors carry the
+        same line numbers as the single-process path. With a quarantine, workers
+        report every invalid line and those lines are quarantined instead.
+        """
+        count = 0
+        line_offset = 0
+        chunk_count = 0
+        bytes_read = 0
+        # Time this process spends blocked on workers; the work itself happens in the pool
+        wait_seconds = 0.0
+        self.logger.info(f"Starting to load and validate data from {self.file_path} "
+                         f"with {self.workers} worker processes")
+
         try:
-            raw_data = self.load_and_validate_data()
-            formatted_data = self.format_data_for_gemini(raw_data)
-            
-            # Print word counts for each data point 
-            for idx, data in enumerate(formatted_data):
-                input_word_count = len(data.text_input.split())
-                output_word_count = len(data.output.split())
-                print(f"Data point {idx + 1}: Input words: {input_word_count}, Output words: {output_word_count}")
-            
-            return formatted_data
-        except (InvalidDataFormatError, InvalidJSONError, FileNotFoundError) as e:
+            chunks = split_into_chunks(resolve_sources(self.file_path)[0], self.chunk_size)
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                quarantine = self.quarantine
+                lenient = quarantine is not None
+                chunk_args = ((self, start, end, lenient) for start, end in chunks)
+                results = imap_ordered(executor, _prepare_chunk, chunk_args, max_in_flight=self.workers * 2)
+                while True:
+                    start = time.perf_counter()
+                    result = next(results, None)
+                    wait_seconds += time.perf_counter() - start
+                    if result is None:
+                        break
+                    records, line_count, failures = result
+                    bytes_read += chunks[chunk_count][1] - chunks[chunk_count][0]
+                    chunk_count += 1
+                    for text_input, output in records:
+                        yield GeminiFinetuningData(text_input=text_input, output=output)
+                    count += len(records)
+                    for local_line_number, line in failures:
+                        error = self._line_error(line, line_offset + local_line_number)
+                        if quarantine is None:
+                            raise error
+                        quarantine.reject(line_offset + local_line_number, line, error)
+                    line_offset += line_count
+            if quarantine is not None:
+                quarantine.finish(line_offset)
+        except FileNotFoundError:
+            self.logger.error(f"File not found: {self.file_path}")
+            raise
+        except (InvalidDataFormatError, InvalidJSONError) as e:
+            self.logger.error(str(e))
             raise
         except Exception as e:
+            self.logger.error(f"Unexpected error while loading file: {str(e)}")
             raise
+        finally:
+            metrics = RunMetrics.default()
+            metrics.add_time('prepare.wait_for_workers', wait_seconds, count=chunk_count)
+            metrics.incr('prepare.lines_read', line_offset)
+            metrics.incr('prepare.bytes_read', bytes_read)
+            if self.quarantine is not None:
+                self.quarantine.close()
+                metrics.incr('prepare.quarantined', self.quarantine.rejected)
+
+        if not count:
+            error_msg = f"No valid data found in {self.file_path}"
+            self.logger.error(error_msg)
+            raise InvalidDataFormatError(error_msg)
+
+        self.logger.info(f"Successfully loaded and validated {count} items from {self.file_path}")
+
+    def _line_error(self, line: bytes, line_number: int) -> Exception:
+        """Re-run a line that failed in a worker to get its error with the file line number."""
+        try:
+            self.format_record(self.parse_line(line, line_number))
+        except Exception as e:
+            return e
+        return InvalidDataFormatError(f"Failed to process line {line_number}")
+
+    def iter_prepared(self) -> Iterator[GeminiFinetuningData]:
+        """
+        Load, validate, and format data for Gemini finetuning as a stream.
+
+        Each line is read, validated, formatted and yielded before the next one is
+        touched, so memory stays flat regardless of the size of the file. With more
+        than one worker, chunks of the file are processed in parallel instead.
+
+        Records over the token budget are handled when a length policy is configured,
+        then duplicates are dropped when a deduplicator is configured. A splitter
+        keeps a single split, and a sampler reduces the stream to a fixed-size
+        sample, yielded once the whole source has been read. Lengths are
+        collected into self.statistics along the way and a single JSON summary is
+        printed once the stream is exhausted. With a quarantine, invalid lines are
+        set aside and reported instead of stopping the stream.
+        """
+        self.cached_summary = None
+        if self.quarantine is not None:
+            self.quarantine.reset()
+        if self.workers > 1 and self.is_single_file():
+            formatted_data = self.iter_formatted_data_parallel()
+        elif self.quarantine is not None:
+            formatted_data = self.iter_formatted_data_lenient()
+        else:
+            formatted_data = self.iter_formatted_data(self.iter_validated_data())
+
+        if self.length_policy is not None:
+            self.length_policy.reset()
+            formatted_data = self.length_policy.filter(formatted_data)
+        if self.deduplicator is not None:
+            self.deduplicator.reset()
+            formatted_data = self.deduplicator.filter(formatted_data)
+        if self.splitter is not None and self.splitter.keep is not None:
+            self.splitter.reset()
+            formatted_data = self.splitter.filter(formatted_data)
+        if self.sampler is not None:
+            self.sampler.reset()
+            formatted_data = self.sampler.filter(formatted_data)
+
+        metrics = RunMetrics.default()
+        self.statistics = DatasetStatistics()
+        idx = 0
+        try:
+            for idx, data in enumerate(self.statistics.observe(formatted_data), 1):
+                if self.verbose:
+                    # Print word counts for each data point
+                    input_word_count = len(data.text_input.split())
+                    output_word_count = len(data.output.split())
+                    print(f"Data point {idx}: Input words: {input_word_count}, Output words: {output_word_count}")
+                yield data
+        except (InvalidDataFormatError, InvalidJSONError):
+            metrics.incr('prepare.errors')
+            raise
+        finally:
+            metrics.incr('prepare.records', idx)
+        print(json.dumps(self.summary()))
+
+    def summary(self) -> dict:
+        """Statistics and stage reports for the most recently prepared stream."""
+        if self.cached_summary is not None:
+            return dict(self.cached_summary)
+        summary = self.statistics.summary() if self.statistics is not None else {}
+        if self.quarantine is not None:
+            summary["validation"] = self.quarantine.report()
+        if self.length_policy is not None:
+            summary["length_policy"] = self.length_policy.report()
+        if self.deduplicator is not None:
+            summary["deduplication"] = self.deduplicator.report()
+        if self.splitter is not None:
+            summary["split"] = self.splitter.report()
+        if self.sampler is not None:
+            summary["sample"] = self.sampler.report()
+        return summary
+
+    def write_prepared(self, output_path: str) -> int:
+        """Stream prepared records into a binary prepared dataset file and return the record count."""
+        with PreparedDataWriter(output_path) as writer:
+            count = writer.write_all(self.iter_prepared())
+        self.logger.info(f"Wrote {count} prepared items to {output_path}")
+        return count
+
+    def prepare_dataset(self) -> PreparedDataset:
+        """Load, validate, and format data into a compact PreparedDataset, using the cache when configured."""
+        if self.cache is None:
+            return PreparedDataset.from_records(self.iter_prepared())
+
+        key = self.cache.key_for(self)
+        dataset = self.cache.get(key)
+        report = self.cache.get_report(key) if dataset is not None else None
+        if dataset is not None and report is not None:
+            self.logger.info(f"Loaded {len(dataset)} prepared items for {self.file_path} from cache")
+            # Report and quarantine as the run that prepared the entry did
+            if self.quarantine is not None:
+                self.quarantine.restore(report["validation"], self.cache.quarantine_path(key))
+            self.cached_summary = report
+            print(json.dumps(report))
+            return dataset
+
+        self.cache.put(key, self.iter_prepared())
+        self.cache.put_report(key, self.summary(), self.quarantine.path if self.quarantine is not None else None)
+        dataset = self.cache.get(key)
+        if dataset is None:
+            raise RuntimeError(f"Prepared data cache entry {key} disappeared after being written")
+        return dataset
+
+    def prepare_data(self) -> List[GeminiFinetuningData]:
+        """Load, validate, and format data for Gemini finetuning, using the cache when configured."""
+        if self.cache is None:
+            return list(self.iter_prepared())
+        return list(self.prepare_dataset())
+
+
+def _location(line_number: int, source: Optional[str]) -> str:
+    return f"line {line_number}" if source is None else f"line {line_number} of {source}"
+
+
+def _prepare_chunk(preparator: DataPreparator, start: int, end: int,
+                   lenient: bool = False) -> Tuple[List[Tuple[str, str]], int, List[Tuple[int, bytes]]]:
+    """
+    Worker entry point: validate and format the lines in one byte range.
+
+    Returns the formatted (text_input, output) pairs, the number of lines in the
+    range, and the chunk-local line numbers and raw bytes of failing lines: only
+    the first one, unless lenient.
+    """
+    lines = read_chunk_lines(resolve_sources(preparator.file_path)[0], start, end)
+    records: List[Tuple[str, str]] = []
+    failures = []
+    for local_line_number, line in enumerate(lines, 1):
+        try:
+            data = preparator.format_record(preparator.parse_line(line, local_line_number))
+        except Exception:
+            failures.append((local_line_number, line))
+            if not lenient:
+                return records, len(lines), failures
+            continue
+        records.append((data.text_input, data.output))
+    return records, len(lines), failures
@@ -0,0 +1,245 @@
+import hashlib
+import logging
+import re
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .gemini_finetuning_data import GeminiFinetuningData
+
+# Permutations are universal hashes (a * x + b) mod p over the Mersenne prime 2^31 - 1: with x, a and b below p
+# every intermediate stays below 2^63, so the uint64 arithmetic is exact, and signatures fit in uint32
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_PATTERN = re.compile(r'\w+')
+MAX_REPORTED_DROPS = 20
+
+
+class CompactHashSet:
+    """Open-addressing set of 64-bit fingerprints stored in one flat array (about 16 bytes per entry)."""
+
+    def __init__(self, capacity: int = 1024):
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._slots = array('Q', bytes(8 * capacity))
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _find(self, value: int) -> int:
+        """Return the slot holding value, or the empty slot where it would go."""
+        mask = len(self._slots) - 1
+        idx = value & mask
+        slots = self._slots
+        while slots[idx] and slots[idx] != value:
+            idx = (idx + 1) & mask
+        return idx
+
+    def __contains__(self, value: int) -> bool:
+        # Zero marks an empty slot, so it is stored as one
+        return self._slots[self._find(value or 1)] != 0
+
+    def add(self, value: int) -> bool:
+        """Add a fingerprint and return True if it was not already present."""
+        value = value or 1
+        idx = self._find(value)
+        if self._slots[idx]:
+            return False
+        self._slots[idx] = value
+        self._size += 1
+        if self._size * 2 > len(self._slots):
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        old_slots = self._slots
+        self._slots = array('Q', bytes(16 * len(old_slots)))
+        for value in old_slots:
+            if value:
+                self._slots[self._find(value)] = value
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._slots) * self._slots.itemsize
+
+
+class CompactBandIndex:
+    """Open-addressing multimap from 64-bit band hashes to the ids of the records that have them."""
+
+    def __init__(self, capacity: int = 1024):
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._keys = array('Q', bytes(8 * capacity))
+        self._values = array('I', bytes(4 * capacity))
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: int) -> Iterator[int]:
+        """Yield the ids stored under a key."""
+        # Zero marks an empty slot, so it is stored as one
+        key = key or 1
+        mask = len(self._keys) - 1
+        idx = key & mask
+        keys = self._keys
+        while keys[idx]:
+            if keys[idx] == key:
+                yield self._values[idx]
+            idx = (idx + 1) & mask
+
+    def add(self, key: int, value: int) -> None:
+        """Store an id under a key, next to any ids already there."""
+        self._insert(key or 1, value)
+        self._size += 1
+        if self._size * 2 > len(self._keys):
+            self._grow()
+
+    def _insert(self, key: int, value: int) -> None:
+        mask = len(self._keys) - 1
+        idx = key & mask
+        while self._keys[idx]:
+            idx = (idx + 1) & mask
+        self._keys[idx] = key
+        self._values[idx] = value
+
+    def _grow(self) -> None:
+        old_keys, old_values = self._keys, self._values
+        self._keys = array('Q', bytes(16 * len(old_keys)))
+        self._values = array('I', bytes(8 * len(old_values)))
+        for key, value in zip(old_keys, old_values):
+            if key:
+                self._insert(key, value)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._keys) * (self._keys.itemsize + self._values.itemsize)
+
+
+def fingerprint(data: bytes) -> int:
+    """Stable 64-bit fingerprint of a byte string."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def lsh_parameters(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) so that the LSH similarity threshold (1/b)^(1/r) is closest to the target."""
+    if not 0 < threshold < 1:
+        raise ValueError("threshold must be between 0 and 1")
+    candidates = ((num_perm // rows, rows) for rows in range(1, num_perm + 1))
+    return min(candidates, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class Deduplicator:
+    """
+    Drop exact and near-duplicate prepared records in a single streaming pass.
+
+    Exact duplicates are found by a 64-bit fingerprint of text_input and output.
+    Near duplicates are found with MinHash signatures over word shingles banded for
+    LSH: kept records whose band hashes collide with a record are candidates, and
+    the record is dropped if the signatures of one of them estimate a Jaccard
+    similarity of at least threshold. Fingerprints are kept in compact
+    open-addressing tables, and kept records' signatures as uint32 rows.
+    """
+
+    def __init__(self, near_duplicates: bool = True, threshold: float = 0.8, num_perm: int = 64,
+                 shingle_size: int = 3, seed: int = 1):
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = lsh_parameters(threshold, num_perm)
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self.logger = logging.getLogger(__name__)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every record seen so far."""
+        self._exact_index = CompactHashSet()
+        self._band_index = CompactBandIndex()
+        self._signatures = np.zeros((1024, self.num_perm), dtype=np.uint32)
+        self._signature_count = 0
+        self.seen = 0
+        self.dropped: Dict[str, int] = {"exact": 0, "near": 0}
+        self.dropped_examples: List[Dict[str, Any]] = []
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that affect which records are kept."""
+        return {
+            "near_duplicates": self.near_duplicates,
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "shingle_size": self.shingle_size,
+            "seed": self.seed,
+        }
+
+    def minhash(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the word shingles of a text, or None if it has no words."""
+        words = _WORD_PATTERN.findall(text.lower())
+        if not words:
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) % _MERSENNE_PRIME for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % np.uint64(_MERSENNE_PRIME)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        return [
+            fingerprint(band.to_bytes(1, 'little') + signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def check(self, record: GeminiFinetuningData) -> Optional[str]:
+        """Index a record and return why it is a duplicate ("exact" or "near"), or None to keep it."""
+        if not self._exact_index.add(fingerprint(f"{record.text_input}\0{record.output}".encode('utf-8'))):
+            return "exact"
+        if self.near_duplicates:
+            signature = self.minhash(f"{record.text_input}\n{record.output}")
+            if signature is not None:
+                keys = self._band_keys(signature)
+                candidates = {candidate for key in keys for candidate in self._band_index.get(key)}
+                # The share of equal MinHash values estimates the Jaccard similarity
+                min_equal = self.threshold * self.num_perm
+                if any(np.count_nonzero(self._signatures[candidate] == signature) >= min_equal
+                       for candidate in candidates):
+                    return "near"
+                record_id = self._store(signature)
+                for key in keys:
+                    self._band_index.add(key, record_id)
+        return None
+
+    def _store(self, signature: np.ndarray) -> int:
+        if self._signature_count == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+        self._signatures[self._signature_count] = signature
+        self._signature_count += 1
+        return self._signature_count - 1
+
+    def filter(self, records: Iterable[GeminiFinetuningData]) -> Iterator[GeminiFinetuningData]:
+        """Yield only the records that are not duplicates of an earlier one."""
+        for record in records:
+            self.seen += 1
+            reason = self.check(record)
+            if reason is None:
+                yield record
+                continue
+            self.dropped[reason] += 1
+            if len(self.dropped_examples) < MAX_REPORTED_DROPS:
+                self.dropped_examples.append({"data_point": self.seen, "reason": reason})
+        self.logger.info(f"Deduplication dropped {self.dropped['exact']} exact and "
+                         f"{self.dropped['near']} near duplicates out of {self.seen} items")
+
+    def report(self) -> Dict[str, Any]:
+        """Summary of what was dropped and why."""
+        return {
+            "seen": self.seen,
+            "kept": self.seen - sum(self.dropped.values()),
+            "dropped": dict(self.dropped),
+            "examples": list(self.dropped_examples),
+            "index_bytes": (self._exact_index.nbytes + self._band_index.nbytes
+                            + self._signature_count * self.num_perm * self._signatures.itemsize),
+        }
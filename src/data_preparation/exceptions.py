@@ -4,4 +4,8 @@ class InvalidDataFormatError(Exception):
 
 class InvalidJSONError(Exception):
     """Raised when the JSON format is invalid."""
-    pass
\ No newline at end of file
+    pass
+
+class ErrorRateExceededError(InvalidDataFormatError):
+    """Raised in lenient mode when too large a share of lines is invalid to continue."""
+    pass
@@ -1,4 +1,6 @@
 class GeminiFinetuningData:
+    __slots__ = ('text_input', 'output')
+
     def __init__(self, text_input: str, output: str):
         self.text_input = text_input
         self.output = output
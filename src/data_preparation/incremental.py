@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cache import code_version
+from .sources import resolve_sources
+from .data_preparator import DataPreparator
+from .exceptions import InvalidDataFormatError, InvalidJSONError
+from .gemini_finetuning_data import GeminiFinetuningData
+
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+class IncrementalPreparator:
+    """
+    Prepare an append-only JSONL file into a JSONL output of Gemini records.
+
+    A checkpoint stored next to the output records how far the source has been
+    processed (byte offset, line count and a hash of that prefix). Later runs only
+    validate and format the appended tail; if the prefix, the preparation code or
+    the output changed, the output is rebuilt from scratch. A last line without a
+    newline is prepared if it parses, and prepared again by the next run in case
+    it was still being written; otherwise it is deferred to the next run. The
+    preparator's length policy is applied per record; deduplication needs the
+    whole history and is not.
+    """
+
+    def __init__(self, preparator: DataPreparator, output_path: str):
+        self.preparator = preparator
+        self.output_path = output_path
+        self.checkpoint_path = output_path + CHECKPOINT_SUFFIX
+        self.source_path: Optional[str] = None
+        self.logger = logging.getLogger(__name__)
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Load the checkpoint for the output, or None if there is none."""
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            self.logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {str(e)}")
+            return None
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _resume_from(self, checkpoint: Optional[Dict[str, Any]], version: str) -> Optional[Any]:
+        """Check that a checkpoint still describes the source prefix and return the running prefix hash."""
+        source_path = self.source_path
+        assert source_path is not None
+        if checkpoint is None:
+            return None
+        if checkpoint.get('code_version') != version:
+            self.logger.info("Preparation code changed since the last checkpoint")
+            return None
+        if os.path.getsize(source_path) < checkpoint['offset']:
+            self.logger.info("Source file is shorter than the checkpointed prefix")
+            return None
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) < checkpoint['output_bytes']:
+            self.logger.info("Prepared output is missing or truncated")
+            return None
+
+        digest = hashlib.sha256()
+        remaining = checkpoint['offset']
+        with open(source_path, 'rb') as f:
+            while remaining:
+                block = f.read(min(_READ_BLOCK_SIZE, remaining))
+                digest.update(block)
+                remaining -= len(block)
+        if digest.hexdigest() != checkpoint['prefix_sha256']:
+            self.logger.info("Source prefix changed since the last checkpoint")
+            return None
+        return digest
+
+    def run(self) -> int:
+        """Prepare the lines appended since the last checkpoint and return how many records were added."""
+        if not self.preparator.is_single_file():
+            raise ValueError("Incremental preparation needs a single uncompressed JSONL file, "
+                             f"got {self.preparator.file_path!r}")
+        self.source_path = resolve_sources(self.preparator.file_path)[0]
+        version = code_version(self.preparator)
+        config = self.preparator.pipeline_config()
+        # Deduplication is not applied incrementally, so it does not affect the output
+        version += json.dumps({key: config[key] for key in ("formatter", "length_policy", "validation")},
+                              sort_keys=True)
+        length_policy = self.preparator.length_policy
+        if length_policy is not None:
+            length_policy.reset()
+        # Only the lines processed by this run end up in the quarantine file
+        quarantine = self.preparator.quarantine
+        if quarantine is not None:
+            quarantine.reset()
+        checkpoint = self.load_checkpoint()
+        digest = self._resume_from(checkpoint, version)
+        if digest is None or checkpoint is None:
+            self.logger.info(f"Preparing {self.preparator.file_path} from scratch")
+            digest = hashlib.sha256()
+            checkpoint = {'offset': 0, 'line_count': 0, 'record_count': 0, 'output_bytes': 0}
+        else:
+            self.logger.info(f"Resuming {self.preparator.file_path} from line {checkpoint['line_count'] + 1}")
+
+        offset = checkpoint['offset']
+        line_count = checkpoint['line_count']
+        # The previous run's unterminated last line, if any, is read again from offset
+        previous_count = checkpoint['record_count']
+        added = 0
+        tail_bytes = 0
+        tail_records = 0
+        with open(self.source_path, 'rb') as source, open(self.output_path, 'ab') as output:
+            # Drop anything written after the last checkpoint by an interrupted run
+            output.truncate(checkpoint['output_bytes'])
+            output.seek(checkpoint['output_bytes'])
+            output_bytes = checkpoint['output_bytes']
+            source.seek(offset)
+            try:
+                for line in source:
+                    line_count += 1
+                    try:
+                        record = self.preparator.format_record(self.preparator.parse_line(line, line_count))
+                    except (InvalidDataFormatError, InvalidJSONError, ValueError, TypeError, KeyError) as e:
+                        if not line.endswith(b'\n'):
+                            # Most likely still being appended
+                            self.logger.warning(f"Deferring unterminated last line {line_count} to the next run")
+                            line_count -= 1
+                            break
+                        if quarantine is None:
+                            raise
+                        quarantine.reject(line_count, line, e)
+                        record = None
+                    if not line.endswith(b'\n'):
+                        # A complete record without a newline: prepare it, but checkpoint before it so the
+                        # next run validates the line again in case it grew
+                        output_bytes = output.tell()
+                        tail_bytes = len(line)
+                    if record is not None and length_policy is not None:
+                        record = length_policy.apply(record)
+                    if record is not None:
+                        output.write(json.dumps(GeminiFinetuningData.to_gemini_format(record)).encode() + b'\n')
+                        added += 1
+                        tail_records = 1 if tail_bytes else 0
+                    if not tail_bytes:
+                        digest.update(line)
+                        offset += len(line)
+                if quarantine is not None:
+                    quarantine.finish(line_count)
+            except (InvalidDataFormatError, InvalidJSONError) as e:
+                self.logger.error(str(e))
+                raise
+            finally:
+                if quarantine is not None:
+                    quarantine.close()
+            if not tail_bytes:
+                output_bytes = output.tell()
+
+        record_count = checkpoint['record_count'] - checkpoint.get('tail_records', 0) + added
+        if not record_count:
+            error_msg = f"No valid data found in {self.preparator.file_path}"
+            self.logger.error(error_msg)
+            raise InvalidDataFormatError(error_msg)
+
+        # offset, line_count, output_bytes and the hash cover the newline terminated prefix; an unterminated
+        # last line and its record (tail_records) follow it
+        self._save_checkpoint({
+            'offset': offset,
+            'line_count': line_count - (1 if tail_bytes else 0),
+            'record_count': record_count,
+            'output_bytes': output_bytes,
+            'tail_bytes': tail_bytes,
+            'tail_records': tail_records,
+            'prefix_sha256': digest.hexdigest(),
+            'code_version': version,
+        })
+        added = record_count - previous_count
+        self.logger.info(f"Prepared {added} new items; {record_count} items in {self.output_path}")
+        return added
+
+    def iter_output(self) -> Iterator[GeminiFinetuningData]:
+        """Stream the prepared records from the output file."""
+        with open(self.output_path, 'rb') as f:
+            for line in f:
+                item = json.loads(line)
+                yield GeminiFinetuningData(text_input=item['text_input'], output=item['output'])
+
+    def load_output(self) -> List[GeminiFinetuningData]:
+        """Load all prepared records from the output file."""
+        return list(self.iter_output())
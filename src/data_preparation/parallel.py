@@ -0,0 +1,53 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Tuple
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def split_into_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, start: int = 0) -> List[Tuple[int, int]]:
+    """Split a file into (start, end) byte ranges whose boundaries fall just after a newline."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    size = os.path.getsize(file_path)
+    chunks = []
+    with open(file_path, 'rb') as f:
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                # Extend the range to the end of the line it landed in
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def read_chunk_lines(file_path: str, start: int, end: int) -> List[bytes]:
+    """Read the lines of a byte range produced by split_into_chunks."""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).split(b'\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def imap_ordered(executor: Executor, fn: Callable[..., Any], args: Iterable[Tuple],
+                 max_in_flight: int) -> Iterator[Any]:
+    """Map fn over args on an executor, yielding results in submission order with bounded look-ahead."""
+    pending: Deque[Future] = deque()
+    args_iter = iter(args)
+    try:
+        for call_args in args_iter:
+            pending.append(executor.submit(fn, *call_args))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,104 @@
+import random
+from array import array
+from typing import Iterable, Iterator, Optional, Sequence, Union, overload
+
+from .gemini_finetuning_data import GeminiFinetuningData
+
+# Typecode for offset and index arrays: unsigned 64-bit
+OFFSET_TYPECODE = 'Q'
+
+
+class PreparedDataset(Sequence):
+    """
+    Compact columnar collection of prepared records.
+
+    The text of every record lives in one contiguous UTF-8 buffer, alternating
+    text_input and output. An offset array of 2n+1 boundaries locates them:
+    record i's input spans offsets[2i]:offsets[2i+1] and its output spans
+    offsets[2i+1]:offsets[2i+2]. Records are decoded into GeminiFinetuningData
+    only when accessed. Slices and shuffles are index views sharing the buffer.
+    """
+
+    def __init__(self, buffer=b'', offsets: Optional[Sequence[int]] = None,
+                 index: Optional[Sequence[int]] = None):
+        self._buffer = memoryview(buffer)
+        self._offsets = offsets if offsets is not None else array(OFFSET_TYPECODE, [0])
+        self._index = index if index is not None else range((len(self._offsets) - 1) // 2)
+
+    @classmethod
+    def from_records(cls, records: Iterable[GeminiFinetuningData]) -> 'PreparedDataset':
+        """Pack records into a new dataset in a single pass."""
+        buffer = bytearray()
+        offsets = array(OFFSET_TYPECODE, [0])
+        for record in records:
+            buffer += record.text_input.encode('utf-8')
+            offsets.append(len(buffer))
+            buffer += record.output.encode('utf-8')
+            offsets.append(len(buffer))
+        return cls(buffer, offsets)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _decode(self, start: int, end: int) -> str:
+        return str(self._buffer[start:end], 'utf-8')
+
+    def text_input(self, idx: int) -> str:
+        """Decode the text_input of the record at a position."""
+        position = 2 * self._index[idx]
+        return self._decode(self._offsets[position], self._offsets[position + 1])
+
+    def output(self, idx: int) -> str:
+        """Decode the output of the record at a position."""
+        position = 2 * self._index[idx]
+        return self._decode(self._offsets[position + 1], self._offsets[position + 2])
+
+    @overload
+    def __getitem__(self, idx: int) -> GeminiFinetuningData: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> 'PreparedDataset': ...
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[GeminiFinetuningData, 'PreparedDataset']:
+        if isinstance(idx, slice):
+            return PreparedDataset(self._buffer, self._offsets, self._index[idx])
+        return GeminiFinetuningData(text_input=self.text_input(idx), output=self.output(idx))
+
+    def __iter__(self) -> Iterator[GeminiFinetuningData]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def take(self, indices: Iterable[int]) -> 'PreparedDataset':
+        """Return a view of the records at the given positions."""
+        return PreparedDataset(self._buffer, self._offsets,
+                               array(OFFSET_TYPECODE, (self._index[idx] for idx in indices)))
+
+    def shuffled(self, seed: Optional[int] = None) -> 'PreparedDataset':
+        """Return a view of the records in a random order without copying any text."""
+        order = array(OFFSET_TYPECODE, self._index)
+        random.Random(seed).shuffle(order)
+        return PreparedDataset(self._buffer, self._offsets, order)
+
+    def to_gemini_format(self) -> 'GeminiFormatView':
+        """Return a lazy view of the records in the format expected by the Gemini API."""
+        return GeminiFormatView(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the text buffer and offset array."""
+        return self._buffer.nbytes + len(self._offsets) * 8
+
+
+class GeminiFormatView(Sequence):
+    """Read-only sequence of Gemini API dicts decoded on demand from a PreparedDataset."""
+
+    def __init__(self, dataset: PreparedDataset):
+        self._dataset = dataset
+
+    def __len__(self) -> int:
+        return len(self._dataset)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return GeminiFormatView(self._dataset[idx])
+        return {"text_input": self._dataset.text_input(idx), "output": self._dataset.output(idx)}
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import shutil
+from collections import Counter
+from typing import Any, Dict, List, Optional, TextIO
+
+from .exceptions import ErrorRateExceededError
+
+MAX_REPORTED_ERRORS = 20
+# Lines to see before the error rate is trusted enough to abort on
+DEFAULT_MIN_LINES = 1000
+
+
+class Quarantine:
+    """
+    Collect invalid lines instead of failing on the first one.
+
+    Rejected lines are appended to a JSONL file along with their line number and
+    the reason they were rejected, so the whole file is validated in one pass.
+    When max_error_rate is set, preparation aborts with ErrorRateExceededError as
+    soon as the share of rejected lines exceeds it (once min_lines lines have been
+    seen), and again at the end of the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_error_rate: Optional[float] = None,
+                 min_lines: int = DEFAULT_MIN_LINES):
+        if max_error_rate is not None and not 0 <= max_error_rate <= 1:
+            raise ValueError("max_error_rate must be between 0 and 1")
+        self.path = path
+        self.max_error_rate = max_error_rate
+        self.min_lines = min_lines
+        self.logger = logging.getLogger(__name__)
+        self._file: Optional[TextIO] = None
+        self._reset_counters()
+
+    def __getstate__(self):
+        # Worker processes never write to the quarantine file
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+    def _reset_counters(self) -> None:
+        self.lines = 0
+        self.rejected = 0
+        self.by_type: Counter = Counter()
+        self.examples: List[Dict[str, Any]] = []
+
+    def reset(self) -> None:
+        """Start a new pass, truncating the quarantine file."""
+        self.close()
+        self._reset_counters()
+        if self.path is not None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def restore(self, report: Dict[str, Any], lines_path: Optional[str] = None) -> None:
+        """
+        Take over the outcome of an earlier pass over the same data, e.g. on a cache hit.
+
+        The counts come from that pass's report() and its quarantined lines are
+        copied from lines_path into this quarantine's file; the error rate limit
+        is checked as at the end of a pass.
+        """
+        self.close()
+        self._reset_counters()
+        self.lines = report["lines"]
+        self.rejected = report["rejected"]
+        self.by_type.update(report["by_type"])
+        self.examples = list(report["examples"])
+        if self.path is not None:
+            if lines_path is not None and os.path.exists(lines_path):
+                shutil.copyfile(lines_path, self.path)
+            else:
+                open(self.path, 'w', encoding='utf-8').close()
+        self._check_rate()
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that affect which records are produced."""
+        return {"lenient": True}
+
+    def reject(self, line_number: int, line: bytes, error: Exception, source: Optional[str] = None,
+               lines_seen: Optional[int] = None) -> None:
+        """
+        Quarantine one invalid line and abort if the error rate is now over the limit.
+
+        For sharded input, source is the shard and line_number counts within it, so
+        lines_seen gives the number of lines read across all shards so far.
+        """
+        self.rejected += 1
+        self.lines = max(self.lines, lines_seen if lines_seen is not None else line_number)
+        error_type = type(error).__name__
+        self.by_type[error_type] += 1
+        entry = {"line_number": line_number, "error_type": error_type, "reason": str(error)}
+        if source is not None:
+            entry["source"] = source
+        if len(self.examples) < MAX_REPORTED_ERRORS:
+            self.examples.append(entry)
+        if self._file is not None:
+            row = dict(entry, line=line.decode('utf-8', errors='replace').rstrip('\r\n'))
+            self._file.write(json.dumps(row) + '\n')
+        if self.lines >= self.min_lines:
+            self._check_rate()
+
+    def finish(self, lines: int) -> None:
+        """Record the total number of lines read, check the final error rate and close the file."""
+        self.lines = max(self.lines, lines)
+        self.close()
+        if self.rejected:
+            self.logger.warning(f"Quarantined {self.rejected} of {self.lines} lines"
+                                + (f" to {self.path}" if self.path else "") + f": {dict(self.by_type)}")
+        self._check_rate()
+
+    @property
+    def error_rate(self) -> float:
+        return self.rejected / self.lines if self.lines else 0.0
+
+    def _check_rate(self) -> None:
+        if self.max_error_rate is not None and self.error_rate > self.max_error_rate:
+            self.close()
+            raise ErrorRateExceededError(
+                f"{self.rejected} of {self.lines} lines invalid ({self.error_rate:.1%}), "
+                f"over the maximum error rate of {self.max_error_rate:.1%}")
+
+    def report(self) -> Dict[str, Any]:
+        """Structured summary of the rejected lines."""
+        return {
+            "lines": self.lines,
+            "rejected": self.rejected,
+            "error_rate": round(self.error_rate, 6),
+            "by_type": dict(self.by_type),
+            "examples": list(self.examples),
+            "quarantine_path": self.path,
+        }
@@ -0,0 +1,137 @@
+import glob
+import gzip
+import os
+import queue
+import threading
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+
+DATA_FILE_SUFFIXES = ('.jsonl', '.jsonl.gz', '.jsonl.zst')
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+# Decompressed blocks buffered per shard ahead of the consumer
+DEFAULT_MAX_BUFFERED_BLOCKS = 8
+
+SourceSpec = Union[str, Sequence[str]]
+
+_DONE = object()
+
+
+def resolve_sources(spec: SourceSpec) -> List[str]:
+    """
+    Expand a data source into an ordered list of files.
+
+    A source is a file path, a directory (every .jsonl, .jsonl.gz and .jsonl.zst
+    file in it), a glob pattern, or a list of any of these. Directory and glob
+    matches are sorted so shards are always read in the same order.
+    """
+    specs = [spec] if isinstance(spec, str) else list(spec)
+    paths = []
+    for item in specs:
+        if os.path.isdir(item):
+            paths.extend(sorted(
+                os.path.join(item, name) for name in os.listdir(item) if name.endswith(DATA_FILE_SUFFIXES)))
+        elif glob.has_magic(item):
+            paths.extend(sorted(path for path in glob.glob(item, recursive=True) if os.path.isfile(path)))
+        else:
+            # Plain paths are kept even if missing, so opening them raises FileNotFoundError
+            paths.append(item)
+    if not paths:
+        raise FileNotFoundError(f"No data files found for {spec!r}")
+    return paths
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(('.gz', '.zst'))
+
+
+def open_source(path: str) -> Union[BinaryIO, gzip.GzipFile]:
+    """Open a plain, gzip or zstandard compressed file for reading decompressed bytes."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"Reading {path} requires the 'zstandard' package: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def _read_shard(path: str, blocks: queue.Queue, stop: threading.Event, block_size: int) -> None:
+    """Producer: decompress one shard into lists of complete lines."""
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        with open_source(path) as f:
+            pending = b''
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                lines = (pending + block).split(b'\n')
+                pending = lines.pop()
+                if lines and not put(lines):
+                    return
+            if pending:
+                put([pending])
+        put(_DONE)
+    except BaseException as e:
+        put(e)
+
+
+class ShardReader:
+    """
+    Stream the lines of many, possibly compressed, shards in order.
+
+    Up to workers shards are decompressed ahead of the consumer on background
+    threads (zlib and zstandard release the GIL while decompressing), each with
+    a bounded buffer so memory stays flat. Lines are yielded as
+    (shard path, line number within the shard, line bytes without the newline).
+    """
+
+    def __init__(self, paths: Sequence[str], workers: int = 1, block_size: int = DEFAULT_BLOCK_SIZE,
+                 max_buffered_blocks: int = DEFAULT_MAX_BUFFERED_BLOCKS):
+        self.paths = list(paths)
+        self.workers = max(1, workers)
+        self.block_size = block_size
+        self.max_buffered_blocks = max_buffered_blocks
+
+    def __iter__(self) -> Iterator[Tuple[str, int, bytes]]:
+        stop = threading.Event()
+        # A finished shard's queue is released by replacing it with None
+        started: List[Tuple[str, Optional[queue.Queue]]] = []
+
+        def start_next() -> None:
+            path = self.paths[len(started)]
+            blocks: queue.Queue = queue.Queue(maxsize=self.max_buffered_blocks)
+            thread = threading.Thread(target=_read_shard, args=(path, blocks, stop, self.block_size), daemon=True)
+            thread.start()
+            started.append((path, blocks))
+
+        try:
+            for index in range(len(self.paths)):
+                while len(started) < min(len(self.paths), index + self.workers):
+                    start_next()
+                path, blocks = started[index]
+                assert blocks is not None
+                line_number = 0
+                while True:
+                    item = blocks.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    for line in item:
+                        line_number += 1
+                        yield path, line_number, line
+                # Release the finished shard's queue
+                started[index] = (path, None)
+        finally:
+            stop.set()
@@ -0,0 +1,148 @@
+import hashlib
+import heapq
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .gemini_finetuning_data import GeminiFinetuningData
+
+DEFAULT_SPLIT_RATIOS = {"train": 0.8, "validation": 0.1, "test": 0.1}
+
+_HASH_SPACE = float(1 << 64)
+
+
+def content_hash(record: GeminiFinetuningData, seed: int = 0) -> int:
+    """Seeded 64-bit hash of a record's content, the same in every process and run."""
+    digest = hashlib.blake2b(digest_size=8, key=seed.to_bytes(8, 'little', signed=True))
+    digest.update(record.text_input.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(record.output.encode('utf-8'))
+    return int.from_bytes(digest.digest(), 'little')
+
+
+class DatasetSplitter:
+    """
+    Assign records to train/validation/test splits by a seeded hash of their content.
+
+    A record's split depends only on its content and the seed, never on its
+    position, so appending records to a file leaves every existing assignment
+    unchanged. With keep set, filter() yields only the records of that split.
+    """
+
+    def __init__(self, ratios: Optional[Dict[str, float]] = None, seed: int = 0, keep: Optional[str] = None):
+        ratios = dict(ratios or DEFAULT_SPLIT_RATIOS)
+        total = sum(ratios.values())
+        if total <= 0 or any(ratio < 0 for ratio in ratios.values()):
+            raise ValueError("Split ratios must be non-negative and not all zero")
+        if keep is not None and keep not in ratios:
+            raise ValueError(f"Unknown split {keep!r}; expected one of {sorted(ratios)}")
+        self.ratios = {name: ratio / total for name, ratio in ratios.items()}
+        self.seed = seed
+        self.keep = keep
+        self.logger = logging.getLogger(__name__)
+        # Upper hash bound of each split, in the order the splits were given
+        self._bounds: List[Tuple[int, str]] = []
+        cumulative = 0.0
+        for name, ratio in self.ratios.items():
+            cumulative += ratio
+            self._bounds.append((min(int(cumulative * _HASH_SPACE), 1 << 64), name))
+        self._bounds[-1] = (1 << 64, self._bounds[-1][1])
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = {name: 0 for name in self.ratios}
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that affect which records are produced."""
+        return {"ratios": self.ratios, "seed": self.seed, "keep": self.keep}
+
+    def assign(self, record: GeminiFinetuningData) -> str:
+        """Return the name of the split a record belongs to."""
+        value = content_hash(record, self.seed)
+        for bound, name in self._bounds:
+            if value < bound:
+                return name
+        return self._bounds[-1][1]
+
+    def split(self, records: Iterable[GeminiFinetuningData]) -> Iterator[Tuple[str, GeminiFinetuningData]]:
+        """Yield (split name, record) for every record, counting records per split."""
+        for record in records:
+            name = self.assign(record)
+            self.counts[name] += 1
+            yield name, record
+
+    def filter(self, records: Iterable[GeminiFinetuningData]) -> Iterator[GeminiFinetuningData]:
+        """Yield only the records of the split being kept."""
+        keep = self.keep
+        if keep is None:
+            raise ValueError("No split to keep; pass keep to filter records")
+        for name, record in self.split(records):
+            if name == keep:
+                yield record
+        self.logger.info(f"Kept {self.counts[keep]} '{keep}' records: {self.counts}")
+
+    def write_splits(self, records: Iterable[GeminiFinetuningData], output_dir: str) -> Dict[str, str]:
+        """Write every split to <output_dir>/<split>.jsonl in one pass and return the paths."""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {name: os.path.join(output_dir, f"{name}.jsonl") for name in self.ratios}
+        files = {name: open(path, 'w', encoding='utf-8') for name, path in paths.items()}
+        try:
+            for name, record in self.split(records):
+                files[name].write(json.dumps(GeminiFinetuningData.to_gemini_format(record)) + '\n')
+        finally:
+            for f in files.values():
+                f.close()
+        self.logger.info(f"Wrote splits to {output_dir}: {self.counts}")
+        return paths
+
+    def report(self) -> Dict[str, Any]:
+        return {"config": self.config(), "counts": dict(self.counts)}
+
+
+class ReservoirSampler:
+    """
+    Keep a uniform sample of k records from a stream of any length in O(k) memory.
+
+    Each record's priority is a seeded hash of its content and the reservoir
+    holds the k records with the lowest priorities. The sample is therefore
+    deterministic for a given seed, and appending records to the source only
+    ever swaps in new records that hash lower, so a pilot set stays stable as
+    the data grows. The sample is yielded in source order.
+    """
+
+    def __init__(self, k: int, seed: int = 0):
+        if k <= 0:
+            raise ValueError("k must be positive")
+        self.k = k
+        self.seed = seed
+        self.logger = logging.getLogger(__name__)
+        self.reset()
+
+    def reset(self) -> None:
+        self.seen = 0
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that affect which records are produced."""
+        return {"k": self.k, "seed": self.seed}
+
+    def sample(self, records: Iterable[GeminiFinetuningData]) -> List[GeminiFinetuningData]:
+        """Consume the stream and return the sampled records in source order."""
+        # Max-heap on priority via negation: the root is the record to evict next
+        heap: List[Tuple[int, int, GeminiFinetuningData]] = []
+        for record in records:
+            priority = content_hash(record, self.seed)
+            index = self.seen
+            self.seen += 1
+            if len(heap) < self.k:
+                heapq.heappush(heap, (-priority, index, record))
+            elif -priority > heap[0][0]:
+                heapq.heapreplace(heap, (-priority, index, record))
+        self.logger.info(f"Sampled {len(heap)} of {self.seen} records")
+        return [record for _, _, record in sorted(heap, key=lambda entry: entry[1])]
+
+    def filter(self, records: Iterable[GeminiFinetuningData]) -> Iterator[GeminiFinetuningData]:
+        yield from self.sample(records)
+
+    def report(self) -> Dict[str, Any]:
+        return {"config": self.config(), "seen": self.seen, "sampled": min(self.seen, self.k)}
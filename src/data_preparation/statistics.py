@@ -0,0 +1,87 @@
+import json
+from array import array
+from typing import Any, Dict, Iterable, Iterator
+
+import numpy as np
+
+from .gemini_finetuning_data import GeminiFinetuningData
+
+# Rough characters-per-token ratio used for approximate token counts
+CHARS_PER_TOKEN = 4
+PERCENTILES = (50, 90, 95, 99)
+HISTOGRAM_BINS = 10
+MAX_REPORTED_OUTLIERS = 10
+
+
+class DatasetStatistics:
+    """Collect input and output lengths in a single pass and summarise them with NumPy."""
+
+    def __init__(self):
+        self._lengths = {
+            (field, unit): array('I')
+            for field in ('input', 'output')
+            for unit in ('words', 'chars')
+        }
+
+    def __len__(self) -> int:
+        return len(self._lengths[('input', 'chars')])
+
+    def add(self, record: GeminiFinetuningData) -> None:
+        """Record the lengths of one prepared record."""
+        self._lengths[('input', 'words')].append(len(record.text_input.split()))
+        self._lengths[('input', 'chars')].append(len(record.text_input))
+        self._lengths[('output', 'words')].append(len(record.output.split()))
+        self._lengths[('output', 'chars')].append(len(record.output))
+
+    def observe(self, records: Iterable[GeminiFinetuningData]) -> Iterator[GeminiFinetuningData]:
+        """Pass records through unchanged while recording their lengths."""
+        for record in records:
+            self.add(record)
+            yield record
+
+    def _lengths_for(self, field: str, unit: str) -> np.ndarray:
+        if unit == 'tokens':
+            return np.ceil(self._lengths_for(field, 'chars') / CHARS_PER_TOKEN)
+        lengths = self._lengths[(field, unit)]
+        return np.frombuffer(lengths, dtype=np.dtype(f'u{lengths.itemsize}'))
+
+    @staticmethod
+    def _describe(values: np.ndarray) -> Dict[str, Any]:
+        """Summarise one length distribution."""
+        values = values.astype(np.float64)
+        percentiles = np.percentile(values, PERCENTILES)
+        q1, q3 = np.percentile(values, (25, 75))
+        threshold = q3 + 1.5 * (q3 - q1)
+        outliers = np.flatnonzero(values > threshold)
+        largest = outliers[np.argsort(values[outliers])[::-1][:MAX_REPORTED_OUTLIERS]]
+        counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+        return {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+            "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+            "outliers": {
+                "threshold": float(threshold),
+                "count": int(outliers.size),
+                # 1-based data point numbers of the longest outliers
+                "largest": [int(idx) + 1 for idx in largest],
+            },
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Build the statistics report for everything recorded so far."""
+        report: Dict[str, Any] = {"count": len(self)}
+        if not len(self):
+            return report
+        for field in ('input', 'output'):
+            report[field] = {
+                unit: self._describe(self._lengths_for(field, unit))
+                for unit in ('words', 'chars', 'tokens')
+            }
+        return report
+
+    def to_json(self) -> str:
+        """Serialise the statistics report as a single JSON document."""
+        return json.dumps(self.summary())
@@ -0,0 +1,125 @@
+import functools
+import logging
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .gemini_finetuning_data import GeminiFinetuningData
+
+# Each match approximates one token: a run of up to four word characters or a
+# single punctuation character. This tracks subword tokenizers closely enough
+# to enforce budgets without a network round trip.
+_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+LENGTH_POLICY_ACTIONS = ('drop', 'truncate', 'flag')
+MAX_REPORTED_VIOLATIONS = 20
+
+
+class TokenEstimator:
+    """Fast, offline approximation of token counts with an LRU cache for repeated texts."""
+
+    def __init__(self, cache_size: int = 65536):
+        self.cache_size = cache_size
+        self.estimate = functools.lru_cache(maxsize=cache_size)(self._estimate)
+
+    @staticmethod
+    def _estimate(text: str) -> int:
+        return len(_TOKEN_PATTERN.findall(text))
+
+    def estimate_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Estimate the token count of many texts at once."""
+        return np.fromiter((self.estimate(text) for text in texts), dtype=np.int64, count=len(texts))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut a text after its first max_tokens estimated tokens."""
+        if max_tokens <= 0:
+            return ""
+        for count, match in enumerate(_TOKEN_PATTERN.finditer(text), 1):
+            if count == max_tokens:
+                return text[:match.end()]
+        return text
+
+
+class LengthPolicy:
+    """Drop, truncate or flag prepared records whose input or output exceeds a token budget."""
+
+    def __init__(self, max_input_tokens: Optional[int] = None, max_output_tokens: Optional[int] = None,
+                 action: str = 'drop', estimator: Optional[TokenEstimator] = None):
+        if action not in LENGTH_POLICY_ACTIONS:
+            raise ValueError(f"Unknown length policy action: {action}")
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.action = action
+        self.estimator = estimator or TokenEstimator()
+        self.logger = logging.getLogger(__name__)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the counters of the previous run."""
+        self.checked = 0
+        self.violations = {"input": 0, "output": 0}
+        self.handled = {action: 0 for action in LENGTH_POLICY_ACTIONS}
+        self.examples: List[Dict[str, Any]] = []
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that affect which records are produced."""
+        return {
+            "max_input_tokens": self.max_input_tokens,
+            "max_output_tokens": self.max_output_tokens,
+            "action": self.action,
+        }
+
+    def _over_budget(self, record: GeminiFinetuningData) -> Dict[str, int]:
+        over = {}
+        for field, text, budget in (("input", record.text_input, self.max_input_tokens),
+                                    ("output", record.output, self.max_output_tokens)):
+            if budget is not None:
+                tokens = self.estimator.estimate(text)
+                if tokens > budget:
+                    over[field] = tokens
+        return over
+
+    def apply(self, record: GeminiFinetuningData) -> Optional[GeminiFinetuningData]:
+        """Return the record to keep (possibly truncated), or None if it is dropped."""
+        self.checked += 1
+        over = self._over_budget(record)
+        if not over:
+            return record
+
+        for field in over:
+            self.violations[field] += 1
+        self.handled[self.action] += 1
+        if len(self.examples) < MAX_REPORTED_VIOLATIONS:
+            self.examples.append({"data_point": self.checked, "tokens": over, "action": self.action})
+
+        if self.action == 'drop':
+            return None
+        if self.action == 'truncate':
+            text_input, output = record.text_input, record.output
+            # A field is only over budget when it has a budget
+            if "input" in over and self.max_input_tokens is not None:
+                text_input = self.estimator.truncate(text_input, self.max_input_tokens)
+            if "output" in over and self.max_output_tokens is not None:
+                output = self.estimator.truncate(output, self.max_output_tokens)
+            return GeminiFinetuningData(text_input=text_input, output=output)
+        return record
+
+    def filter(self, records: Iterable[GeminiFinetuningData]) -> Iterator[GeminiFinetuningData]:
+        """Yield records that fit the budget, applying the configured action to those that do not."""
+        for record in records:
+            kept = self.apply(record)
+            if kept is not None:
+                yield kept
+        if self.handled[self.action]:
+            self.logger.warning(f"Length policy '{self.action}' applied to {self.handled[self.action]} "
+                                f"of {self.checked} items over the token budget")
+
+    def report(self) -> Dict[str, Any]:
+        """Summary of the records that exceeded a budget and what was done with them."""
+        return {
+            "config": self.config(),
+            "checked": self.checked,
+            "over_budget": dict(self.violations),
+            "handled": dict(self.handled),
+            "examples": list(self.examples),
+        }
@@ -1,6 +1,186 @@
+import hashlib
 import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.data_preparation.parallel import imap_ordered
+from src.data_preparation.sources import resolve_sources
+from src.model_tuning.api_client import GeminiApiClient
+from src.response_cache import ResponseCache
+
 
 def save_results(results, output_file):
     """Save evaluation results to a JSON file."""
     with open(output_file, 'w') as f:
-        json.dump(results, f, indent=4)
\ No newline at end of file
+        json.dump(results, f, indent=4)
+
+
+class Evaluator:
+    """
+    Run a tuned model over a test set with many requests in flight.
+
+    Test records go through the same DataPreparator formatting as training data.
+    Results come back in input order and are appended to a JSONL progress file as
+    they arrive, so an interrupted run resumes where it stopped and retries the
+    records that failed.
+
+    With a response cache, identical requests to the same model are answered
+    locally. Pass use_cache=False to always sample fresh responses.
+    """
+
+    def __init__(self, model, max_in_flight: int = 16, generation_config: Optional[Dict[str, Any]] = None,
+                 model_name: Optional[str] = None, response_cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True, api: Optional[GeminiApiClient] = None):
+        self.model = model
+        self.api = api
+        self.max_in_flight = max_in_flight
+        self.generation_config = generation_config
+        self.model_name = model_name or getattr(model, 'model_name', None)
+        self.response_cache = response_cache if use_cache else None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def for_tuned_model(cls, handler, model_name: str, **kwargs: Any) -> 'Evaluator':
+        """Build an evaluator for a tuned model through a BaseModelHandler."""
+        kwargs.setdefault('api', handler.api)
+        return cls(handler.get_tuned_model(model_name), model_name=model_name, **kwargs)
+
+    def generate(self, prompt: str) -> str:
+        """Send one prompt to the model and return the response text, consulting the cache first."""
+        model_name = self.model_name
+        cache = self.response_cache if model_name is not None else None
+        key = None
+        if cache is not None and model_name is not None:
+            key = ResponseCache.key(model_name, prompt, self.generation_config)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        kwargs = {} if self.generation_config is None else {"generation_config": self.generation_config}
+        if self.api is None:
+            response = self.model.generate_content(prompt, **kwargs)
+        else:
+            response = self.api.call('generate', self.model.generate_content, prompt, **kwargs)
+        text = response.text
+
+        if cache is not None and key is not None and model_name is not None:
+            cache.put(key, model_name, text)
+        return text
+
+    def _evaluate_one(self, index: int, record: GeminiFinetuningData) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "index": index,
+            "text_input": record.text_input,
+            "expected": record.output,
+            "response": None,
+            "error": None,
+        }
+        try:
+            result["response"] = self.generate(record.text_input)
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def progress_header(self, test_file: str) -> Dict[str, Any]:
+        """Identify a run, so a progress file is only resumed by the same model, settings and test data."""
+        digest = hashlib.sha256()
+        for path in resolve_sources(test_file):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        return {"evaluation_progress": {"model_name": self.model_name, "generation_config": self.generation_config,
+                                        "test_file_sha256": digest.hexdigest()}}
+
+    def load_progress(self, progress_file: str, header: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """
+        Load the successful results of an earlier run by index.
+
+        A partially written last line is dropped. A progress file written for a
+        different model, generation config or test file is discarded, and records
+        that failed are left out so they are evaluated again.
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        if not os.path.exists(progress_file):
+            return results
+        valid_bytes = 0
+        with open(progress_file, 'rb') as f:
+            for line_number, line in enumerate(f):
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if line_number == 0:
+                    if entry != header:
+                        self.logger.info(f"{progress_file} is from a different evaluation run; starting over")
+                        break
+                elif entry["error"] is None:
+                    results[entry["index"]] = entry
+                else:
+                    results.pop(entry["index"], None)
+                valid_bytes += len(line)
+        with open(progress_file, 'ab') as f:
+            f.truncate(valid_bytes)
+        return results
+
+    def iter_results(self, test_file: str, progress_file: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one result per test record in input order, resuming from progress_file if given.
+
+        Only successful results are written to the progress file, so a rerun
+        evaluates the failed records again. The progress file is removed once
+        every record has been evaluated without an error.
+        """
+        completed: Dict[int, Dict[str, Any]] = {}
+        progress = None
+        if progress_file:
+            header = self.progress_header(test_file)
+            completed = self.load_progress(progress_file, header)
+            if completed:
+                self.logger.info(f"Resuming evaluation after {len(completed)} completed records")
+            progress = open(progress_file, 'a')
+            if progress.tell() == 0:
+                progress.write(json.dumps(header) + '\n')
+        # Completed indices still to be merged back into the output, in order
+        replay = sorted(completed, reverse=True)
+
+        records = DataPreparator(test_file).iter_prepared()
+        pending = ((index, record) for index, record in enumerate(records) if index not in completed)
+        failed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+                for result in imap_ordered(executor, self._evaluate_one, pending, self.max_in_flight * 2):
+                    while replay and replay[-1] < result["index"]:
+                        yield completed[replay.pop()]
+                    if result["error"] is not None:
+                        failed += 1
+                    elif progress is not None:
+                        progress.write(json.dumps(result) + '\n')
+                        progress.flush()
+                    yield result
+            while replay:
+                yield completed[replay.pop()]
+        finally:
+            if progress is not None:
+                progress.close()
+        if progress_file:
+            if failed:
+                self.logger.info(f"Keeping {progress_file} to retry {failed} failed records")
+            else:
+                os.remove(progress_file)
+
+    def evaluate(self, test_file: str, progress_file: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Evaluate every test record and return the results in input order."""
+        results = list(self.iter_results(test_file, progress_file))
+        errors = sum(1 for result in results if result["error"] is not None)
+        self.logger.info(f"Evaluated {len(results)} records ({errors} errors)")
+        if self.response_cache is not None:
+            self.logger.info(f"Response cache: {self.response_cache.hits} hits, {self.response_cache.misses} misses")
+        if self.api is not None:
+            self.logger.info(f"API calls: {self.api.metrics()}")
+        return results
@@ -0,0 +1,194 @@
+import cProfile
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+PROMETHEUS_PREFIX = 'gemini_finetuning'
+
+
+class StageStats:
+    """Accumulated timings of one stage; max_seconds only covers executions recorded one at a time."""
+
+    __slots__ = ('count', 'seconds', 'max_seconds', 'errors')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds: Optional[float] = None
+        self.errors = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "seconds": round(self.seconds, 6),
+            "max_seconds": round(self.max_seconds, 6) if self.max_seconds is not None else None,
+            "errors": self.errors,
+        }
+
+
+class RunMetrics:
+    """
+    Stage timings, counters and gauges for one run, exportable as JSON or Prometheus text.
+
+    Stages are timed with span() for coarse steps, or add_time() for hot loops that
+    accumulate locally and report once. Names are dotted, e.g. 'prepare.validate'.
+    One instance is shared by every component in the process; see default().
+    """
+
+    _default: Optional['RunMetrics'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._stages: Dict[str, StageStats] = {}
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> 'RunMetrics':
+        """Return the metrics shared by every component in the process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._stages.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def add_time(self, stage: str, seconds: float, count: int = 1, errors: int = 0) -> None:
+        """Record count executions of a stage that took seconds in total."""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.count += count
+            stats.seconds += seconds
+            if count == 1:
+                stats.max_seconds = max(stats.max_seconds or 0.0, seconds)
+            stats.errors += errors
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one execution of stage; exceptions count as errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.add_time(stage, time.perf_counter() - start, errors=1)
+            raise
+        self.add_time(stage, time.perf_counter() - start)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "elapsed_seconds": round(time.time() - self.started_at, 3),
+                "stages": {stage: stats.to_dict() for stage, stats in self._stages.items()},
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+
+    def to_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        report = self.to_dict()
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> str:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            return metric
+
+        if report["stages"]:
+            seconds = family("stage_duration_seconds", "summary", "Time spent in each stage")
+            for stage, stats in sorted(report["stages"].items()):
+                lines.append(f'{seconds}_sum{{stage="{stage}"}} {stats["seconds"]}')
+                lines.append(f'{seconds}_count{{stage="{stage}"}} {stats["count"]}')
+            errors = family("stage_errors_total", "counter", "Stage executions that raised")
+            for stage, stats in sorted(report["stages"].items()):
+                lines.append(f'{errors}{{stage="{stage}"}} {stats["errors"]}')
+        for name, value in sorted(report["counters"].items()):
+            metric = family(f"{_metric_name(name)}_total", "counter", name)
+            lines.append(f"{metric} {value}")
+        for name, value in sorted(report["gauges"].items()):
+            metric = family(_metric_name(name), "gauge", name)
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus(self, path: str, prefix: str = PROMETHEUS_PREFIX) -> None:
+        """Write a textfile for the node_exporter textfile collector."""
+        _write_atomic(path, self.to_prometheus(prefix))
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _write_atomic(path: str, text: str) -> None:
+    # Collectors may read the file at any moment, so never expose a partial write
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def profiling(metrics: Optional[RunMetrics] = None, cprofile_path: Optional[str] = None,
+              trace_memory: bool = False) -> Iterator[None]:
+    """
+    Optionally profile the enclosed block.
+
+    With cprofile_path, cProfile stats are dumped there (readable with pstats or
+    snakeviz). With trace_memory, tracemalloc runs for the block and its peak
+    traced allocation is recorded as the 'memory.peak_traced_bytes' gauge.
+    """
+    logger = logging.getLogger(__name__)
+    profiler = cProfile.Profile() if cprofile_path else None
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None and cprofile_path is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile_path)
+            logger.info(f"Wrote cProfile stats to {cprofile_path}")
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            if metrics is not None:
+                metrics.set_gauge('memory.peak_traced_bytes', peak)
+            logger.info(f"Peak traced memory: {peak / 1e6:.1f} MB")
+            if started_tracing:
+                tracemalloc.stop()
@@ -1 +1,9 @@
-from .model_tuner import ModelTuner
\ No newline at end of file
+__all__ = ['ModelTuner']
+
+
+def __getattr__(name):
+    # Importing the Gemini SDK costs seconds; defer it until a tuner is actually used
+    if name == 'ModelTuner':
+        from .model_tuner import ModelTuner
+        return ModelTuner
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
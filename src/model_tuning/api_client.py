@@ -0,0 +1,175 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Requests per second and burst size allowed for each class of endpoint
+DEFAULT_LIMITS = {
+    'list': (2.0, 5),
+    'get': (10.0, 20),
+    'create': (0.5, 1),
+    'generate': (20.0, 40),
+}
+# HTTP status codes worth retrying: rate limited, or a transient server-side failure
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Calls to these endpoint classes are not idempotent: after a timeout or server error the request
+# may still have taken effect (a tuning job was created), so only rate-limit rejections are retried
+NON_IDEMPOTENT_ENDPOINTS = frozenset({'create'})
+RATE_LIMITED_STATUS_CODES = frozenset({429})
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: up to capacity calls at once, refilled at rate per second.
+
+    Callers that find the bucket empty reserve a future token and sleep outside
+    the lock, so waiting threads are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, blocking until it is available. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient API errors."""
+
+    def __init__(self, max_attempts: int = 5, initial_delay: float = 1.0, max_delay: float = 60.0,
+                 factor: float = 2.0):
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to sleep before retry number attempt (starting at 1)."""
+        return random.uniform(0, min(self.max_delay, self.initial_delay * self.factor ** (attempt - 1)))
+
+    @staticmethod
+    def is_retryable(error: BaseException, idempotent: bool = True) -> bool:
+        # google.api_core exceptions carry the HTTP status as .code
+        code = getattr(error, 'code', None)
+        if isinstance(code, int):
+            return code in (RETRYABLE_STATUS_CODES if idempotent else RATE_LIMITED_STATUS_CODES)
+        return idempotent and isinstance(error, (ConnectionError, TimeoutError))
+
+
+class EndpointMetrics:
+    """Counters for one endpoint class."""
+
+    __slots__ = ('calls', 'failures', 'retries', 'throttled', 'throttle_wait', 'backoff_wait')
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.throttled = 0
+        self.throttle_wait = 0.0
+        self.backoff_wait = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "throttle_wait_seconds": round(self.throttle_wait, 3),
+            "backoff_wait_seconds": round(self.backoff_wait, 3),
+        }
+
+
+class GeminiApiClient:
+    """
+    Single gateway for Gemini API calls: per-endpoint-class rate limits plus retries.
+
+    Every call names its endpoint class ('list', 'get', 'create', 'generate'), takes
+    a token from that class's bucket and is retried with jittered exponential
+    backoff on rate-limit and transient server errors. Calls that create
+    resources are only retried when they were rejected by the rate limit. One client is shared by
+    every handler in the process so concurrent workers draw on the same quota.
+    """
+
+    _default: Optional['GeminiApiClient'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.logger = logging.getLogger(__name__)
+        self._buckets = {endpoint: TokenBucket(rate, burst) for endpoint, (rate, burst) in self.limits.items()}
+        self._metrics: Dict[str, EndpointMetrics] = {}
+        self._metrics_lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> 'GeminiApiClient':
+        """Return the client shared by every handler in the process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def _endpoint_metrics(self, endpoint: str) -> EndpointMetrics:
+        with self._metrics_lock:
+            if endpoint not in self._metrics:
+                self._metrics[endpoint] = EndpointMetrics()
+            return self._metrics[endpoint]
+
+    def call(self, endpoint: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call fn(*args, **kwargs) within endpoint's rate limit, retrying transient failures."""
+        if endpoint not in self._buckets:
+            raise ValueError(f"Unknown endpoint class: {endpoint}")
+        bucket = self._buckets[endpoint]
+        metrics = self._endpoint_metrics(endpoint)
+        idempotent = endpoint not in NON_IDEMPOTENT_ENDPOINTS
+        attempt = 1
+        while True:
+            waited = bucket.acquire()
+            with self._metrics_lock:
+                metrics.calls += 1
+                if waited > 0:
+                    metrics.throttled += 1
+                    metrics.throttle_wait += waited
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.retry_policy.max_attempts or not self.retry_policy.is_retryable(e, idempotent):
+                    with self._metrics_lock:
+                        metrics.failures += 1
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                self.logger.warning(f"{endpoint} call failed ({str(e)}), retry {attempt} in {delay:.1f}s")
+                with self._metrics_lock:
+                    metrics.retries += 1
+                    metrics.backoff_wait += delay
+                time.sleep(delay)
+                attempt += 1
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per endpoint class: calls, failures, retries and time spent throttled or backing off."""
+        with self._metrics_lock:
+            return {endpoint: metrics.to_dict() for endpoint, metrics in self._metrics.items()}
+
+    def reset_metrics(self) -> None:
+        with self._metrics_lock:
+            self._metrics.clear()
@@ -1,68 +1,71 @@
 import logging
 import os
+from typing import Iterable, Optional
 
 from google import generativeai as genai
 from google.ai import generativelanguage as glm
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+
+from src.instrumentation import RunMetrics
+from src.model_tuning.api_client import GeminiApiClient
+from src.model_tuning.credentials import CredentialManager
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.status_sweep import StatusSweep, sweep_model_statuses
 
 
 class BaseModelHandler:
-    def __init__(self):
+    def __init__(self, catalog: Optional[ModelCatalog] = None, api: Optional[GeminiApiClient] = None,
+                 credentials=None):
         self.logger = logging.getLogger(__name__)
-        self.creds = None
-        self.setup_credentials()
+        self.creds = credentials
+        self.catalog = catalog if catalog is not None else ModelCatalog.default()
+        self.api = api if api is not None else GeminiApiClient.default()
+        # Credentials passed in (a service account, or anonymous ones for a local backend) skip the OAuth flow,
+        # but the SDK still has to use them for its calls
+        if credentials is None:
+            self.setup_credentials()
+        else:
+            genai.configure(credentials=credentials)
 
     def setup_credentials(self):
-        """Set up OAuth 2.0 credentials for authentication."""
-        SCOPES = [
-            'https://www.googleapis.com/auth/cloud-platform',
-            'https://www.googleapis.com/auth/generative-language.tuning'
-        ]
-
+        """Set up OAuth 2.0 credentials for authentication, shared across handlers in the process."""
         # Use environment variable for client_secret.json path
         client_secret_path = os.environ.get('CLIENT_SECRET_PATH')
         if not client_secret_path:
             raise ValueError("CLIENT_SECRET_PATH environment variable is not set")
 
         self.logger.info(f"Using client_secret.json from: {client_secret_path}")
-
-        if os.path.exists('token.json'):
-            self.creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                self.creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    client_secret_path, SCOPES)
-                self.creds = flow.run_local_server(port=0)
-
-            with open('token.json', 'w') as token:
-                token.write(self.creds.to_json())
-
+        with RunMetrics.default().span('auth'):
+            self.creds = CredentialManager.for_client_secret(client_secret_path).get_credentials()
         self.logger.info("OAuth 2.0 credentials set up successfully.")
-        genai.configure(credentials=self.creds)
 
     def get_available_models(self):
         """Get all available models for fine-tuning."""
         self.logger.info("Fetching available models for fine-tuning...")
         try:
-            models = genai.list_models()
-            fine_tunable_models = [model for model in models]
+            fine_tunable_models = self.catalog.get(
+                'available_models', 'available_models', lambda: self.api.call('list', lambda: list(genai.list_models())))
             self.logger.info(f"Found {len(fine_tunable_models)} fine-tunable models.")
             return fine_tunable_models
         except Exception as e:
             self.logger.error(f"Error fetching available models: {str(e)}")
             raise
 
+    def get_model(self, model_name: str):
+        """Get a model's metadata, served from the model catalog while fresh."""
+        return self.catalog.get(f"model:{model_name}", 'model', lambda: self.api.call('get', genai.get_model, model_name))
+
+    def fetch_model(self, model_name: str):
+        """Get a model's current metadata from the API, bypassing the catalog, and store it there."""
+        model = self.api.call('get', genai.get_model, model_name)
+        self.catalog.put(f"model:{model_name}", model)
+        return model
+
     def get_tuned_model_status(self, model_name: str):
         """Get the status of a tuned model."""
         self.logger.info(f"Checking status of tuned model: {model_name}")
         try:
             # Attempt to get the model
-            model = genai.get_model(model_name)
+            model = self.get_model(model_name)
 
             # Check the model's state
             if model.state == glm.TunedModel.State.ACTIVE:
@@ -89,8 +92,19 @@ class BaseModelHandler:
         """Get all tuned models available to the user."""
         self.logger.info("Fetching all tuned models...")
         try:
-            tuned_models = genai.list_tuned_models()
-            return tuned_models  # This is a TunedModelsIterable
+            return self.catalog.get('tuned_models', 'tuned_models', lambda: self.api.call('list', lambda: list(genai.list_tuned_models())))
         except Exception as e:
             self.logger.error(f"Error fetching tuned models: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def get_tuned_model_statuses(self, model_names: Optional[Iterable[str]] = None,
+                                 max_workers: int = 8) -> StatusSweep:
+        """Get the state of many tuned models at once, defaulting to every tuned model."""
+        if model_names is None:
+            model_names = [model.name for model in self.get_tuned_models()]
+        model_names = list(model_names)
+        self.logger.info(f"Checking status of {len(model_names)} tuned models...")
+        # States change while jobs run, so a sweep always reads them fresh
+        sweep = sweep_model_statuses(model_names, self.fetch_model, max_workers)
+        self.logger.info(f"Status sweep finished in {sweep.elapsed:.1f}s: {sweep.counts}")
+        return sweep
\ No newline at end of file
@@ -0,0 +1,185 @@
+import contextlib
+import datetime
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from google import generativeai as genai
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+
+try:
+    import fcntl
+    _HAS_FCNTL = True
+except ImportError:  # Windows: fall back to in-process locking only
+    _HAS_FCNTL = False
+
+SCOPES = [
+    'https://www.googleapis.com/auth/cloud-platform',
+    'https://www.googleapis.com/auth/generative-language.tuning'
+]
+TOKEN_PATH = 'token.json'
+
+
+@contextlib.contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive advisory lock on path + '.lock' across processes."""
+    if not _HAS_FCNTL:
+        yield
+        return
+    with open(path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class CredentialManager:
+    """
+    Process-wide OAuth 2.0 credentials for the Gemini API.
+
+    Credentials are loaded from the token file once per process and shared by every
+    handler. A daemon thread refreshes them shortly before they expire, so requests
+    do not stall on an expired token. Token file writes are atomic and guarded by a
+    file lock, so concurrent workers neither corrupt the file nor refresh twice.
+    """
+
+    _managers: Dict[Tuple[str, str], 'CredentialManager'] = {}
+    _managers_lock = threading.Lock()
+
+    def __init__(self, client_secret_path: str, token_path: str = TOKEN_PATH, scopes: Optional[List[str]] = None,
+                 refresh_margin: float = 300.0):
+        self.client_secret_path = client_secret_path
+        self.token_path = token_path
+        self.scopes = scopes or SCOPES
+        self.refresh_margin = refresh_margin
+        self.logger = logging.getLogger(__name__)
+        self._creds: Optional[Credentials] = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_client_secret(cls, client_secret_path: str, token_path: str = TOKEN_PATH) -> 'CredentialManager':
+        """Return the shared manager for a client secret and token file, creating it on first use."""
+        key = (os.path.abspath(client_secret_path), os.path.abspath(token_path))
+        with cls._managers_lock:
+            if key not in cls._managers:
+                cls._managers[key] = cls(client_secret_path, token_path)
+            return cls._managers[key]
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """Stop and forget every shared manager."""
+        with cls._managers_lock:
+            managers = list(cls._managers.values())
+            cls._managers = {}
+        for manager in managers:
+            manager._stop.set()
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        # The parent's lock may have been held mid-fork and its threads are gone
+        cls._managers_lock = threading.Lock()
+        cls._managers = {}
+
+    def get_credentials(self) -> Credentials:
+        """Return valid credentials, loading them on first use and refreshing them if needed."""
+        with self._lock:
+            if self._creds is None:
+                self._load()
+                genai.configure(credentials=self._creds)
+                self.start_background_refresh()
+            elif not self._creds.valid:
+                self._refresh()
+            assert self._creds is not None
+            return self._creds
+
+    def _load(self) -> None:
+        with file_lock(self.token_path):
+            creds = None
+            if os.path.exists(self.token_path):
+                creds = Credentials.from_authorized_user_file(self.token_path, self.scopes)
+
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                else:
+                    flow = InstalledAppFlow.from_client_secrets_file(self.client_secret_path, self.scopes)
+                    creds = flow.run_local_server(port=0)
+                self._save(creds)
+            self._creds = creds
+        self.logger.info("OAuth 2.0 credentials loaded.")
+
+    def _refresh(self) -> None:
+        creds = self._creds
+        assert creds is not None, "credentials must be loaded before they are refreshed"
+        with file_lock(self.token_path):
+            # Another process may have refreshed the token while we waited for the lock
+            if os.path.exists(self.token_path):
+                stored = Credentials.from_authorized_user_file(self.token_path, self.scopes)
+                if stored.valid and self._seconds_left(stored) > self.refresh_margin:
+                    creds.token = stored.token
+                    creds.expiry = stored.expiry
+                    return
+            creds.refresh(Request())
+            self._save(creds)
+        self.logger.info("OAuth 2.0 credentials refreshed.")
+
+    def _save(self, creds: Credentials) -> None:
+        """Atomically replace the token file; callers hold the file lock."""
+        directory = os.path.dirname(os.path.abspath(self.token_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as token:
+                token.write(creds.to_json())
+            os.replace(tmp_path, self.token_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _seconds_left(creds: Credentials) -> float:
+        if creds.expiry is None:
+            return float('inf')
+        return (creds.expiry - datetime.datetime.utcnow()).total_seconds()
+
+    def start_background_refresh(self) -> None:
+        """Start the daemon thread that refreshes credentials ahead of expiry."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="credential-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            with self._lock:
+                seconds_left = self._seconds_left(self._creds) if self._creds is not None else float('inf')
+                can_refresh = self._creds is not None and self._creds.refresh_token
+            if not can_refresh or seconds_left == float('inf'):
+                return
+            if self._stop.wait(max(seconds_left - self.refresh_margin, 1.0)):
+                return
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception as e:
+                self.logger.error(f"Background credential refresh failed: {str(e)}")
+                if self._stop.wait(min(self.refresh_margin, 60.0)):
+                    return
+
+
+if hasattr(os, 'register_at_fork'):
+    # Threads and locks do not survive fork; children start with fresh managers
+    os.register_at_fork(after_in_child=CredentialManager._reset_after_fork)
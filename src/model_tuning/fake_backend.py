@@ -0,0 +1,222 @@
+import datetime
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as api_exceptions
+from google.auth.credentials import AnonymousCredentials
+import google.generativeai as genai
+from google.generativeai.types import model_types
+
+
+class FakeModel:
+    """A base or tuned model as returned by the fake listing and get_model calls."""
+
+    def __init__(self, name: str, display_name: Optional[str] = None, base_model: Optional[str] = None,
+                 state: Any = None, supported_generation_methods: Optional[List[str]] = None):
+        self.name = name
+        self.display_name = display_name or name
+        self.base_model = base_model
+        self.state = state
+        self.create_time = datetime.datetime.now(datetime.timezone.utc)
+        self.supported_generation_methods = supported_generation_methods or ['generateContent']
+        self.input_token_limit = 32768
+        self.output_token_limit = 8192
+        # Set on tuned models when the tuning job is created
+        self.training_examples = 0
+        self.hyperparameters: Dict[str, Any] = {}
+        self.tuning_task: Optional[glm.TuningTask] = None
+
+    def to_tuned_model(self) -> model_types.TunedModel:
+        """The tuned model as the SDK decodes it from an operation result."""
+        return model_types.decode_tuned_model(glm.TunedModel(
+            name=self.name, display_name=self.display_name, base_model=self.base_model, state=self.state,
+            tuning_task=self.tuning_task))
+
+
+class FakeOperation:
+    """Long-running create_tuned_model operation that finishes after the backend's tuning time."""
+
+    def __init__(self, backend: 'FakeGeminiBackend', tuned_model: FakeModel, ready_at: float, fails: bool):
+        self._backend = backend
+        self._tuned_model = tuned_model
+        self._ready_at = ready_at
+        self._fails = fails
+        self.name = f"{tuned_model.name}/operations/{tuned_model.name.rsplit('/', 1)[-1]}"
+        self.metadata = type('Metadata', (), {'name': tuned_model.name, 'tuned_model': tuned_model.name})()
+
+    def done(self) -> bool:
+        self._backend._record('operation.done')
+        return self._backend._refresh(self._tuned_model, self._ready_at, self._fails)
+
+    def wait_bar(self) -> Iterator[Dict[str, Any]]:
+        while not self.done():
+            remaining = max(0.0, self._ready_at - time.monotonic())
+            yield {"tuned_model": self._tuned_model.name, "remaining_seconds": round(remaining, 3)}
+
+    def result(self) -> model_types.TunedModel:
+        self._backend._record('operation.result')
+        delay = self._ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if not self._backend._refresh(self._tuned_model, self._ready_at, self._fails) or self._fails:
+            raise RuntimeError(f"Tuning failed for {self._tuned_model.name}")
+        return self._tuned_model.to_tuned_model()
+
+
+class FakeGenerativeModel:
+    """Stand-in for genai.GenerativeModel backed by the fake backend."""
+
+    def __init__(self, backend: 'FakeGeminiBackend', model_name: str):
+        self._backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str, **kwargs: Any) -> Any:
+        self._backend._request('generate_content')
+        return type('Response', (), {'text': self._backend.responder(self.model_name, prompt)})()
+
+
+class FakeGeminiBackend:
+    """
+    In-process stand-in for the parts of google.generativeai this project calls.
+
+    Covers list_models, list_tuned_models, get_model, create_tuned_model (with
+    operations whose tuned model moves from CREATING to ACTIVE or FAILED after
+    tuning_seconds), get_operation, list_operations and
+    GenerativeModel.generate_content. Every request sleeps for latency
+    seconds, fails with 503 at failure_rate and with 429 once more
+    than quota_per_minute requests arrive within a minute, so the retry and
+    rate-limit layer sees the same errors as against the real service.
+    Use install() to swap it in for the real module functions, and pass
+    backend.credentials to handlers to skip the OAuth flow.
+    """
+
+    credentials = AnonymousCredentials()
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, quota_per_minute: Optional[int] = None,
+                 tuning_seconds: float = 0.0, tuning_failure_rate: float = 0.0,
+                 responder: Optional[Callable[[str, str], str]] = None, seed: Optional[int] = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.quota_per_minute = quota_per_minute
+        self.tuning_seconds = tuning_seconds
+        self.tuning_failure_rate = tuning_failure_rate
+        self.responder = responder if responder is not None else (lambda model_name, prompt: prompt)
+        self.calls: Counter = Counter()
+        self.base_models = [
+            FakeModel("models/gemini-1.5-flash-001-tuning",
+                      supported_generation_methods=['generateContent', 'createTunedModel']),
+            FakeModel("models/gemini-1.5-pro-001"),
+        ]
+        self.tuned_models: Dict[str, FakeModel] = {}
+        self.operations: Dict[str, FakeOperation] = {}
+        self._random = random.Random(seed)
+        self._recent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _record(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+
+    def _request(self, method: str) -> None:
+        """Account for one API request: latency, quota and injected failures."""
+        with self._lock:
+            self.calls[method] += 1
+            now = time.monotonic()
+            if self.quota_per_minute is not None:
+                while self._recent and now - self._recent[0] >= 60.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.quota_per_minute:
+                    raise api_exceptions.ResourceExhausted(f"Quota exceeded for {method}")
+                self._recent.append(now)
+            fail = self._random.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise api_exceptions.ServiceUnavailable(f"Injected failure in {method}")
+
+    def _refresh(self, model: FakeModel, ready_at: float, fails: bool) -> bool:
+        if model.state == glm.TunedModel.State.CREATING and time.monotonic() >= ready_at:
+            model.state = glm.TunedModel.State.FAILED if fails else glm.TunedModel.State.ACTIVE
+        return model.state != glm.TunedModel.State.CREATING
+
+    def list_models(self, **kwargs: Any) -> Iterator[FakeModel]:
+        self._request('list_models')
+        return iter(list(self.base_models))
+
+    def list_tuned_models(self, **kwargs: Any) -> Iterator[FakeModel]:
+        self._request('list_tuned_models')
+        with self._lock:
+            return iter(list(self.tuned_models.values()))
+
+    def get_model(self, name: str, **kwargs: Any) -> FakeModel:
+        self._request('get_model')
+        with self._lock:
+            model = self.tuned_models.get(name) or next((m for m in self.base_models if m.name == name), None)
+        if model is None:
+            raise api_exceptions.NotFound(f"Model {name} not found")
+        return model
+
+    def create_tuned_model(self, source_model: str, training_data: Any, *, id: Optional[str] = None,
+                           display_name: Optional[str] = None, **kwargs: Any) -> FakeOperation:
+        self._request('create_tuned_model')
+        examples = sum(1 for _ in training_data)
+        if not examples:
+            raise api_exceptions.InvalidArgument("Training data is empty")
+        with self._lock:
+            slug = id or re.sub(r'[^a-z0-9]+', '-', (display_name or 'model').lower()).strip('-')
+            name = f"tunedModels/{slug}"
+            if name in self.tuned_models:
+                if id is not None:
+                    raise api_exceptions.AlreadyExists(f"Tuned model {name} already exists")
+                name = f"{name}-{len(self.tuned_models)}"
+            model = FakeModel(name, display_name, source_model, state=glm.TunedModel.State.CREATING)
+            model.training_examples = examples
+            model.hyperparameters = kwargs
+            # Loss snapshots per epoch, as reported in the tuned model's tuning task
+            loss = self._random.uniform(0.5, 1.5)
+            snapshots = []
+            for epoch in range(1, (kwargs.get('epoch_count') or 5) + 1):
+                loss *= self._random.uniform(0.6, 0.9)
+                snapshots.append(glm.TuningSnapshot(step=epoch * examples, epoch=epoch, mean_loss=loss))
+            model.tuning_task = glm.TuningTask(snapshots=snapshots)
+            self.tuned_models[name] = model
+            fails = self._random.random() < self.tuning_failure_rate
+            operation = FakeOperation(self, model, time.monotonic() + self.tuning_seconds, fails)
+            self.operations[operation.name] = operation
+        return operation
+
+    def get_operation(self, name: str, **kwargs: Any) -> FakeOperation:
+        self._request('get_operation')
+        with self._lock:
+            operation = self.operations.get(name)
+        if operation is None:
+            raise api_exceptions.NotFound(f"Operation {name} not found")
+        return operation
+
+    def list_operations(self, **kwargs: Any) -> Iterator[FakeOperation]:
+        self._request('list_operations')
+        with self._lock:
+            return iter(list(self.operations.values()))
+
+    def GenerativeModel(self, model_name: str, **kwargs: Any) -> FakeGenerativeModel:
+        return FakeGenerativeModel(self, model_name)
+
+    @contextmanager
+    def install(self) -> Iterator['FakeGeminiBackend']:
+        """Route google.generativeai calls to this backend for the duration of the block."""
+        names = ('list_models', 'list_tuned_models', 'get_model', 'create_tuned_model', 'get_operation',
+                 'list_operations', 'GenerativeModel')
+        originals = {name: getattr(genai, name) for name in names}
+        for name in names:
+            setattr(genai, name, getattr(self, name))
+        try:
+            yield self
+        finally:
+            for name, original in originals.items():
+                setattr(genai, name, original)
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_PATH = os.path.join('.cache', 'tuning_jobs.sqlite3')
+
+# Job states: submitted but no operation recorded yet, tuning, and the two final states
+SUBMITTING = 'SUBMITTING'
+CREATING = 'CREATING'
+ACTIVE = 'ACTIVE'
+FAILED = 'FAILED'
+IN_FLIGHT_STATES = (SUBMITTING, CREATING)
+
+_COLUMNS = ('key', 'display_name', 'tuned_model', 'operation_name', 'source_model', 'params', 'state',
+            'attempts', 'error', 'created_at', 'updated_at')
+
+
+class TuningJobRecord:
+    """One row of the job registry."""
+
+    def __init__(self, key: str, display_name: str, tuned_model: str, operation_name: Optional[str],
+                 source_model: str, params: str, state: str, attempts: int, error: Optional[str],
+                 created_at: float, updated_at: float):
+        self.key = key
+        self.display_name = display_name
+        self.tuned_model = tuned_model
+        self.operation_name = operation_name
+        self.source_model = source_model
+        self.params: Dict[str, Any] = json.loads(params)
+        self.state = state
+        self.attempts = attempts
+        self.error = error
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @property
+    def in_flight(self) -> bool:
+        return self.state in IN_FLIGHT_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {column: getattr(self, column) for column in _COLUMNS}
+
+
+class JobRegistry:
+    """
+    Persistent SQLite record of submitted tuning jobs.
+
+    Jobs are keyed by a hash of the prepared training data, the source model and
+    the tuning parameters, so submitting the same job twice can re-attach to the
+    first operation instead of paying for a second one. Each row holds the
+    operation name, the tuned model it creates, its last known state and timestamps.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " key TEXT PRIMARY KEY,"
+                " display_name TEXT NOT NULL,"
+                " tuned_model TEXT NOT NULL,"
+                " operation_name TEXT,"
+                " source_model TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_operation_name ON jobs (operation_name)")
+
+    @staticmethod
+    def data_digest(training_data: Iterable[Dict[str, Any]]) -> str:
+        """Hash of Gemini format training data, in order."""
+        digest = hashlib.sha256()
+        for record in training_data:
+            digest.update(json.dumps(record, sort_keys=True).encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(data_digest: str, source_model: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build the registry key of a job from its training data digest, source model and parameters."""
+        payload = json.dumps([data_digest, source_model, params or {}], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _select(self, where: str, args: tuple) -> List[TuningJobRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs {where} ORDER BY created_at", args).fetchall()
+        return [TuningJobRecord(*row) for row in rows]
+
+    def get(self, key: str) -> Optional[TuningJobRecord]:
+        """Return the job registered under a key, or None."""
+        records = self._select("WHERE key = ?", (key,))
+        return records[0] if records else None
+
+    def find_operation(self, operation_name: str) -> Optional[TuningJobRecord]:
+        """Return the job tracking an operation, or None."""
+        records = self._select("WHERE operation_name = ?", (operation_name,))
+        return records[0] if records else None
+
+    def jobs(self) -> List[TuningJobRecord]:
+        """Every registered job, oldest first."""
+        return self._select("", ())
+
+    def in_flight(self) -> List[TuningJobRecord]:
+        """Jobs that were submitted and have not reached a final state."""
+        return self._select(f"WHERE state IN ({', '.join('?' * len(IN_FLIGHT_STATES))})", IN_FLIGHT_STATES)
+
+    def start(self, key: str, display_name: str, tuned_model: str, source_model: str,
+              params: Optional[Dict[str, Any]] = None) -> None:
+        """Record that a job is about to be submitted, before the create call is made."""
+        now = time.time()
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                "UPDATE jobs SET display_name = ?, tuned_model = ?, operation_name = NULL, state = ?,"
+                " error = NULL, updated_at = ? WHERE key = ?",
+                (display_name, tuned_model, SUBMITTING, now, key),
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    f"INSERT INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    (key, display_name, tuned_model, None, source_model, json.dumps(params or {}, sort_keys=True),
+                     SUBMITTING, 0, None, now, now),
+                )
+
+    def submitted(self, key: str, operation_name: str) -> None:
+        """Record the operation a job's create call returned."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET operation_name = ?, state = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE key = ?",
+                (operation_name, CREATING, time.time(), key),
+            )
+
+    def set_state(self, key: str, state: str, error: Optional[str] = None) -> None:
+        """Record a job's latest state, and the error if it failed."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE key = ?",
+                               (state, error, time.time(), key))
+        self.logger.info(f"Tuning job {key[:12]} is {state}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
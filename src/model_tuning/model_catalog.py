@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'model_catalog')
+# Seconds an entry is served without contacting the API, per kind of listing
+DEFAULT_TTLS = {
+    'available_models': 24 * 60 * 60,
+    'tuned_models': 5 * 60,
+    'model': 60,
+}
+DEFAULT_STALE_WHILE_REVALIDATE = 5 * 60
+
+
+class ModelCatalog:
+    """
+    TTL cache for model listings and lookups, with in-memory and on-disk tiers.
+
+    Fresh entries are served from memory, or from disk in a new process. Entries
+    past their TTL but within the stale_while_revalidate window are still served
+    while a background thread reloads them; older entries are reloaded inline.
+    """
+
+    _default: Optional['ModelCatalog'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, ttls: Optional[Dict[str, float]] = None,
+                 stale_while_revalidate: float = DEFAULT_STALE_WHILE_REVALIDATE):
+        self.cache_dir = cache_dir
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.stale_while_revalidate = stale_while_revalidate
+        self.logger = logging.getLogger(__name__)
+        self._memory: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._revalidating: Set[str] = set()
+
+    @classmethod
+    def default(cls) -> 'ModelCatalog':
+        """Return the catalog shared by every handler in the process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.pkl')
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Any]]:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable model catalog entry {path}: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, entry: Tuple[float, Any]) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # The memory tier still works; a value that cannot be persisted is not fatal
+            self.logger.warning(f"Could not persist model catalog entry {key}: {str(e)}")
+
+    def _store(self, key: str, value: Any) -> None:
+        entry = (time.time(), value)
+        with self._lock:
+            self._memory[key] = entry
+        self._write_disk(key, entry)
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value fetched elsewhere, e.g. a fresh read that bypassed the cache."""
+        self._store(key, value)
+
+    def get(self, key: str, kind: str, loader: Callable[[], T]) -> T:
+        """Return the cached value for key, calling loader when it is missing or expired."""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._memory[key] = entry
+
+        if entry is not None:
+            stored_at, value = entry
+            age = time.time() - stored_at
+            ttl = self.ttls[kind]
+            if age <= ttl:
+                return value
+            if age <= ttl + self.stale_while_revalidate:
+                self._revalidate_in_background(key, loader)
+                return value
+
+        value = loader()
+        self._store(key, value)
+        return value
+
+    def _revalidate_in_background(self, key: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                self._store(key, loader())
+            except Exception as e:
+                self.logger.warning(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, name=f"catalog-refresh-{key}", daemon=True).start()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one entry, or every entry when no key is given, from both tiers."""
+        with self._lock:
+            keys = [key] if key is not None else list(self._memory)
+            for k in keys:
+                self._memory.pop(k, None)
+        paths: List[Optional[str]]
+        if key is None and self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                     if name.endswith('.pkl')]
+        else:
+            paths = [self._disk_path(k) for k in keys]
+        for path in paths:
+            if path is None:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
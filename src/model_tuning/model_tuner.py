@@ -1,47 +1,193 @@
+import re
 import time
 
 import google.generativeai as genai
-from typing import List, Optional
-import random
+from google.api_core import exceptions as api_exceptions
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.instrumentation import RunMetrics
+from src.model_tuning.api_client import GeminiApiClient
 from src.model_tuning.base_model_tuner import BaseModelHandler
+from src.model_tuning.job_registry import ACTIVE, FAILED, JobRegistry, TuningJobRecord
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.polling import poll_intervals
+
+SOURCE_MODEL = "models/gemini-1.5-flash-001-tuning"
+
+
+def tuned_model_id(display_name: str, key: str, attempt: int = 1) -> str:
+    """Deterministic tuned model id for a job, so resubmitting it is rejected as a duplicate by the service."""
+    slug = re.sub(r'[^a-z0-9]+', '-', display_name.lower()).strip('-')[:23].strip('-') or 'tuned'
+    if not slug[0].isalpha():
+        slug = f"m-{slug}"[:23]
+    model_id = f"{slug}-{key[:12]}"
+    return model_id if attempt <= 1 else f"{model_id}-{attempt}"
+
+
+class TuningDataset:
+    """Training data converted to the Gemini API format once, so several jobs can share it."""
+
+    def __init__(self, tuning_data: Iterable[GeminiFinetuningData]):
+        with RunMetrics.default().span('tune.format'):
+            self.records = [GeminiFinetuningData.to_gemini_format(data) for data in tuning_data]
+            self.digest = JobRegistry.data_digest(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
 
 
 class ModelTuner(BaseModelHandler):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, catalog: Optional[ModelCatalog] = None, api: Optional[GeminiApiClient] = None,
+                 credentials=None, registry: Optional[JobRegistry] = None):
+        super().__init__(catalog, api, credentials)
+        self.registry = registry
 
-    def tune_model(self, tuning_data: List[GeminiFinetuningData], name: Optional[str] = None):
-        """Tune the Gemini model with the provided data."""
+    def tune_model(self, tuning_data: Union[Iterable[GeminiFinetuningData], TuningDataset],
+                   name: Optional[str] = None, source_model: str = SOURCE_MODEL, epoch_count: Optional[int] = None,
+                   batch_size: Optional[int] = None, learning_rate: Optional[float] = None):
+        """
+        Tune the Gemini model with the provided data.
+
+        Hyperparameters left as None use the service defaults. With a job
+        registry, a job identical to one already submitted (same data, source
+        model and hyperparameters) re-attaches to the existing operation unless
+        that job failed, in which case it is submitted again.
+        """
         self.logger.info("Starting model tuning process...")
         
+        metrics = RunMetrics.default()
+
+        # Convert tuning data to Gemini API format, unless it already is
+        dataset = tuning_data if isinstance(tuning_data, TuningDataset) else TuningDataset(tuning_data)
+
+        params = {key: value for key, value in (('epoch_count', epoch_count), ('batch_size', batch_size),
+                                                ('learning_rate', learning_rate)) if value is not None}
+        key = JobRegistry.key(dataset.digest, source_model, params)
         if name is None:
-            name = f'generate-num-{random.randint(0,10000)}'
-        
-        # Convert tuning data to Gemini API format
-        gemini_format_data = [GeminiFinetuningData.to_gemini_format(data) for data in tuning_data]
+            name = f'generate-{key[:12]}'
+
+        create_options: Dict[str, Any] = dict(params)
+        if self.registry is not None:
+            existing = self.registry.get(key)
+            if existing is not None and existing.state != FAILED and existing.operation_name:
+                self.logger.info(f"Job already submitted as {existing.operation_name} ({existing.state}), re-attaching")
+                return self.get_operation(existing.operation_name)
+            attempt = existing.attempts + 1 if existing is not None else 1
+            create_options['id'] = tuned_model_id(name, key, attempt)
+            self.registry.start(key, name, f"tunedModels/{create_options['id']}", source_model, params)
 
+        metrics.incr('tune.records_uploaded', len(dataset))
 
         # Start the tuning process
         try:
-            operation = genai.create_tuned_model(
-                display_name=name,
-                source_model="models/gemini-1.5-flash-001-tuning",
-                training_data=gemini_format_data,
-            )
+            with metrics.span('tune.submit'):
+                try:
+                    operation = self.api.call(
+                        'create',
+                        genai.create_tuned_model,
+                        display_name=name,
+                        source_model=source_model,
+                        training_data=dataset.records,
+                        **create_options,
+                    )
+                except api_exceptions.AlreadyExists:
+                    if self.registry is None:
+                        raise
+                    # An earlier run created the model but stopped before recording its operation
+                    operation = self.find_operation(f"tunedModels/{create_options['id']}")
             self.logger.info(f"Tuning job started.")
+            if self.registry is not None:
+                self.registry.submitted(key, operation.name)
+            # The new job shows up in the tuned model listing
+            self.catalog.invalidate('tuned_models')
             return operation
         except Exception as e:
             self.logger.error(f"Error starting tuning job: {str(e)}")
+            if self.registry is not None:
+                # The tuned model id is kept, so a retry that finds the job was created re-attaches to it
+                self.registry.set_state(key, FAILED, str(e))
             raise
 
-    def wait_for_tuning_completion(self, operation):
-        """Wait for the tuning process to complete."""
-        for status in operation.wait_bar():
-            self.logger.info(f"Tuning status: {status}")
-            time.sleep(60)
+    def get_operation(self, operation_name: str):
+        """Re-attach to a tuning operation by name."""
+        return self.api.call('get', genai.get_operation, operation_name)
+
+    def find_operation(self, tuned_model: str):
+        """Find the operation creating a tuned model."""
+        prefix = f"{tuned_model}/operations/"
+        operation = self.api.call(
+            'list', lambda: next((op for op in genai.list_operations() if op.name.startswith(prefix)), None))
+        if operation is None:
+            raise LookupError(f"No tuning operation found for {tuned_model}")
+        return operation
+
+    def resume_in_flight(self) -> List:
+        """Re-attach to every registered job that has not finished, e.g. after a restart."""
+        if self.registry is None:
+            return []
+        operations = []
+        for job in self.registry.in_flight():
+            if job.operation_name is None:
+                self.logger.warning(f"Job {job.display_name} was never confirmed as submitted; "
+                                    f"tune the same data again to resubmit or re-attach it")
+                continue
+            self.logger.info(f"Re-attaching to {job.operation_name}")
+            operations.append(self.get_operation(job.operation_name))
+        return operations
+
+    def refresh_in_flight(self) -> List[TuningJobRecord]:
+        """
+        Check every registered job that has not finished with the service and
+        record the ones that have, e.g. after a run that was killed while waiting.
+        Returns the jobs still running.
+        """
+        if self.registry is None:
+            return []
+        running = []
+        for job in self.registry.in_flight():
+            if job.operation_name is not None:
+                operation = self.get_operation(job.operation_name)
+                if operation.done():
+                    try:
+                        operation.result()
+                    except Exception as e:
+                        self.record_completion(operation, e)
+                    else:
+                        self.record_completion(operation)
+                    continue
+            running.append(job)
+        return running
+
+    def registered_job(self, operation) -> Optional[TuningJobRecord]:
+        """The registry entry tracking an operation, if any."""
+        if self.registry is None:
+            return None
+        return self.registry.find_operation(operation.name)
+
+    def record_completion(self, operation, error: Optional[BaseException] = None) -> None:
+        """Store the final state of an operation in the job registry."""
+        job = self.registered_job(operation)
+        if job is not None and self.registry is not None:
+            self.registry.set_state(job.key, FAILED if error is not None else ACTIVE,
+                                    str(error) if error is not None else None)
+
+    def wait_for_tuning_completion(self, operation, initial_poll_interval: float = 5.0,
+                                   max_poll_interval: float = 60.0):
+        """Wait for the tuning process to complete, polling quickly at first and backing off."""
+        metrics = RunMetrics.default()
+        delays = poll_intervals(initial_poll_interval, max_poll_interval)
+        with metrics.span('tune.wait'):
+            for status in operation.wait_bar():
+                self.logger.info(f"Tuning status: {status}")
+                metrics.incr('tune.polls')
+                time.sleep(next(delays))
 
-        result = operation.result()
+            try:
+                result = operation.result()
+            except Exception as e:
+                self.record_completion(operation, e)
+                raise
+        self.record_completion(operation)
         self.logger.info("Tuning completed successfully.")
-        return result
\ No newline at end of file
+        return result
@@ -0,0 +1,20 @@
+import random
+from typing import Iterator
+
+
+def poll_intervals(initial: float = 5.0, maximum: float = 300.0, factor: float = 2.0,
+                   jitter: float = 0.2, fast_polls: int = 3) -> Iterator[float]:
+    """
+    Yield delays between status checks of a long-running operation.
+
+    The first fast_polls delays stay at the initial interval so quick failures are
+    seen quickly, after which the interval grows exponentially up to maximum.
+    Each delay is spread by +/- jitter so many pollers do not fire in lockstep.
+    """
+    interval = initial
+    polls = 0
+    while True:
+        yield interval * random.uniform(1 - jitter, 1 + jitter)
+        polls += 1
+        if polls >= fast_polls:
+            interval = min(interval * factor, maximum)
@@ -0,0 +1,75 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class ModelStatusRow:
+    """State of one tuned model as seen by a status sweep."""
+
+    def __init__(self, name: str, state: Optional[str] = None, create_time: Any = None,
+                 error: Optional[str] = None):
+        self.name = name
+        self.state = state
+        self.create_time = create_time
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "create_time": str(self.create_time) if self.create_time is not None else None,
+            "error": self.error,
+        }
+
+
+class StatusSweep:
+    """Result of fetching the state of many tuned models: one row per model plus counts by state."""
+
+    def __init__(self, rows: List[ModelStatusRow], elapsed: float):
+        self.rows = rows
+        self.elapsed = elapsed
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter("ERROR" if row.error is not None else str(row.state) for row in self.rows))
+
+    def summary(self) -> Dict[str, Any]:
+        return {"total": len(self.rows), "counts": self.counts, "elapsed_seconds": round(self.elapsed, 3)}
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [row.to_dict() for row in self.rows]
+
+    def to_table(self) -> str:
+        """Render the rows and summary as a plain-text table."""
+        columns = ("name", "state", "create_time", "error")
+        rows = [[str(row.to_dict()[column] or "") for column in columns] for row in self.rows]
+        widths = [max([len(column)] + [len(row[i]) for row in rows]) for i, column in enumerate(columns)]
+        lines = ["  ".join(column.upper().ljust(width) for column, width in zip(columns, widths))]
+        lines.extend("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+        counts = ", ".join(f"{state}: {count}" for state, count in sorted(self.counts.items()))
+        lines.append(f"{len(self.rows)} models ({counts})")
+        return "\n".join(lines)
+
+
+def sweep_model_statuses(model_names: Iterable[str], get_model: Callable[[str], Any],
+                         max_workers: int = 8) -> StatusSweep:
+    """
+    Fetch many models concurrently on a bounded thread pool.
+
+    get_model is responsible for rate limiting; handlers pass fetch_model, which
+    goes through the GeminiApiClient 'get' token bucket.
+    """
+
+    def fetch(name: str) -> ModelStatusRow:
+        try:
+            model = get_model(name)
+        except Exception as e:
+            return ModelStatusRow(name, error=str(e))
+        state = getattr(model.state, 'name', str(model.state))
+        return ModelStatusRow(name, state=state, create_time=getattr(model, 'create_time', None))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(fetch, model_names))
+    return StatusSweep(rows, time.monotonic() - start)
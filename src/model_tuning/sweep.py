@@ -0,0 +1,193 @@
+import itertools
+import json
+import logging
+import math
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.model_tuning.model_tuner import TuningDataset
+from src.model_tuning.tuning_orchestrator import TuningJob, TuningJobSpec, TuningOrchestrator
+
+# tune_model arguments a sweep can vary
+HYPERPARAMETERS = ('source_model', 'epoch_count', 'batch_size', 'learning_rate')
+
+Trial = Dict[str, Any]
+
+
+def _check_names(space: Dict[str, Any]) -> None:
+    unknown = sorted(set(space) - set(HYPERPARAMETERS))
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters {unknown}; expected some of {list(HYPERPARAMETERS)}")
+
+
+def _is_range(values: Any) -> bool:
+    return isinstance(values, dict) and 'min' in values and 'max' in values
+
+
+def grid(space: Dict[str, List[Any]]) -> List[Trial]:
+    """Every combination of the listed values, e.g. {"epoch_count": [3, 5], "learning_rate": [0.001, 0.0001]}."""
+    _check_names(space)
+    for name, values in space.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"Grid values for {name} must be a non-empty list")
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space: Dict[str, Any], trials: int, seed: int = 0) -> List[Trial]:
+    """
+    Draw trials settings from a search space.
+
+    A list is a set of choices. A {"min": ..., "max": ...} range is sampled
+    uniformly, as integers if both ends are integers, and log-uniformly with
+    "log": true (the usual choice for learning rates).
+    """
+    _check_names(space)
+    rng = random.Random(seed)
+    drawn = []
+    for _ in range(trials):
+        trial = {}
+        for name, values in space.items():
+            if _is_range(values):
+                low, high = values['min'], values['max']
+                if values.get('log'):
+                    trial[name] = math.exp(rng.uniform(math.log(low), math.log(high)))
+                elif isinstance(low, int) and isinstance(high, int):
+                    trial[name] = rng.randint(low, high)
+                else:
+                    trial[name] = rng.uniform(low, high)
+            elif isinstance(values, list) and values:
+                trial[name] = rng.choice(values)
+            else:
+                raise ValueError(f"Search space for {name} must be a non-empty list or a min/max range")
+        drawn.append(trial)
+    return drawn
+
+
+def load_sweep_spec(path: str) -> List[Trial]:
+    """
+    Read the trials of a sweep from a JSON file.
+
+    The file holds either {"grid": {...}} or {"random": {...}, "trials": 8, "seed": 0}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if 'grid' in spec:
+        return grid(spec['grid'])
+    if 'random' in spec:
+        return random_search(spec['random'], spec.get('trials', 8), spec.get('seed', 0))
+    raise ValueError(f"Sweep spec {path} must have a 'grid' or a 'random' search space")
+
+
+def _snapshot(snapshot: Any) -> Dict[str, Any]:
+    """Loss and epoch of a tuning snapshot: a dict once the SDK has decoded the tuned model, else a proto."""
+    if isinstance(snapshot, dict):
+        return snapshot
+    return {"mean_loss": snapshot.mean_loss, "epoch": snapshot.epoch}
+
+
+class SweepReport:
+    """Final state and loss of every trial of a sweep, best first."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        # Succeeded trials by final loss, then failed ones
+        self.rows = sorted(rows, key=lambda row: (row['state'] != 'ACTIVE', row['final_loss'] is None,
+                                                  row['final_loss'] or 0.0, row['name']))
+
+    @property
+    def best(self) -> Optional[Dict[str, Any]]:
+        if self.rows and self.rows[0]['state'] == 'ACTIVE':
+            return self.rows[0]
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"best": self.best, "trials": self.rows}
+
+    def write_json(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def format_table(self) -> str:
+        """Plain text comparison of the trials."""
+        names = [name for name in HYPERPARAMETERS if any(name in row['params'] for row in self.rows)]
+        header = ['name', *names, 'state', 'final_loss', 'minutes', 'tuned_model']
+        lines = [header]
+        for row in self.rows:
+            loss = f"{row['final_loss']:.4f}" if row['final_loss'] is not None else '-'
+            minutes = f"{row['duration_seconds'] / 60:.1f}" if row['duration_seconds'] is not None else '-'
+            lines.append([row['name'], *(str(row['params'].get(name, '-')) for name in names), row['state'],
+                          loss, minutes, row['tuned_model'] or row['error'] or '-'])
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in lines)
+
+
+class HyperparameterSweep:
+    """
+    Tune one prepared dataset with many hyperparameter settings and compare the results.
+
+    The data is converted to the API format once and shared by every job. Jobs
+    run through a TuningOrchestrator with at most max_concurrency in flight;
+    with a quota of concurrent tuning jobs, jobs already running in the tuner's
+    job registry count against it, and a used up quota fails the sweep before
+    anything is submitted.
+    """
+
+    def __init__(self, tuner, max_concurrency: int = 4, quota: Optional[int] = None, name_prefix: str = 'sweep',
+                 **orchestrator_options: Any):
+        self.tuner = tuner
+        self.max_concurrency = max_concurrency
+        self.quota = quota
+        self.name_prefix = name_prefix
+        self.orchestrator_options = orchestrator_options
+        self.logger = logging.getLogger(__name__)
+
+    def concurrency(self) -> int:
+        """How many sweep jobs may run at once, given the quota and jobs already running; 0 if it is used up."""
+        limit = max(1, self.max_concurrency)
+        if self.quota is not None:
+            # Registry rows of jobs whose run was killed stay in flight until checked with the service
+            running = len(self.tuner.refresh_in_flight()) if hasattr(self.tuner, 'refresh_in_flight') else 0
+            limit = min(limit, self.quota - running)
+        return max(0, limit)
+
+    def run(self, tuning_data: Union[Iterable[GeminiFinetuningData], TuningDataset],
+            trials: List[Trial]) -> SweepReport:
+        """Submit one tuning job per trial, wait for all of them and report the outcome."""
+        for trial in trials:
+            _check_names(trial)
+        dataset = tuning_data if isinstance(tuning_data, TuningDataset) else TuningDataset(tuning_data)
+        specs = [TuningJobSpec(dataset, name=f"{self.name_prefix}-{index}", **trial)
+                 for index, trial in enumerate(trials, 1)]
+        concurrency = self.concurrency()
+        if not concurrency:
+            raise RuntimeError(f"The quota of {self.quota} concurrent tuning jobs is used up by jobs already "
+                               f"running; wait for them to finish (e.g. with --resume) before sweeping")
+        self.logger.info(f"Sweeping {len(specs)} trials over {len(dataset)} examples, {concurrency} at a time")
+        orchestrator = TuningOrchestrator(self.tuner, max_concurrency=concurrency, **self.orchestrator_options)
+        report = SweepReport([self._row(job) for job in orchestrator.run_sync(specs)])
+        if report.best is not None:
+            self.logger.info(f"Best trial {report.best['name']}: {report.best['params']}")
+        return report
+
+    @staticmethod
+    def _row(job: TuningJob) -> Dict[str, Any]:
+        snapshots = getattr(getattr(job.result, 'tuning_task', None), 'snapshots', None)
+        last = _snapshot(snapshots[-1]) if snapshots else {}
+        tuned_model = getattr(job.result, 'name', None)
+        if tuned_model is None and job.operation is not None:
+            tuned_model = getattr(job.operation.metadata, 'tuned_model', None)
+        return {
+            "name": job.spec.name,
+            "params": job.spec.options,
+            "state": 'ACTIVE' if job.succeeded else 'FAILED',
+            "tuned_model": tuned_model,
+            "final_loss": last.get('mean_loss'),
+            "epochs": last.get('epoch'),
+            "duration_seconds": job.duration,
+            "polls": job.polls,
+            "error": str(job.error) if job.error is not None else None,
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
+
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.model_tuning.polling import poll_intervals
+
+if TYPE_CHECKING:
+    # model_tuner imports the Gemini SDK, which the orchestrator does not need at runtime
+    from src.model_tuning.model_tuner import TuningDataset
+
+
+class TuningJobSpec:
+    """A tuning job to submit: the training data, a display name and extra tune_model arguments."""
+
+    def __init__(self, tuning_data: Union[Iterable[GeminiFinetuningData], 'TuningDataset'], name: Optional[str] = None,
+                 **options: Any):
+        self.tuning_data = tuning_data
+        self.name = name
+        self.options = options
+
+
+class TuningJob:
+    """State of one submitted tuning job as tracked by the orchestrator."""
+
+    def __init__(self, spec: TuningJobSpec):
+        self.spec = spec
+        # The SDK's long-running operation and the tuned model it produced
+        self.operation: Any = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.polls = 0
+        self.submitted_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+
+    @property
+    def name(self) -> Optional[str]:
+        if self.operation is not None:
+            return self.operation.name
+        return self.spec.name
+
+    @property
+    def succeeded(self) -> bool:
+        return self.completed_at is not None and self.error is None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.submitted_at is None or self.completed_at is None:
+            return None
+        return self.completed_at - self.submitted_at
+
+
+CompletionCallback = Callable[[TuningJob], Union[None, Awaitable[None]]]
+
+
+class TuningOrchestrator:
+    """
+    Submit many tuning jobs concurrently and wait on all of them from one event loop.
+
+    At most max_concurrency jobs are in flight at a time. Each outstanding operation
+    is polled on its own schedule: quickly at first, then with exponential backoff
+    and jitter. The blocking SDK calls run in the loop's default executor.
+    """
+
+    def __init__(self, tuner, max_concurrency: int = 4, initial_poll_interval: float = 5.0,
+                 max_poll_interval: float = 300.0, backoff_factor: float = 2.0, jitter: float = 0.2,
+                 on_complete: Optional[CompletionCallback] = None):
+        self.tuner = tuner
+        self.max_concurrency = max_concurrency
+        self.initial_poll_interval = initial_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.on_complete = on_complete
+        self.logger = logging.getLogger(__name__)
+
+    async def _call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+
+    async def _wait(self, job: TuningJob) -> None:
+        delays = poll_intervals(self.initial_poll_interval, self.max_poll_interval,
+                                self.backoff_factor, self.jitter)
+        while not await self._call(job.operation.done):
+            job.polls += 1
+            await asyncio.sleep(next(delays))
+        job.result = await self._call(job.operation.result)
+
+    async def _run_job(self, job: TuningJob, semaphore: asyncio.Semaphore) -> TuningJob:
+        async with semaphore:
+            job.submitted_at = time.monotonic()
+            try:
+                job.operation = await self._call(self.tuner.tune_model, job.spec.tuning_data,
+                                                 name=job.spec.name, **job.spec.options)
+                self.logger.info(f"Submitted tuning job {job.name}")
+                await self._wait(job)
+                self.logger.info(f"Tuning job {job.name} completed after {job.polls} polls")
+            except Exception as e:
+                job.error = e
+                self.logger.error(f"Tuning job {job.name} failed: {str(e)}")
+            job.completed_at = time.monotonic()
+            # Tuners with a job registry record the final state
+            record_completion = getattr(self.tuner, 'record_completion', None)
+            if job.operation is not None and record_completion is not None:
+                await self._call(record_completion, job.operation, job.error)
+
+        if self.on_complete is not None:
+            outcome = self.on_complete(job)
+            if inspect.isawaitable(outcome):
+                await outcome
+        return job
+
+    async def run(self, specs: Iterable[TuningJobSpec]) -> AsyncIterator[TuningJob]:
+        """Submit every job and yield each one as soon as it completes or fails."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [asyncio.ensure_future(self._run_job(TuningJob(spec), semaphore)) for spec in specs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_all(self, specs: Iterable[TuningJobSpec]) -> List[TuningJob]:
+        """Submit every job and return them all, in completion order, once none is outstanding."""
+        return [job async for job in self.run(specs)]
+
+    def run_sync(self, specs: Iterable[TuningJobSpec]) -> List[TuningJob]:
+        """Blocking wrapper around run_all for callers without an event loop."""
+        return asyncio.run(self.run_all(specs))
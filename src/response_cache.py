@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_PATH = os.path.join('.cache', 'responses.sqlite3')
+DEFAULT_MAX_ENTRIES = 1_000_000
+# Evict at most once every this many writes to keep puts cheap
+_EVICT_EVERY = 1000
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of model responses.
+
+    Entries are keyed by model name, formatted prompt and generation parameters, and
+    evicted least-recently-used once the cache exceeds max_entries or max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                 max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model_name TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @staticmethod
+    def key(model_name: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key for a request."""
+        payload = json.dumps([model_name, prompt, generation_config or {}], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model_name: str, response: str) -> None:
+        """Store a response and periodically evict old entries beyond the size limits."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model_name, response, size, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, len(response.encode('utf-8')), now, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits its limits."""
+        with self._lock, self._conn:
+            self._evict()
+
+    def _evict(self) -> None:
+        count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        excess = 0
+        if self.max_entries is not None and count > self.max_entries:
+            excess = count - self.max_entries
+        if self.max_bytes is not None and total_bytes > self.max_bytes:
+            # Walk from the oldest entry until enough bytes are freed
+            freed = 0
+            for removed, (size,) in enumerate(
+                    self._conn.execute("SELECT size FROM responses ORDER BY last_used"), 1):
+                freed += size
+                if total_bytes - freed <= self.max_bytes:
+                    excess = max(excess, removed)
+                    break
+        if excess:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.logger.info(f"Evicted {excess} cached responses")
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
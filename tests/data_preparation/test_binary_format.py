@@ -0,0 +1,51 @@
+import json
+import pytest
+from src.data_preparation.binary_format import HEADER, PreparedDataWriter, open_prepared_dataset
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import InvalidDataFormatError
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+
+
+class TestBinaryFormat:
+    @pytest.fixture
+    def records(self):
+        return [GeminiFinetuningData(text_input=f"<input>\n{idx} ünïcode\n</input>", output="ok" * idx) for idx in range(7)]
+
+    def test_round_trip(self, tmp_path, records):
+        path = str(tmp_path / "data.gftd")
+        with PreparedDataWriter(path) as writer:
+            assert writer.write_all(records) == 7
+
+        dataset = open_prepared_dataset(path)
+        assert len(dataset) == 7
+        assert [(d.text_input, d.output) for d in dataset] == [(r.text_input, r.output) for r in records]
+        assert dataset.to_gemini_format()[3] == GeminiFinetuningData.to_gemini_format(records[3])
+        assert [d.output for d in dataset[5:]] == ["ok" * 5, "ok" * 6]
+
+    def test_empty_dataset(self, tmp_path):
+        path = str(tmp_path / "empty.gftd")
+        with PreparedDataWriter(path):
+            pass
+        assert len(open_prepared_dataset(path)) == 0
+
+    def test_failed_write_leaves_no_file(self, tmp_path, records):
+        path = tmp_path / "data.gftd"
+        with pytest.raises(RuntimeError):
+            with PreparedDataWriter(str(path)) as writer:
+                writer.write(records[0])
+                raise RuntimeError("interrupted")
+        assert list(tmp_path.iterdir()) == []
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "data.jsonl"
+        path.write_bytes(b"x" * HEADER.size)
+        with pytest.raises(InvalidDataFormatError):
+            open_prepared_dataset(str(path))
+
+    def test_write_prepared(self, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        data_file.write_text(json.dumps(
+            {"messages": [{"role": "user", "content": "Hello!"}, {"role": "assistant", "content": "Hi there!"}]}) + '\n')
+        output_path = str(tmp_path / "data.gftd")
+        assert DataPreparator(str(data_file)).write_prepared(output_path) == 1
+        assert open_prepared_dataset(output_path)[0].output == "Hi there!"
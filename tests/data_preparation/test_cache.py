@@ -0,0 +1,97 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from src.data_preparation.cache import PreparedDataCache
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import ErrorRateExceededError
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.data_preparation.quarantine import Quarantine
+
+
+class TestPreparedDataCache:
+    @pytest.fixture
+    def data_file(self, tmp_path):
+        file_path = tmp_path / "data.jsonl"
+        with open(file_path, 'w') as f:
+            json.dump({"messages": [{"role": "user", "content": "Hello!"}, {"role": "assistant", "content": "Hi there!"}]}, f)
+            f.write('\n')
+        return str(file_path)
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return PreparedDataCache(str(tmp_path / "cache"))
+
+    def test_second_prepare_is_served_from_cache(self, data_file, cache):
+        first = DataPreparator(data_file, cache=cache).prepare_data()
+
+        preparator = DataPreparator(data_file, cache=cache)
+        with patch.object(DataPreparator, 'iter_prepared', side_effect=AssertionError("cache miss")):
+            second = preparator.prepare_data()
+
+        assert [(d.text_input, d.output) for d in second] == [(d.text_input, d.output) for d in first]
+        assert all(isinstance(item, GeminiFinetuningData) for item in second)
+
+    def test_cache_hit_reports_statistics(self, data_file, cache, capsys):
+        DataPreparator(data_file, cache=cache).prepare_data()
+        printed = capsys.readouterr().out.splitlines()[-1]
+        with patch.object(DataPreparator, 'iter_prepared', side_effect=AssertionError("cache miss")):
+            DataPreparator(data_file, cache=cache).prepare_data()
+        assert capsys.readouterr().out.splitlines()[-1] == printed
+        assert json.loads(printed)["count"] == 1
+
+    def test_cache_hit_restores_quarantine_and_summary(self, data_file, cache, tmp_path):
+        with open(data_file, 'a') as f:
+            f.write('not json\n')
+        quarantine_file = tmp_path / "rejected.jsonl"
+        first = DataPreparator(data_file, cache=cache, quarantine=Quarantine(str(quarantine_file)))
+        first.prepare_data()
+        rejected = quarantine_file.read_text()
+        assert len(rejected.splitlines()) == 1
+
+        # A leftover file from some other run is replaced by this data's rejected lines
+        quarantine_file.write_text('{"line_number": 99}\n')
+        preparator = DataPreparator(data_file, cache=cache, quarantine=Quarantine(str(quarantine_file)))
+        with patch.object(DataPreparator, 'iter_prepared', side_effect=AssertionError("cache miss")):
+            assert len(preparator.prepare_data()) == 1
+        assert quarantine_file.read_text() == rejected
+        assert preparator.summary() == first.summary()
+        assert preparator.summary()["validation"]["rejected"] == 1
+
+        strict = DataPreparator(data_file, cache=cache, quarantine=Quarantine(str(quarantine_file), max_error_rate=0.1))
+        with pytest.raises(ErrorRateExceededError):
+            strict.prepare_data()
+
+    def test_key_changes_with_file_content(self, data_file, cache):
+        preparator = DataPreparator(data_file, cache=cache)
+        key = cache.key_for(preparator)
+        with open(data_file, 'a') as f:
+            f.write(json.dumps({"messages": [{"role": "user", "content": "Bye"}, {"role": "assistant", "content": "Bye!"}]}) + '\n')
+        assert cache.key_for(preparator) != key
+
+    def test_key_changes_with_preparator_code(self, data_file, cache):
+        class StrictPreparator(DataPreparator):
+            def validate_openai_chat_format(self, data):
+                return super().validate_openai_chat_format(data) and len(data["messages"]) > 1
+
+        assert cache.key_for(StrictPreparator(data_file)) != cache.key_for(DataPreparator(data_file))
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = PreparedDataCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+        records = [GeminiFinetuningData(text_input="x" * 1000, output="y")]
+        cache.put("old", records)
+        cache.put("new", records)
+        os.utime(cache._entry_path("old"), (0, 0))
+
+        entry_size = os.path.getsize(cache._entry_path("new"))
+        cache.max_bytes = entry_size + 1
+        cache.evict()
+
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
+
+    def test_clear(self, data_file, cache):
+        DataPreparator(data_file, cache=cache).prepare_data()
+        assert os.listdir(cache.cache_dir)
+        cache.clear()
+        assert cache.get(cache.key_for(DataPreparator(data_file))) is None
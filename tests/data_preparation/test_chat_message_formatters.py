@@ -0,0 +1,81 @@
+import pytest
+from src.data_preparation.chat_message_formatters import ChatFormatter, OpenAIChatFormat
+from src.data_preparation.data_preparator import DataPreparator
+
+
+CONVERSATION = OpenAIChatFormat(messages=[
+    {"role": "system", "content": "You are a math tutor."},
+    {"role": "user", "content": "What's 2 + 2?"},
+    {"role": "assistant", "content": "4."},
+    {"role": "user", "content": "And doubled?"},
+    {"role": "assistant", "content": "8."},
+])
+
+
+class TestChatFormatter:
+    def test_last_turn_matches_legacy_format(self):
+        text_input, output = ChatFormatter().format(CONVERSATION)
+        assert text_input == "<instructions>\nYou are a math tutor.</instructions>\n\n<input>\nAnd doubled?\n</input>"
+        assert output == "8."
+        assert OpenAIChatFormat.format_input(CONVERSATION) == text_input
+        assert OpenAIChatFormat.format_output(CONVERSATION) == output
+
+    def test_history_keeps_earlier_turns(self):
+        text_input, output = ChatFormatter('history').format(CONVERSATION)
+        assert text_input == (
+            "<instructions>\nYou are a math tutor.</instructions>\n\n"
+            "<history>\n<user>\nWhat's 2 + 2?\n</user>\n<assistant>\n4.\n</assistant>\n</history>\n\n"
+            "<input>\nAnd doubled?\n</input>"
+        )
+        assert output == "8."
+
+    def test_history_ignores_trailing_user_message(self):
+        data = OpenAIChatFormat(messages=CONVERSATION["messages"] + [{"role": "user", "content": "Thanks"}])
+        assert ChatFormatter('history').format(data) == ChatFormatter('history').format(CONVERSATION)
+
+    def test_single_turn_has_no_history_block(self):
+        data = OpenAIChatFormat(messages=[{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}])
+        assert ChatFormatter('history').format(data) == ("<input>\nHi\n</input>", "Hello")
+
+    def test_format_input_needs_no_reply(self):
+        prompt = OpenAIChatFormat(messages=[{"role": "user", "content": "hi"}])
+        assert OpenAIChatFormat.format_input(prompt) == "<input>\nhi\n</input>"
+        with pytest.raises(ValueError, match="Assistant message"):
+            OpenAIChatFormat.format_output(prompt)
+        with pytest.raises(ValueError, match="User message"):
+            OpenAIChatFormat.format_input(OpenAIChatFormat(messages=[{"role": "system", "content": "Be brief."}]))
+
+        follow_up = OpenAIChatFormat(messages=CONVERSATION["messages"] + [{"role": "user", "content": "Thanks"}])
+        assert ChatFormatter('history').format_input(follow_up).endswith(
+            "<assistant>\n8.\n</assistant>\n</history>\n\n<input>\nThanks\n</input>")
+
+    def test_custom_templates(self):
+        formatter = ChatFormatter(system_template="[{content}] ", user_template="Q: {content} {{literal}}",
+                                  output_template="A: {content}")
+        assert formatter.format(CONVERSATION) == ("[You are a math tutor.] Q: And doubled? {literal}", "A: 8.")
+        with pytest.raises(ValueError):
+            ChatFormatter(user_template="no placeholder")
+        with pytest.raises(ValueError):
+            ChatFormatter(strategy="everything")
+
+    def test_missing_roles(self):
+        with pytest.raises(ValueError, match="User message"):
+            ChatFormatter().format(OpenAIChatFormat(messages=[{"role": "assistant", "content": "Hi"}]))
+        with pytest.raises(ValueError, match="Assistant message"):
+            ChatFormatter().format(OpenAIChatFormat(messages=[{"role": "user", "content": "Hi"}]))
+
+    def test_format_batch(self):
+        records = [CONVERSATION] * 3
+        assert ChatFormatter('history').format_batch(records) == [ChatFormatter('history').format(CONVERSATION)] * 3
+
+    def test_preparator_uses_formatter(self, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        data_file.write_text(
+            '{"messages": [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}, '
+            '{"role": "user", "content": "c"}, {"role": "assistant", "content": "d"}]}\n'
+        )
+        last_turn = DataPreparator(str(data_file))
+        history = DataPreparator(str(data_file), formatter=ChatFormatter('history'))
+        assert last_turn.prepare_data()[0].text_input == "<input>\nc\n</input>"
+        assert history.prepare_data()[0].text_input.startswith("<history>\n<user>\na\n</user>")
+        assert last_turn.pipeline_config() != history.pipeline_config()
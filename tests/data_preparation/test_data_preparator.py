@@ -130,6 +130,25 @@ class TestDataPreparator:
         with pytest.raises(InvalidDataFormatError):
             preparator.prepare_data()
 
+    def test_iter_prepared_is_lazy(self, valid_jsonl_file):
+        preparator = DataPreparator(valid_jsonl_file)
+        stream = preparator.iter_prepared()
+        first = next(stream)
+        assert isinstance(first, GeminiFinetuningData)
+        assert first.output == "Hi there!"
+        assert [item.output for item in stream] == ["I'm doing well, thank you!"]
+
+    def test_iter_prepared_yields_valid_records_before_error(self, tmp_path):
+        data_file = tmp_path / "partial.jsonl"
+        data_file.write_text(
+            '{"messages": [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]}\n'
+            'not json\n'
+        )
+        stream = DataPreparator(str(data_file)).iter_prepared()
+        assert next(stream).output == "Hello"
+        with pytest.raises(InvalidJSONError, match="line 2"):
+            next(stream)
+
     def test_prepare_data_with_actual_file(self, actual_jsonl_file):
         preparator = DataPreparator(actual_jsonl_file)
         result = preparator.prepare_data()
@@ -0,0 +1,89 @@
+import json
+import random
+import pytest
+from src.data_preparation.cache import PreparedDataCache
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.deduplication import CompactBandIndex, CompactHashSet, Deduplicator, lsh_parameters
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+
+
+def _text(rng, length=60):
+    return " ".join(f"word{rng.randint(0, 5000)}" for _ in range(length))
+
+
+class TestDeduplication:
+    def test_compact_hash_set(self):
+        values = random.Random(0).sample(range(1, 1 << 63), 5000)
+        index = CompactHashSet(capacity=8)
+        assert all(index.add(value) for value in values)
+        assert not index.add(values[0])
+        assert len(index) == 5000
+        assert all(value in index for value in values)
+        assert 12345 not in index
+        assert index.add(0) and 0 in index
+
+    def test_compact_band_index(self):
+        index = CompactBandIndex(capacity=8)
+        for value in range(3000):
+            index.add(value % 1000, value)
+        assert len(index) == 3000
+        assert sorted(index.get(7)) == [7, 1007, 2007]
+        assert list(index.get(5000)) == []
+
+    def test_band_collisions_are_checked_against_the_threshold(self):
+        def near_drops(shared, added):
+            deduplicator = Deduplicator(threshold=0.8, shingle_size=1)
+            for pair in range(200):
+                words = [f"w{pair}x{idx}" for idx in range(100)]
+                other = words[:shared] + [f"n{pair}x{idx}" for idx in range(added)]
+                list(deduplicator.filter([GeminiFinetuningData(" ".join(words), "o"),
+                                          GeminiFinetuningData(" ".join(other), "o")]))
+            return deduplicator.dropped["near"]
+
+        # Jaccard 0.69 pairs share LSH bands often, but only estimator noise may push one over 0.8
+        assert near_drops(82, 18) <= 10
+        # Jaccard 0.9 pairs are duplicates
+        assert near_drops(95, 5) >= 190
+
+    def test_lsh_parameters(self):
+        bands, rows = lsh_parameters(0.8, 64)
+        assert bands * rows <= 64
+        assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
+        with pytest.raises(ValueError):
+            lsh_parameters(1.5, 64)
+
+    def test_drops_exact_and_near_duplicates(self):
+        rng = random.Random(1)
+        base = _text(rng)
+        words = base.split()
+        words[-1] = "changed"
+        records = [
+            GeminiFinetuningData(text_input=base, output="answer"),
+            GeminiFinetuningData(text_input=base, output="answer"),
+            GeminiFinetuningData(text_input=" ".join(words), output="answer"),
+            GeminiFinetuningData(text_input=_text(rng), output="answer"),
+        ]
+        deduplicator = Deduplicator(threshold=0.8)
+        kept = list(deduplicator.filter(records))
+
+        assert kept == [records[0], records[3]]
+        report = deduplicator.report()
+        assert report["dropped"] == {"exact": 1, "near": 1}
+        assert report["examples"] == [{"data_point": 2, "reason": "exact"}, {"data_point": 3, "reason": "near"}]
+
+    def test_exact_only(self):
+        records = [GeminiFinetuningData(text_input="same question here", output=f"answer {idx}") for idx in range(3)]
+        kept = list(Deduplicator(near_duplicates=False).filter(records + records[:1]))
+        assert kept == records
+
+    def test_preparator_pipeline_and_cache_key(self, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        line = json.dumps({"messages": [{"role": "user", "content": "Hello!"}, {"role": "assistant", "content": "Hi!"}]})
+        data_file.write_text(f"{line}\n{line}\n")
+
+        preparator = DataPreparator(str(data_file), deduplicator=Deduplicator())
+        assert len(preparator.prepare_data()) == 1
+        assert preparator.summary()["deduplication"]["dropped"]["exact"] == 1
+
+        cache = PreparedDataCache(str(tmp_path / "cache"))
+        assert cache.key_for(preparator) != cache.key_for(DataPreparator(str(data_file)))
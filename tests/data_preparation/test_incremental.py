@@ -0,0 +1,106 @@
+import json
+import pytest
+from unittest.mock import patch
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import InvalidJSONError
+from src.data_preparation.incremental import IncrementalPreparator
+
+
+def _line(idx):
+    return json.dumps({"messages": [
+        {"role": "user", "content": f"Question {idx}"},
+        {"role": "assistant", "content": f"Answer {idx}"}
+    ]}) + '\n'
+
+
+class TestIncrementalPreparator:
+    @pytest.fixture
+    def paths(self, tmp_path):
+        source = tmp_path / "train.jsonl"
+        source.write_text("".join(_line(idx) for idx in range(3)))
+        return str(source), str(tmp_path / "prepared.jsonl")
+
+    def test_only_appended_lines_are_processed(self, paths):
+        source, output = paths
+        assert IncrementalPreparator(DataPreparator(source), output).run() == 3
+
+        with open(source, 'a') as f:
+            f.write(_line(3) + _line(4))
+
+        preparator = DataPreparator(source)
+        with patch.object(preparator, 'parse_line', wraps=preparator.parse_line) as parse_line:
+            incremental = IncrementalPreparator(preparator, output)
+            assert incremental.run() == 2
+        assert [call.args[1] for call in parse_line.call_args_list] == [4, 5]
+
+        assert [item.output for item in incremental.load_output()] == [f"Answer {idx}" for idx in range(5)]
+        checkpoint = incremental.load_checkpoint()
+        assert checkpoint['line_count'] == 5
+        assert checkpoint['record_count'] == 5
+
+    def test_changed_prefix_triggers_rebuild(self, paths):
+        source, output = paths
+        IncrementalPreparator(DataPreparator(source), output).run()
+
+        with open(source, 'w') as f:
+            f.write(_line(10) + _line(11))
+
+        incremental = IncrementalPreparator(DataPreparator(source), output)
+        assert incremental.run() == 2
+        assert [item.output for item in incremental.load_output()] == ["Answer 10", "Answer 11"]
+
+    def test_unterminated_line_is_deferred(self, paths):
+        source, output = paths
+        with open(source, 'a') as f:
+            f.write(_line(3).rstrip('\n')[:-3])
+
+        incremental = IncrementalPreparator(DataPreparator(source), output)
+        assert incremental.run() == 3
+
+        with open(source, 'a') as f:
+            f.write(_line(3).rstrip('\n')[-3:] + '\n')
+        assert incremental.run() == 1
+        assert len(incremental.load_output()) == 4
+
+    def test_unterminated_last_line_is_prepared_and_revalidated(self, paths):
+        source, output = paths
+        with open(source, 'a') as f:
+            f.write(_line(3).rstrip('\n'))
+
+        incremental = IncrementalPreparator(DataPreparator(source), output)
+        assert incremental.run() == 4
+        checkpoint = incremental.load_checkpoint()
+        assert (checkpoint['line_count'], checkpoint['record_count'], checkpoint['tail_records']) == (3, 4, 1)
+
+        with open(source, 'a') as f:
+            f.write('\n' + _line(4))
+        assert incremental.run() == 1
+        assert [item.output for item in incremental.load_output()] == [f"Answer {idx}" for idx in range(5)]
+        assert incremental.load_checkpoint()['tail_bytes'] == 0
+
+    def test_file_without_trailing_newline(self, tmp_path):
+        source, output = tmp_path / "train.jsonl", str(tmp_path / "prepared.jsonl")
+        source.write_text(_line(0).rstrip('\n'))
+        assert IncrementalPreparator(DataPreparator(str(source)), output).run() == 1
+
+        source.write_text("".join(_line(idx) for idx in range(50)).rstrip('\n'))
+        incremental = IncrementalPreparator(DataPreparator(str(source)), str(tmp_path / "fifty.jsonl"))
+        assert incremental.run() == 50
+        assert incremental.run() == 0
+        assert len(incremental.load_output()) == 50
+
+    def test_failed_run_does_not_advance_checkpoint(self, paths):
+        source, output = paths
+        incremental = IncrementalPreparator(DataPreparator(source), output)
+        incremental.run()
+
+        with open(source, 'a') as f:
+            f.write(_line(3) + 'not json\n')
+        with pytest.raises(InvalidJSONError, match="line 5"):
+            incremental.run()
+        assert incremental.load_checkpoint()['line_count'] == 3
+
+        with open(source, 'w') as f:
+            f.write("".join(_line(idx) for idx in range(5)))
+        assert incremental.run() == 2
+        assert [item.output for item in incremental.load_output()] == [f"Answer {idx}" for idx in range(5)]
@@ -0,0 +1,63 @@
+import json
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import InvalidDataFormatError, InvalidJSONError
+from src.data_preparation.parallel import read_chunk_lines, split_into_chunks
+
+
+def _conversation(idx):
+    return {"messages": [
+        {"role": "system", "content": f"System {idx}"},
+        {"role": "user", "content": f"Question {idx}"},
+        {"role": "assistant", "content": f"Answer {idx}"}
+    ]}
+
+
+class TestParallelPreparation:
+    @pytest.fixture
+    def large_jsonl_file(self, tmp_path):
+        file_path = tmp_path / "large.jsonl"
+        with open(file_path, 'w') as f:
+            for idx in range(200):
+                json.dump(_conversation(idx), f)
+                f.write('\n')
+        return str(file_path)
+
+    def test_split_into_chunks_aligns_to_lines(self, large_jsonl_file):
+        chunks = split_into_chunks(large_jsonl_file, chunk_size=1000)
+        assert len(chunks) > 1
+        assert chunks[0][0] == 0
+        for (_, end), (next_start, _) in zip(chunks, chunks[1:]):
+            assert end == next_start
+        lines = [line for start, end in chunks for line in read_chunk_lines(large_jsonl_file, start, end)]
+        assert len(lines) == 200
+        assert all(json.loads(line) for line in lines)
+
+    def test_parallel_matches_serial(self, large_jsonl_file):
+        serial = DataPreparator(large_jsonl_file).prepare_data()
+        parallel = DataPreparator(large_jsonl_file, workers=2, chunk_size=1000).prepare_data()
+        assert [(d.text_input, d.output) for d in parallel] == [(d.text_input, d.output) for d in serial]
+
+    def test_parallel_reports_file_line_numbers(self, large_jsonl_file):
+        with open(large_jsonl_file) as f:
+            lines = f.readlines()
+        lines[150] = 'not json\n'
+        lines[170] = json.dumps({"invalid": "data"}) + '\n'
+        with open(large_jsonl_file, 'w') as f:
+            f.writelines(lines)
+
+        preparator = DataPreparator(large_jsonl_file, workers=2, chunk_size=1000)
+        with pytest.raises(InvalidJSONError, match="line 151$"):
+            preparator.prepare_data()
+
+        lines[150] = json.dumps(_conversation(150)) + '\n'
+        with open(large_jsonl_file, 'w') as f:
+            f.writelines(lines)
+        with pytest.raises(InvalidDataFormatError, match="line 171$"):
+            preparator.prepare_data()
+
+    def test_parallel_empty_file(self, tmp_path):
+        empty_file = tmp_path / "empty.jsonl"
+        empty_file.write_text("")
+        with pytest.raises(InvalidDataFormatError):
+            DataPreparator(str(empty_file), workers=2).prepare_data()
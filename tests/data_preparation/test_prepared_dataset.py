@@ -0,0 +1,52 @@
+import json
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.data_preparation.prepared_dataset import PreparedDataset
+
+
+class TestPreparedDataset:
+    @pytest.fixture
+    def records(self):
+        return [GeminiFinetuningData(text_input=f"input {idx} é", output=f"output {idx} ✓") for idx in range(10)]
+
+    @pytest.fixture
+    def dataset(self, records):
+        return PreparedDataset.from_records(records)
+
+    def test_slots_record_has_no_dict(self):
+        assert not hasattr(GeminiFinetuningData(text_input="a", output="b"), '__dict__')
+
+    def test_len_indexing_and_iteration(self, dataset, records):
+        assert len(dataset) == 10
+        assert dataset[3].text_input == "input 3 é"
+        assert dataset[-1].output == "output 9 ✓"
+        assert [(d.text_input, d.output) for d in dataset] == [(r.text_input, r.output) for r in records]
+        with pytest.raises(IndexError):
+            dataset[10]
+
+    def test_slicing_returns_view(self, dataset):
+        view = dataset[2:8:2]
+        assert isinstance(view, PreparedDataset)
+        assert [d.output for d in view] == ["output 2 ✓", "output 4 ✓", "output 6 ✓"]
+        assert view[1:][0].text_input == "input 4 é"
+
+    def test_shuffled_is_a_deterministic_permutation(self, dataset):
+        shuffled = dataset.shuffled(seed=42)
+        assert sorted(d.text_input for d in shuffled) == sorted(d.text_input for d in dataset)
+        assert [d.text_input for d in shuffled] == [d.text_input for d in dataset.shuffled(seed=42)]
+        assert [d.output for d in dataset.take([5, 0])] == ["output 5 ✓", "output 0 ✓"]
+
+    def test_to_gemini_format_view(self, dataset):
+        view = dataset.to_gemini_format()
+        assert len(view) == 10
+        assert view[0] == {"text_input": "input 0 é", "output": "output 0 ✓"}
+        assert list(view[8:]) == [GeminiFinetuningData.to_gemini_format(dataset[idx]) for idx in (8, 9)]
+
+    def test_prepare_dataset(self, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        data_file.write_text(json.dumps(
+            {"messages": [{"role": "user", "content": "Hello!"}, {"role": "assistant", "content": "Hi there!"}]}) + '\n')
+        dataset = DataPreparator(str(data_file)).prepare_dataset()
+        assert len(dataset) == 1
+        assert dataset[0].output == "Hi there!"
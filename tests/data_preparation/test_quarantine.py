@@ -0,0 +1,84 @@
+import json
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import ErrorRateExceededError, InvalidJSONError
+from src.data_preparation.incremental import IncrementalPreparator
+from src.data_preparation.quarantine import Quarantine
+
+VALID = '{"messages": [{"role": "user", "content": "Q%d"}, {"role": "assistant", "content": "A%d"}]}\n'
+
+
+def write_lines(path, lines):
+    path.write_text("".join(lines))
+    return str(path)
+
+
+def mixed_lines(count, bad_every):
+    lines = []
+    for idx in range(1, count + 1):
+        if idx % bad_every == 0:
+            lines.append('not json\n' if idx % (2 * bad_every) else '{"messages": [{"role": "user", "content": "x"}]}\n')
+        else:
+            lines.append(VALID % (idx, idx))
+    return lines
+
+
+class TestQuarantine:
+    def test_collects_every_error_in_one_pass(self, tmp_path):
+        data_file = write_lines(tmp_path / "data.jsonl", mixed_lines(20, 5))
+        quarantine_file = tmp_path / "rejected.jsonl"
+        preparator = DataPreparator(data_file, quarantine=Quarantine(str(quarantine_file)))
+
+        records = preparator.prepare_data()
+        assert [record.output for record in records[:4]] == ["A1", "A2", "A3", "A4"]
+        assert len(records) == 16
+
+        rejected = [json.loads(line) for line in quarantine_file.read_text().splitlines()]
+        assert [row["line_number"] for row in rejected] == [5, 10, 15, 20]
+        assert rejected[0] == {"line_number": 5, "error_type": "InvalidJSONError",
+                               "reason": "Invalid JSON in line 5", "line": "not json"}
+        assert rejected[1]["error_type"] == "ValueError"
+
+        report = preparator.summary()["validation"]
+        assert report["lines"] == 20
+        assert report["rejected"] == 4
+        assert report["error_rate"] == 0.2
+        assert report["by_type"] == {"InvalidJSONError": 2, "ValueError": 2}
+
+    def test_parallel_matches_single_process(self, tmp_path):
+        data_file = write_lines(tmp_path / "data.jsonl", mixed_lines(200, 7))
+        single = Quarantine(str(tmp_path / "single.jsonl"))
+        parallel = Quarantine(str(tmp_path / "parallel.jsonl"))
+        expected = DataPreparator(data_file, quarantine=single).prepare_data()
+        actual = DataPreparator(data_file, workers=2, chunk_size=512, quarantine=parallel).prepare_data()
+
+        assert [r.output for r in actual] == [r.output for r in expected]
+        assert (tmp_path / "parallel.jsonl").read_text() == (tmp_path / "single.jsonl").read_text()
+        assert parallel.report()["rejected"] == single.report()["rejected"] == 28
+
+    def test_max_error_rate_aborts_early(self, tmp_path):
+        data_file = write_lines(tmp_path / "data.jsonl", mixed_lines(100, 2))
+        quarantine = Quarantine(str(tmp_path / "rejected.jsonl"), max_error_rate=0.1, min_lines=10)
+        stream = DataPreparator(data_file, quarantine=quarantine).iter_prepared()
+        with pytest.raises(ErrorRateExceededError):
+            list(stream)
+        assert quarantine.lines < 20
+
+    def test_error_rate_is_checked_at_end_of_small_files(self, tmp_path):
+        data_file = write_lines(tmp_path / "data.jsonl", mixed_lines(10, 2))
+        with pytest.raises(ErrorRateExceededError):
+            DataPreparator(data_file, quarantine=Quarantine(max_error_rate=0.25)).prepare_data()
+
+    def test_strict_mode_still_raises(self, tmp_path):
+        data_file = write_lines(tmp_path / "data.jsonl", mixed_lines(10, 5))
+        with pytest.raises(InvalidJSONError, match="line 5"):
+            DataPreparator(data_file).prepare_data()
+
+    def test_incremental(self, tmp_path):
+        data_path = tmp_path / "data.jsonl"
+        write_lines(data_path, mixed_lines(10, 5))
+        quarantine_file = tmp_path / "rejected.jsonl"
+        preparator = DataPreparator(str(data_path), quarantine=Quarantine(str(quarantine_file)))
+        incremental = IncrementalPreparator(preparator, str(tmp_path / "prepared.jsonl"))
+        assert incremental.run() == 8
+        assert [json.loads(line)["line_number"] for line in quarantine_file.read_text().splitlines()] == [5, 10]
@@ -0,0 +1,86 @@
+import gzip
+import pytest
+from src.data_preparation.cache import PreparedDataCache
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import InvalidJSONError
+from src.data_preparation.incremental import IncrementalPreparator
+from src.data_preparation.quarantine import Quarantine
+from src.data_preparation.sources import ShardReader, resolve_sources
+
+RECORD = '{"messages": [{"role": "user", "content": "Q%s"}, {"role": "assistant", "content": "A%s"}]}\n'
+
+
+def write_shard(path, labels, compress=True):
+    text = "".join(RECORD % (label, label) for label in labels)
+    if compress:
+        with gzip.open(path, 'wt') as f:
+            f.write(text)
+    else:
+        path.write_text(text)
+    return str(path)
+
+
+class TestSources:
+    @pytest.fixture
+    def shard_dir(self, tmp_path):
+        write_shard(tmp_path / "part-000.jsonl.gz", range(0, 500))
+        write_shard(tmp_path / "part-001.jsonl", range(500, 700), compress=False)
+        write_shard(tmp_path / "part-002.jsonl.gz", range(700, 1000))
+        (tmp_path / "README.txt").write_text("not data")
+        return tmp_path
+
+    def test_resolve_sources(self, shard_dir):
+        names = ["part-000.jsonl.gz", "part-001.jsonl", "part-002.jsonl.gz"]
+        assert resolve_sources(str(shard_dir)) == [str(shard_dir / name) for name in names]
+        assert resolve_sources(str(shard_dir / "*.gz")) == [str(shard_dir / names[0]), str(shard_dir / names[2])]
+        assert resolve_sources([str(shard_dir / names[1])]) == [str(shard_dir / names[1])]
+        with pytest.raises(FileNotFoundError):
+            resolve_sources(str(shard_dir / "*.zst"))
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_shard_reader_keeps_order_and_shard_line_numbers(self, shard_dir, workers):
+        reader = ShardReader(resolve_sources(str(shard_dir)), workers=workers, block_size=4096, max_buffered_blocks=2)
+        lines = list(reader)
+        assert len(lines) == 1000
+        assert lines[0][1:] == (1, (RECORD % (0, 0)).rstrip('\n').encode())
+        assert lines[500][0].endswith("part-001.jsonl") and lines[500][1] == 1
+        assert lines[-1][0].endswith("part-002.jsonl.gz") and lines[-1][1] == 300
+
+    def test_shard_reader_can_stop_early(self, shard_dir):
+        reader = iter(ShardReader(resolve_sources(str(shard_dir)), workers=3, block_size=256, max_buffered_blocks=1))
+        assert next(reader)[1] == 1
+        reader.close()
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_preparator_streams_shards(self, shard_dir, workers):
+        records = DataPreparator(str(shard_dir), workers=workers).prepare_data()
+        assert [record.output for record in records] == [f"A{idx}" for idx in range(1000)]
+
+    def test_errors_name_the_shard(self, tmp_path):
+        write_shard(tmp_path / "a.jsonl.gz", range(3))
+        with gzip.open(tmp_path / "b.jsonl.gz", 'wt') as f:
+            f.write(RECORD % (3, 3) + "not json\n")
+        with pytest.raises(InvalidJSONError, match=r"line 2 of .*b\.jsonl\.gz"):
+            DataPreparator(str(tmp_path / "*.jsonl.gz")).prepare_data()
+
+        quarantine = Quarantine()
+        DataPreparator(str(tmp_path / "*.jsonl.gz"), quarantine=quarantine).prepare_data()
+        example = quarantine.report()["examples"][0]
+        assert example["line_number"] == 2 and example["source"].endswith("b.jsonl.gz")
+        assert quarantine.report()["lines"] == 5
+
+    def test_cache_key_covers_every_shard(self, shard_dir, tmp_path):
+        cache = PreparedDataCache(str(tmp_path / "cache"))
+        key = cache.key_for(DataPreparator(str(shard_dir)))
+        write_shard(shard_dir / "part-002.jsonl.gz", range(700, 999))
+        assert cache.key_for(DataPreparator(str(shard_dir))) != key
+
+    def test_incremental_requires_a_single_file(self, shard_dir, tmp_path):
+        with pytest.raises(ValueError):
+            IncrementalPreparator(DataPreparator(str(shard_dir)), str(tmp_path / "out.jsonl")).run()
+
+    def test_zstandard_shards(self, tmp_path):
+        zstandard = pytest.importorskip("zstandard")
+        (tmp_path / "part.jsonl.zst").write_bytes(
+            zstandard.ZstdCompressor().compress("".join(RECORD % (i, i) for i in range(10)).encode()))
+        assert len(DataPreparator(str(tmp_path / "part.jsonl.zst")).prepare_data()) == 10
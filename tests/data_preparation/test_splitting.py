@@ -0,0 +1,80 @@
+import json
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.data_preparation.splitting import DatasetSplitter, ReservoirSampler
+
+
+def make_records(start, stop):
+    return [GeminiFinetuningData(text_input=f"question {idx}", output=f"answer {idx}") for idx in range(start, stop)]
+
+
+class TestDatasetSplitter:
+    def test_ratios_are_respected(self):
+        splitter = DatasetSplitter(seed=1)
+        counts = {"train": 0, "validation": 0, "test": 0}
+        for record in make_records(0, 20000):
+            counts[splitter.assign(record)] += 1
+        assert abs(counts["train"] / 20000 - 0.8) < 0.02
+        assert abs(counts["validation"] / 20000 - 0.1) < 0.02
+
+    def test_assignment_is_stable_under_appends_and_depends_on_seed(self):
+        records = make_records(0, 1000)
+        before = [DatasetSplitter(seed=7).assign(record) for record in records]
+        after = [name for name, _ in DatasetSplitter(seed=7).split(records + make_records(1000, 2000))][:1000]
+        assert before == after
+        assert before != [DatasetSplitter(seed=8).assign(record) for record in records]
+
+    def test_filter_keeps_one_split(self):
+        splitter = DatasetSplitter({"train": 1, "holdout": 1}, keep="holdout")
+        kept = list(splitter.filter(make_records(0, 1000)))
+        assert all(splitter.assign(record) == "holdout" for record in kept)
+        assert len(kept) == splitter.counts["holdout"]
+        assert splitter.counts["train"] + splitter.counts["holdout"] == 1000
+
+    def test_invalid_configuration(self):
+        with pytest.raises(ValueError):
+            DatasetSplitter({"train": 0})
+        with pytest.raises(ValueError):
+            DatasetSplitter(keep="dev")
+
+    def test_write_splits(self, tmp_path):
+        splitter = DatasetSplitter()
+        paths = splitter.write_splits(make_records(0, 500), str(tmp_path))
+        written = {name: [json.loads(line) for line in open(path)] for name, path in paths.items()}
+        assert sum(len(rows) for rows in written.values()) == 500
+        assert {len(rows) for rows in written.values()} == set(splitter.counts.values())
+        assert written["train"][0].keys() == {"text_input", "output"}
+
+
+class TestReservoirSampler:
+    def test_sample_size_order_and_determinism(self):
+        records = make_records(0, 5000)
+        sample = ReservoirSampler(100, seed=3).sample(records)
+        assert len(sample) == 100
+        indices = [int(record.output.split()[1]) for record in sample]
+        assert indices == sorted(indices)
+        assert [r.output for r in ReservoirSampler(100, seed=3).sample(records)] == [r.output for r in sample]
+        assert [r.output for r in ReservoirSampler(100, seed=4).sample(records)] != [r.output for r in sample]
+
+    def test_appends_only_swap_in_new_records(self):
+        sample = {r.output for r in ReservoirSampler(50).sample(make_records(0, 1000))}
+        grown = {r.output for r in ReservoirSampler(50).sample(make_records(0, 2000))}
+        assert all(int(output.split()[1]) >= 1000 for output in grown - sample)
+
+    def test_short_stream(self):
+        assert len(ReservoirSampler(10).sample(make_records(0, 3))) == 3
+
+    def test_preparator_pilot_from_train_split(self, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        with open(data_file, 'w') as f:
+            for idx in range(1000):
+                f.write(json.dumps({"messages": [{"role": "user", "content": f"q{idx}"},
+                                                 {"role": "assistant", "content": f"a{idx}"}]}) + "\n")
+        splitter = DatasetSplitter(seed=5, keep="train")
+        preparator = DataPreparator(str(data_file), splitter=splitter, sampler=ReservoirSampler(20, seed=5))
+        records = preparator.prepare_data()
+        assert len(records) == 20
+        assert all(splitter.assign(record) == "train" for record in records)
+        assert preparator.summary()["sample"]["seen"] == splitter.counts["train"]
+        assert preparator.pipeline_config()["sample"] == {"k": 20, "seed": 5}
@@ -0,0 +1,52 @@
+import json
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.data_preparation.statistics import DatasetStatistics
+
+
+class TestDatasetStatistics:
+    @pytest.fixture
+    def data_file(self, tmp_path):
+        file_path = tmp_path / "data.jsonl"
+        with open(file_path, 'w') as f:
+            for content in ["one two", "three four five"]:
+                json.dump({"messages": [{"role": "user", "content": content}, {"role": "assistant", "content": content}]}, f)
+                f.write('\n')
+        return str(file_path)
+
+    def test_summary(self):
+        statistics = DatasetStatistics()
+        records = [GeminiFinetuningData(text_input="a " * 10, output="abcd") for _ in range(20)]
+        records.append(GeminiFinetuningData(text_input="a " * 1000, output="abcdefgh"))
+        assert list(statistics.observe(records)) == records
+
+        summary = statistics.summary()
+        assert summary["count"] == 21
+        assert summary["output"]["chars"]["max"] == 8
+        assert summary["output"]["tokens"]["min"] == 1
+        assert summary["output"]["tokens"]["max"] == 2
+        assert summary["input"]["words"]["percentiles"]["p50"] == 10
+        assert summary["input"]["words"]["outliers"]["count"] == 1
+        assert summary["input"]["words"]["outliers"]["largest"] == [21]
+        assert sum(summary["input"]["words"]["histogram"]["counts"]) == 21
+
+    def test_empty_summary(self):
+        assert DatasetStatistics().summary() == {"count": 0}
+
+    def test_prepare_data_prints_one_summary(self, data_file, capsys):
+        preparator = DataPreparator(data_file)
+        preparator.prepare_data()
+
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["count"] == 2
+        assert preparator.statistics.summary()["output"]["words"]["max"] == 3
+
+    def test_verbose_prints_each_data_point(self, data_file, capsys):
+        DataPreparator(data_file, verbose=True).prepare_data()
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[:2] == [
+            "Data point 1: Input words: 4, Output words: 2",
+            "Data point 2: Input words: 5, Output words: 3",
+        ]
@@ -0,0 +1,64 @@
+import json
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.data_preparation.incremental import IncrementalPreparator
+from src.data_preparation.token_budget import LengthPolicy, TokenEstimator
+
+
+class TestTokenBudget:
+    @pytest.fixture
+    def records(self):
+        return [
+            GeminiFinetuningData(text_input="short question", output="short answer"),
+            GeminiFinetuningData(text_input="word " * 50, output="fine"),
+            GeminiFinetuningData(text_input="fine", output="tokenization " * 20),
+        ]
+
+    def test_estimator(self):
+        estimator = TokenEstimator()
+        assert estimator.estimate("") == 0
+        assert estimator.estimate("Hello, world!") == 6
+        assert estimator.estimate("tokenization") == 3
+        assert estimator.estimate_batch(["a b", "Hello, world!"]).tolist() == [2, 6]
+        assert estimator.truncate("one two three four", 2) == "one two"
+        assert estimator.truncate("short", 10) == "short"
+
+    def test_drop(self, records):
+        policy = LengthPolicy(max_input_tokens=10, max_output_tokens=10, action='drop')
+        assert list(policy.filter(records)) == records[:1]
+        report = policy.report()
+        assert report["over_budget"] == {"input": 1, "output": 1}
+        assert report["handled"]["drop"] == 2
+        assert [example["data_point"] for example in report["examples"]] == [2, 3]
+
+    def test_truncate(self, records):
+        policy = LengthPolicy(max_input_tokens=10, max_output_tokens=10, action='truncate')
+        kept = list(policy.filter(records))
+        assert len(kept) == 3
+        assert all(policy.estimator.estimate(r.text_input) <= 10 for r in kept)
+        assert all(policy.estimator.estimate(r.output) <= 10 for r in kept)
+        assert kept[1].output == "fine"
+
+    def test_flag(self, records):
+        policy = LengthPolicy(max_input_tokens=10, action='flag')
+        assert list(policy.filter(records)) == records
+        assert policy.report()["handled"]["flag"] == 1
+
+    def test_unknown_action(self):
+        with pytest.raises(ValueError):
+            LengthPolicy(action='shorten')
+
+    def test_applied_in_preparation(self, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        with open(data_file, 'w') as f:
+            for content in ["Hello!", "long " * 100]:
+                json.dump({"messages": [{"role": "user", "content": content}, {"role": "assistant", "content": "Hi"}]}, f)
+                f.write('\n')
+
+        preparator = DataPreparator(str(data_file), length_policy=LengthPolicy(max_input_tokens=50))
+        assert len(preparator.prepare_data()) == 1
+        assert preparator.summary()["length_policy"]["handled"]["drop"] == 1
+
+        incremental = IncrementalPreparator(preparator, str(tmp_path / "prepared.jsonl"))
+        assert incremental.run() == 1
@@ -0,0 +1,104 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.model_tuning.api_client import GeminiApiClient, RetryPolicy, TokenBucket
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class Flaky:
+    def __init__(self, errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+class TestApiClient:
+    @pytest.fixture
+    def client(self):
+        return GeminiApiClient(limits={'get': (1000.0, 10), 'create': (1000.0, 1)},
+                               retry_policy=RetryPolicy(max_attempts=3, initial_delay=0.001, max_delay=0.01))
+
+    def test_token_bucket_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=50.0, capacity=2)
+        start = time.monotonic()
+        waits = [bucket.acquire() for _ in range(7)]
+        elapsed = time.monotonic() - start
+        assert waits[:2] == [0.0, 0.0]
+        assert elapsed >= 5 / 50.0 * 0.9
+
+    def test_token_bucket_is_shared_between_threads(self):
+        bucket = TokenBucket(rate=100.0, capacity=1)
+        start = time.monotonic()
+        threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.monotonic() - start >= 19 / 100.0 * 0.9
+
+    def test_retries_retryable_errors(self, client):
+        fn = Flaky([ApiError(429), ConnectionError("reset")])
+        assert client.call('get', fn) == "ok"
+        assert fn.calls == 3
+        metrics = client.metrics()['get']
+        assert metrics['calls'] == 3
+        assert metrics['retries'] == 2
+        assert metrics['failures'] == 0
+
+    def test_gives_up_after_max_attempts(self, client):
+        fn = Flaky([ApiError(503)] * 5)
+        with pytest.raises(ApiError):
+            client.call('get', fn)
+        assert fn.calls == 3
+        assert client.metrics()['get']['failures'] == 1
+
+    def test_does_not_retry_client_errors(self, client):
+        fn = Flaky([ApiError(400)])
+        with pytest.raises(ApiError):
+            client.call('get', fn)
+        assert fn.calls == 1
+        assert client.metrics()['get']['retries'] == 0
+
+    def test_create_only_retries_rate_limits(self, client):
+        # A failed create may still have started a tuning job, so it is not blindly repeated
+        for error in (ApiError(503), ApiError(504), TimeoutError("timed out")):
+            fn = Flaky([error])
+            with pytest.raises(type(error)):
+                client.call('create', fn)
+            assert fn.calls == 1
+        fn = Flaky([ApiError(429)])
+        assert client.call('create', fn) == "ok"
+        assert fn.calls == 2
+
+    def test_unknown_endpoint(self, client):
+        with pytest.raises(ValueError):
+            client.call('delete', lambda: None)
+
+    def test_handler_calls_go_through_client(self, client, tmp_path):
+        with patch.object(ModelTuner, 'setup_credentials'):
+            tuner = ModelTuner(catalog=ModelCatalog(str(tmp_path)), api=client)
+
+        get_model = Flaky([ApiError(429)], result=MagicMock())
+        with patch('google.generativeai.get_model', get_model):
+            tuner.get_model("tunedModels/a")
+        with patch('google.generativeai.create_tuned_model', Flaky([ApiError(429)], result=MagicMock())):
+            tuner.tune_model([], name="new-model")
+
+        metrics = client.metrics()
+        assert metrics['get']['retries'] == 1
+        assert metrics['create']['calls'] == 2
+        assert metrics['create']['retries'] == 1
@@ -0,0 +1,83 @@
+import datetime
+import json
+import threading
+import pytest
+from unittest.mock import patch
+from src.model_tuning.credentials import CredentialManager
+
+
+class FakeCredentials:
+    def __init__(self, token="token-0", lifetime=3600, refresh_token="refresh"):
+        self.token = token
+        self.refresh_token = refresh_token
+        self.expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=lifetime)
+        self.refreshes = 0
+        self.refreshed = threading.Event()
+
+    @property
+    def expired(self):
+        return datetime.datetime.utcnow() >= self.expiry
+
+    @property
+    def valid(self):
+        return self.token is not None and not self.expired
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+        self.expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=3600)
+        self.refreshed.set()
+
+    def to_json(self):
+        return json.dumps({"token": self.token, "expiry": self.expiry.isoformat()})
+
+
+class TestCredentialManager:
+    @pytest.fixture(autouse=True)
+    def isolated(self, tmp_path):
+        CredentialManager.reset_all()
+        with patch('src.model_tuning.credentials.genai') as genai:
+            self.genai = genai
+            yield
+        CredentialManager.reset_all()
+
+    def _manager(self, tmp_path, **kwargs):
+        token_path = tmp_path / "token.json"
+        token_path.write_text("{}")
+        return CredentialManager("client_secret.json", token_path=str(token_path), **kwargs)
+
+    def test_shared_per_process(self, tmp_path):
+        first = CredentialManager.for_client_secret("client_secret.json", str(tmp_path / "token.json"))
+        second = CredentialManager.for_client_secret("client_secret.json", str(tmp_path / "token.json"))
+        assert first is second
+
+    def test_loads_once_and_configures_once(self, tmp_path):
+        manager = self._manager(tmp_path)
+        creds = FakeCredentials()
+        with patch('src.model_tuning.credentials.Credentials.from_authorized_user_file', return_value=creds) as load:
+            assert manager.get_credentials() is creds
+            assert manager.get_credentials() is creds
+        assert load.call_count == 1
+        assert self.genai.configure.call_count == 1
+        manager.stop()
+
+    def test_expired_token_is_refreshed_and_saved(self, tmp_path):
+        manager = self._manager(tmp_path)
+        creds = FakeCredentials(lifetime=-10)
+        with patch('src.model_tuning.credentials.Credentials.from_authorized_user_file', return_value=creds):
+            manager.get_credentials()
+        manager.stop()
+
+        assert creds.refreshes == 1
+        assert json.loads((tmp_path / "token.json").read_text())["token"] == "token-1"
+        assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+    def test_background_refresh_before_expiry(self, tmp_path):
+        manager = self._manager(tmp_path, refresh_margin=3600 - 1)
+        creds = FakeCredentials(lifetime=3600)
+        with patch('src.model_tuning.credentials.Credentials.from_authorized_user_file', return_value=creds):
+            manager.get_credentials()
+            # Expires in an hour, margin is an hour minus one second: refresh fires after ~1s
+            assert creds.refreshed.wait(timeout=5)
+        manager.stop()
+        assert creds.token == "token-1"
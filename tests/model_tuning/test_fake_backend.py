@@ -0,0 +1,90 @@
+import json
+import pytest
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as api_exceptions
+from scripts.benchmark_pipeline import parse_size, synthetic_records, write_synthetic_jsonl
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.evaluation import Evaluator
+from src.model_tuning.api_client import GeminiApiClient, RetryPolicy
+from src.model_tuning.fake_backend import FakeGeminiBackend
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner
+
+
+class TestFakeBackend:
+    def _tuner(self, backend):
+        api = GeminiApiClient(limits={endpoint: (1000.0, 100) for endpoint in ('list', 'get', 'create', 'generate')},
+                              retry_policy=RetryPolicy(max_attempts=5, initial_delay=0.001, max_delay=0.01))
+        return ModelTuner(catalog=ModelCatalog(None, ttls={'model': 0}, stale_while_revalidate=0), api=api,
+                          credentials=backend.credentials)
+
+    def test_tuning_job_lifecycle(self):
+        backend = FakeGeminiBackend(tuning_seconds=0.1)
+        with backend.install():
+            tuner = self._tuner(backend)
+            operation = tuner.tune_model([GeminiFinetuningData("1", "2")], name="Counting Model")
+            name = operation.metadata.tuned_model
+            assert name == "tunedModels/counting-model"
+            assert tuner.get_tuned_model_status(name) == "Still being created"
+
+            tuned = tuner.wait_for_tuning_completion(operation, initial_poll_interval=0.02, max_poll_interval=0.05)
+            assert tuned.state == glm.TunedModel.State.ACTIVE
+            assert tuner.get_tuned_model_status(name) == "Ready for use"
+            assert [model.name for model in tuner.get_tuned_models()] == [name]
+            assert tuner.get_tuned_model(name).generate_content("55").text == "55"
+
+    def test_failed_tuning(self):
+        backend = FakeGeminiBackend(tuning_failure_rate=1.0)
+        with backend.install():
+            tuner = self._tuner(backend)
+            operation = tuner.tune_model([GeminiFinetuningData("1", "2")], name="doomed")
+            with pytest.raises(RuntimeError):
+                operation.result()
+            assert tuner.get_tuned_model_status(operation.metadata.tuned_model) == "Creation failed"
+
+    def test_injected_failures_are_retried(self):
+        backend = FakeGeminiBackend(failure_rate=0.3, seed=1)
+        with backend.install():
+            tuner = self._tuner(backend)
+            for _ in range(20):
+                assert tuner.get_model("models/gemini-1.5-pro-001").name == "models/gemini-1.5-pro-001"
+        assert backend.calls['get_model'] > 20
+        assert tuner.api.metrics()['get']['retries'] == backend.calls['get_model'] - 20
+
+    def test_quota(self):
+        backend = FakeGeminiBackend(quota_per_minute=2)
+        backend.list_models()
+        backend.list_models()
+        with pytest.raises(api_exceptions.ResourceExhausted):
+            backend.list_models()
+
+    def test_install_restores_sdk(self):
+        import google.generativeai as genai
+        original = genai.get_model
+        with FakeGeminiBackend().install():
+            assert genai.get_model is not original
+        assert genai.get_model is original
+
+    def test_evaluator_against_backend(self, tmp_path):
+        test_file = tmp_path / "test.jsonl"
+        with open(test_file, 'w') as f:
+            for record in synthetic_records(5):
+                f.write(json.dumps(record) + '\n')
+        backend = FakeGeminiBackend(responder=lambda model_name, prompt: model_name)
+        with backend.install():
+            evaluator = Evaluator.for_tuned_model(self._tuner(backend), "tunedModels/a", max_in_flight=4)
+            results = evaluator.evaluate(str(test_file))
+        assert [result["response"] for result in results] == ["tunedModels/a"] * 5
+        assert backend.calls['generate_content'] == 5
+
+
+class TestBenchmarkData:
+    def test_parse_size(self):
+        assert [parse_size(text) for text in ("500", "10k", "1.5M")] == [500, 10_000, 1_500_000]
+
+    def test_synthetic_data_is_valid_and_deterministic(self, tmp_path):
+        path = tmp_path / "synthetic.jsonl"
+        write_synthetic_jsonl(str(path), 200, seed=3)
+        assert len(DataPreparator(str(path)).prepare_data()) == 200
+        assert list(synthetic_records(3, seed=3)) == list(synthetic_records(3, seed=3))
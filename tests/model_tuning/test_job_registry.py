@@ -0,0 +1,126 @@
+import pytest
+from google.ai import generativelanguage as glm
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.model_tuning.api_client import GeminiApiClient, RetryPolicy
+from src.model_tuning.fake_backend import FakeGeminiBackend
+from src.model_tuning.job_registry import ACTIVE, CREATING, FAILED, SUBMITTING, JobRegistry
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner, tuned_model_id
+from src.model_tuning.tuning_orchestrator import TuningJobSpec, TuningOrchestrator
+
+DATA = [GeminiFinetuningData("1", "2"), GeminiFinetuningData("3", "4")]
+
+
+class TestJobRegistry:
+    def test_key_depends_on_data_model_and_params(self):
+        data = [GeminiFinetuningData.to_gemini_format(record) for record in DATA]
+        digest = JobRegistry.data_digest(data)
+        assert digest == JobRegistry.data_digest(list(data))
+        assert digest != JobRegistry.data_digest(data[:1])
+        key = JobRegistry.key(digest, "models/a", {"epoch_count": 5})
+        assert key == JobRegistry.key(digest, "models/a", {"epoch_count": 5})
+        assert key != JobRegistry.key(JobRegistry.data_digest(data[:1]), "models/a", {"epoch_count": 5})
+        assert key != JobRegistry.key(digest, "models/b", {"epoch_count": 5})
+        assert key != JobRegistry.key(digest, "models/a", {"epoch_count": 6})
+
+    def test_lifecycle_persists(self, tmp_path):
+        path = str(tmp_path / "jobs.sqlite3")
+        registry = JobRegistry(path)
+        registry.start("k", "My model", "tunedModels/my-model-k", "models/a", {"batch_size": 4})
+        assert registry.get("k").state == SUBMITTING
+        registry.submitted("k", "tunedModels/my-model-k/operations/1")
+        registry.close()
+
+        registry = JobRegistry(path)
+        job = registry.get("k")
+        assert (job.state, job.attempts, job.params) == (CREATING, 1, {"batch_size": 4})
+        assert [j.key for j in registry.in_flight()] == ["k"]
+        assert registry.find_operation("tunedModels/my-model-k/operations/1").key == "k"
+        registry.set_state("k", FAILED, "boom")
+        assert registry.in_flight() == []
+        assert registry.get("k").error == "boom"
+        assert registry.get("missing") is None
+
+    def test_tuned_model_id(self):
+        key = "0123456789abcdef"
+        assert tuned_model_id("Counting Model", key) == "counting-model-0123456789ab"
+        assert tuned_model_id("Counting Model", key, 2) == "counting-model-0123456789ab-2"
+        assert tuned_model_id("42 answers", key).startswith("m-42-answers-")
+        assert len(tuned_model_id("x" * 100, key, 10)) <= 40
+
+
+class TestIdempotentTuning:
+    @pytest.fixture
+    def registry(self, tmp_path):
+        registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+        yield registry
+        registry.close()
+
+    def _tuner(self, backend, registry):
+        api = GeminiApiClient(limits={endpoint: (1000.0, 100) for endpoint in ('list', 'get', 'create', 'generate')},
+                              retry_policy=RetryPolicy(max_attempts=3, initial_delay=0.001, max_delay=0.01))
+        return ModelTuner(catalog=ModelCatalog(None), api=api, credentials=backend.credentials, registry=registry)
+
+    def test_identical_job_reattaches(self, registry):
+        backend = FakeGeminiBackend(tuning_seconds=0.05)
+        with backend.install():
+            first = self._tuner(backend, registry).tune_model(DATA, name="pilot")
+            # A restarted script builds a new tuner over the same registry
+            second = self._tuner(backend, registry).tune_model(DATA, name="pilot again")
+            assert second.name == first.name
+            assert backend.calls['create_tuned_model'] == 1
+
+            tuner = self._tuner(backend, registry)
+            assert [op.name for op in tuner.resume_in_flight()] == [first.name]
+            tuned = tuner.wait_for_tuning_completion(second, initial_poll_interval=0.01, max_poll_interval=0.02)
+            assert tuned.state == glm.TunedModel.State.ACTIVE
+            assert registry.in_flight() == []
+            assert [job.state for job in registry.jobs()] == [ACTIVE]
+
+            # Finished jobs are not tuned again either, while different data is
+            tuner.tune_model(DATA)
+            tuner.tune_model(DATA[:1])
+            assert backend.calls['create_tuned_model'] == 2
+
+    def test_failed_job_is_resubmitted(self, registry):
+        backend = FakeGeminiBackend(tuning_failure_rate=1.0)
+        with backend.install():
+            tuner = self._tuner(backend, registry)
+            operation = tuner.tune_model(DATA, name="pilot")
+            with pytest.raises(RuntimeError):
+                tuner.wait_for_tuning_completion(operation, initial_poll_interval=0.01)
+            assert registry.jobs()[0].state == FAILED
+
+            retry = tuner.tune_model(DATA, name="pilot")
+            assert retry.name != operation.name
+            assert retry.metadata.tuned_model.endswith("-2")
+            assert backend.calls['create_tuned_model'] == 2
+
+    def test_recovers_job_created_before_a_crash(self, registry, monkeypatch):
+        backend = FakeGeminiBackend()
+        with backend.install():
+            # The create call succeeds but the run dies before recording its operation
+            def crash(key, operation_name):
+                raise KeyboardInterrupt
+
+            monkeypatch.setattr(registry, 'submitted', crash)
+            with pytest.raises(KeyboardInterrupt):
+                self._tuner(backend, registry).tune_model(DATA, name="pilot")
+            monkeypatch.undo()
+            assert registry.jobs()[0].state == SUBMITTING
+
+            recovered = self._tuner(backend, registry).tune_model(DATA, name="pilot")
+            job = registry.jobs()[0]
+            assert (job.state, job.operation_name) == (CREATING, recovered.name)
+            assert recovered.metadata.tuned_model == job.tuned_model
+            assert backend.calls['create_tuned_model'] == 2
+            assert len(backend.tuned_models) == 1
+
+    def test_orchestrator_records_final_states(self, registry):
+        backend = FakeGeminiBackend(tuning_seconds=0.02)
+        with backend.install():
+            orchestrator = TuningOrchestrator(self._tuner(backend, registry), initial_poll_interval=0.01,
+                                              max_poll_interval=0.02)
+            jobs = orchestrator.run_sync([TuningJobSpec(DATA, name="a"), TuningJobSpec(DATA[:1], name="b")])
+        assert all(job.succeeded for job in jobs)
+        assert {job.state for job in registry.jobs()} == {ACTIVE}
@@ -0,0 +1,15 @@
+import pytest
+from scripts.benchmark_imports import measure_import
+
+
+class TestLazyImports:
+    @pytest.mark.parametrize("module", ["scripts.tuning_runner", "src.model_tuning", "src.data_preparation.data_preparator"])
+    def test_data_commands_do_not_load_the_sdk(self, module):
+        assert measure_import(module, runs=1)["heavy_modules"] == []
+
+    def test_model_tuner_loads_on_first_use(self):
+        import src.model_tuning
+        from src.model_tuning.model_tuner import ModelTuner
+        assert src.model_tuning.ModelTuner is ModelTuner
+        with pytest.raises(AttributeError):
+            src.model_tuning.NotAThing
@@ -0,0 +1,77 @@
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [f"models/version-{self.calls}"]
+
+
+class TestModelCatalog:
+    @pytest.fixture
+    def catalog(self, tmp_path):
+        return ModelCatalog(str(tmp_path / "catalog"), ttls={'model': 60}, stale_while_revalidate=60)
+
+    def _age(self, catalog, key, seconds):
+        stored_at, value = catalog._memory[key]
+        catalog._memory[key] = (stored_at - seconds, value)
+
+    def test_fresh_entries_are_served_from_memory(self, catalog):
+        loader = CountingLoader()
+        assert catalog.get('model:a', 'model', loader) == ["models/version-1"]
+        assert catalog.get('model:a', 'model', loader) == ["models/version-1"]
+        assert loader.calls == 1
+
+    def test_disk_tier_survives_new_instance(self, catalog):
+        loader = CountingLoader()
+        catalog.get('tuned_models', 'tuned_models', loader)
+        fresh_catalog = ModelCatalog(catalog.cache_dir)
+        assert fresh_catalog.get('tuned_models', 'tuned_models', loader) == ["models/version-1"]
+        assert loader.calls == 1
+
+    def test_stale_while_revalidate(self, catalog):
+        loader = CountingLoader()
+        catalog.get('model:a', 'model', loader)
+        self._age(catalog, 'model:a', 90)
+
+        assert catalog.get('model:a', 'model', loader) == ["models/version-1"]
+        deadline = time.time() + 5
+        while catalog._memory['model:a'][1] != ["models/version-2"] and time.time() < deadline:
+            time.sleep(0.01)
+        assert catalog.get('model:a', 'model', loader) == ["models/version-2"]
+
+    def test_expired_entries_reload_inline(self, catalog):
+        loader = CountingLoader()
+        catalog.get('model:a', 'model', loader)
+        self._age(catalog, 'model:a', 500)
+        assert catalog.get('model:a', 'model', loader) == ["models/version-2"]
+
+    def test_invalidate(self, catalog):
+        loader = CountingLoader()
+        catalog.get('model:a', 'model', loader)
+        catalog.get('model:b', 'model', loader)
+        catalog.invalidate('model:a')
+        assert catalog.get('model:a', 'model', loader) == ["models/version-3"]
+        catalog.invalidate()
+        assert catalog.get('model:b', 'model', loader) == ["models/version-4"]
+
+    def test_handler_uses_catalog_and_tuning_invalidates_it(self, catalog):
+        with patch.object(ModelTuner, 'setup_credentials'):
+            tuner = ModelTuner(catalog=catalog)
+
+        with patch('google.generativeai.list_tuned_models', return_value=iter(["tunedModels/a"])) as list_tuned:
+            assert tuner.get_tuned_models() == ["tunedModels/a"]
+            assert tuner.get_tuned_models() == ["tunedModels/a"]
+        assert list_tuned.call_count == 1
+
+        with patch('google.generativeai.create_tuned_model', return_value=MagicMock()):
+            tuner.tune_model([], name="new-model")
+        with patch('google.generativeai.list_tuned_models', return_value=iter(["tunedModels/a", "tunedModels/b"])):
+            assert tuner.get_tuned_models() == ["tunedModels/a", "tunedModels/b"]
@@ -0,0 +1,62 @@
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from google.ai import generativelanguage as glm
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner
+from src.model_tuning.status_sweep import sweep_model_statuses
+
+
+class TestStatusSweep:
+    def test_sweep_runs_concurrently_and_keeps_order(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def get_model(name):
+            with lock:
+                active.append(name)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(name)
+            if name == "tunedModels/broken":
+                raise RuntimeError("not found")
+            return SimpleNamespace(state=glm.TunedModel.State.ACTIVE, create_time="2024-01-01")
+
+        names = [f"tunedModels/m{idx}" for idx in range(7)] + ["tunedModels/broken"]
+        sweep = sweep_model_statuses(names, get_model, max_workers=4)
+
+        assert [row.name for row in sweep.rows] == names
+        assert max(peak) > 1
+        assert sweep.counts == {"ACTIVE": 7, "ERROR": 1}
+        assert sweep.rows[-1].error == "not found"
+        assert sweep.summary()["total"] == 8
+        assert "8 models (ACTIVE: 7, ERROR: 1)" in sweep.to_table()
+
+    def test_handler_sweeps_all_tuned_models(self, tmp_path):
+        with patch.object(ModelTuner, 'setup_credentials'):
+            tuner = ModelTuner(catalog=ModelCatalog(str(tmp_path)))
+        listing = [SimpleNamespace(name="tunedModels/a"), SimpleNamespace(name="tunedModels/b")]
+        states = {"tunedModels/a": glm.TunedModel.State.ACTIVE, "tunedModels/b": glm.TunedModel.State.CREATING}
+
+        with patch('google.generativeai.list_tuned_models', return_value=iter(listing)), \
+                patch('google.generativeai.get_model', side_effect=lambda name: SimpleNamespace(state=states[name])):
+            sweep = tuner.get_tuned_model_statuses()
+
+        assert [(row.name, row.state) for row in sweep.rows] == [("tunedModels/a", "ACTIVE"), ("tunedModels/b", "CREATING")]
+
+    def test_handler_sweep_bypasses_cached_states(self, tmp_path):
+        with patch.object(ModelTuner, 'setup_credentials'):
+            tuner = ModelTuner(catalog=ModelCatalog(str(tmp_path)))
+        state = {"value": glm.TunedModel.State.CREATING}
+
+        with patch('google.generativeai.get_model', side_effect=lambda name: SimpleNamespace(state=state["value"])):
+            assert tuner.get_tuned_model_status("tunedModels/a") == "Still being created"
+            state["value"] = glm.TunedModel.State.ACTIVE
+            sweep = tuner.get_tuned_model_statuses(["tunedModels/a"])
+            assert sweep.rows[0].state == "ACTIVE"
+            # The fresh state is written back to the catalog
+            assert tuner.get_tuned_model_status("tunedModels/a") == "Ready for use"
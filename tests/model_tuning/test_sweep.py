@@ -0,0 +1,137 @@
+import json
+import time
+import pytest
+from google.ai import generativelanguage as glm
+from google.generativeai.types import model_types
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.model_tuning.api_client import GeminiApiClient, RetryPolicy
+from src.model_tuning.fake_backend import FakeGeminiBackend
+from src.model_tuning.job_registry import JobRegistry
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner, TuningDataset
+from src.model_tuning.sweep import HyperparameterSweep, grid, load_sweep_spec, random_search
+from src.model_tuning.tuning_orchestrator import TuningJob, TuningJobSpec
+
+DATA = [GeminiFinetuningData(str(i), str(i + 1)) for i in range(10)]
+
+
+class TestSearchSpaces:
+    def test_grid(self):
+        trials = grid({"epoch_count": [3, 5], "learning_rate": [0.001, 0.0001]})
+        assert trials == [
+            {"epoch_count": 3, "learning_rate": 0.001}, {"epoch_count": 3, "learning_rate": 0.0001},
+            {"epoch_count": 5, "learning_rate": 0.001}, {"epoch_count": 5, "learning_rate": 0.0001},
+        ]
+        with pytest.raises(ValueError):
+            grid({"temperature": [0.1]})
+
+    def test_random_search(self):
+        space = {"epoch_count": {"min": 1, "max": 10}, "batch_size": [4, 8, 16],
+                 "learning_rate": {"min": 1e-5, "max": 1e-2, "log": True}}
+        trials = random_search(space, 20, seed=1)
+        assert trials == random_search(space, 20, seed=1)
+        assert all(isinstance(trial["epoch_count"], int) and 1 <= trial["epoch_count"] <= 10 for trial in trials)
+        assert all(trial["batch_size"] in (4, 8, 16) for trial in trials)
+        assert all(1e-5 <= trial["learning_rate"] <= 1e-2 for trial in trials)
+
+    def test_load_sweep_spec(self, tmp_path):
+        path = tmp_path / "sweep.json"
+        path.write_text(json.dumps({"random": {"epoch_count": [2, 4]}, "trials": 3, "seed": 2}))
+        assert len(load_sweep_spec(str(path))) == 3
+        path.write_text(json.dumps({"epoch_count": [2, 4]}))
+        with pytest.raises(ValueError):
+            load_sweep_spec(str(path))
+
+
+class TestHyperparameterSweep:
+    def _tuner(self, backend, registry=None):
+        api = GeminiApiClient(limits={endpoint: (1000.0, 100) for endpoint in ('list', 'get', 'create', 'generate')},
+                              retry_policy=RetryPolicy(max_attempts=3, initial_delay=0.001, max_delay=0.01))
+        return ModelTuner(catalog=ModelCatalog(None), api=api, credentials=backend.credentials, registry=registry)
+
+    def test_hyperparameters_reach_the_service(self):
+        backend = FakeGeminiBackend()
+        with backend.install():
+            operation = self._tuner(backend).tune_model(DATA, name="custom", source_model="models/gemini-1.5-pro-001",
+                                                        epoch_count=3, learning_rate=0.01)
+        model = backend.tuned_models[operation.metadata.tuned_model]
+        assert model.base_model == "models/gemini-1.5-pro-001"
+        assert model.hyperparameters == {"epoch_count": 3, "learning_rate": 0.01}
+        assert len(model.tuning_task.snapshots) == 3
+
+    def test_sweep_report(self, tmp_path):
+        backend = FakeGeminiBackend(tuning_seconds=0.02, seed=0)
+        with backend.install():
+            sweep = HyperparameterSweep(self._tuner(backend), max_concurrency=2, name_prefix="lr",
+                                        initial_poll_interval=0.01, max_poll_interval=0.02)
+            report = sweep.run(DATA, grid({"epoch_count": [2, 3], "learning_rate": [0.001, 0.01]}))
+
+        assert backend.calls['create_tuned_model'] == 4
+        assert len(report.rows) == 4
+        assert {row["state"] for row in report.rows} == {"ACTIVE"}
+        losses = [row["final_loss"] for row in report.rows]
+        assert losses == sorted(losses)
+        assert report.best == report.rows[0]
+        assert report.best["epochs"] == report.best["params"]["epoch_count"]
+
+        table = report.format_table()
+        assert table.splitlines()[0].split() == ["name", "epoch_count", "learning_rate", "state", "final_loss",
+                                                 "minutes", "tuned_model"]
+        report.write_json(str(tmp_path / "sweep.json"))
+        assert json.loads((tmp_path / "sweep.json").read_text())["best"]["name"] == report.best["name"]
+
+    def test_reads_decoded_tuned_models(self):
+        # The SDK decodes operation results into model_types.TunedModel, whose snapshots are dicts
+        tuned = model_types.decode_tuned_model(glm.TunedModel(
+            name="tunedModels/a", state=glm.TunedModel.State.ACTIVE,
+            tuning_task=glm.TuningTask(snapshots=[glm.TuningSnapshot(step=1, epoch=1, mean_loss=0.9),
+                                                  glm.TuningSnapshot(step=2, epoch=2, mean_loss=0.4)])))
+        assert isinstance(tuned.tuning_task.snapshots[-1], dict)
+        job = TuningJob(TuningJobSpec(DATA, name="a", epoch_count=2))
+        job.result, job.submitted_at, job.completed_at = tuned, 0.0, 60.0
+
+        row = HyperparameterSweep._row(job)
+        assert (row["tuned_model"], row["final_loss"], row["epochs"]) == ("tunedModels/a", pytest.approx(0.4), 2)
+
+    def test_failed_trials_sort_last(self):
+        backend = FakeGeminiBackend(tuning_failure_rate=0.5, seed=3)
+        with backend.install():
+            report = HyperparameterSweep(self._tuner(backend), initial_poll_interval=0.01).run(
+                DATA, [{"epoch_count": count} for count in range(1, 7)])
+        states = [row["state"] for row in report.rows]
+        assert "FAILED" in states and "ACTIVE" in states
+        assert states == sorted(states, key=lambda state: state != "ACTIVE")
+        assert all(row["error"] for row in report.rows if row["state"] == "FAILED")
+
+    def test_concurrency_respects_quota(self, tmp_path):
+        registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+        backend = FakeGeminiBackend(tuning_seconds=60)
+        with backend.install():
+            tuner = self._tuner(backend, registry)
+            dataset = TuningDataset(DATA)
+            tuner.tune_model(dataset, epoch_count=1)
+            tuner.tune_model(dataset, epoch_count=2)
+            assert HyperparameterSweep(tuner, max_concurrency=4, quota=5).concurrency() == 3
+            assert HyperparameterSweep(tuner, max_concurrency=2, quota=5).concurrency() == 2
+            # A used up quota submits nothing
+            assert HyperparameterSweep(tuner, max_concurrency=4, quota=2).concurrency() == 0
+            with pytest.raises(RuntimeError, match="quota of 2"):
+                HyperparameterSweep(tuner, max_concurrency=4, quota=2).run(dataset, [{"epoch_count": 3}])
+            assert backend.calls['create_tuned_model'] == 2
+        registry.close()
+
+    def test_finished_jobs_free_the_quota(self, tmp_path):
+        # Jobs of a run that was killed while waiting are still CREATING in the registry
+        registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+        backend = FakeGeminiBackend(tuning_seconds=0.01, tuning_failure_rate=0.5, seed=3)
+        with backend.install():
+            tuner = self._tuner(backend, registry)
+            dataset = TuningDataset(DATA)
+            for count in range(1, 4):
+                tuner.tune_model(dataset, epoch_count=count)
+            assert len(registry.in_flight()) == 3
+            time.sleep(0.02)
+            assert HyperparameterSweep(tuner, max_concurrency=4, quota=4).concurrency() == 4
+        assert registry.in_flight() == []
+        assert {job.state for job in registry.jobs()} <= {"ACTIVE", "FAILED"}
+        registry.close()
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from src.model_tuning.polling import poll_intervals
+from src.model_tuning.tuning_orchestrator import TuningJobSpec, TuningOrchestrator
+
+
+class FakeOperation:
+    def __init__(self, name, polls_until_done, error=None):
+        self.name = name
+        self.remaining = polls_until_done
+        self.error = error
+
+    def done(self):
+        self.remaining -= 1
+        return self.remaining <= 0
+
+    def result(self):
+        if self.error:
+            raise self.error
+        return f"tunedModels/{self.name}"
+
+
+class FakeTuner:
+    def __init__(self, polls):
+        self.polls = polls
+        self.active = 0
+        self.max_active = 0
+
+    def tune_model(self, tuning_data, name=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        if name == "rejected":
+            raise RuntimeError("quota exceeded")
+        error = RuntimeError("tuning failed") if name == "broken" else None
+        return FakeOperation(name, self.polls[name], error)
+
+
+class TestTuningOrchestrator:
+    def _orchestrator(self, tuner, **kwargs):
+        def release(job):
+            tuner.active -= 1
+        return TuningOrchestrator(tuner, initial_poll_interval=0.001, max_poll_interval=0.004,
+                                  on_complete=release, **kwargs)
+
+    def test_poll_intervals_back_off(self):
+        delays = poll_intervals(initial=1, maximum=8, factor=2, jitter=0, fast_polls=2)
+        assert [next(delays) for _ in range(7)] == [1, 1, 2, 4, 8, 8, 8]
+
+    def test_yields_jobs_in_completion_order(self):
+        tuner = FakeTuner({"slow": 6, "fast": 1, "medium": 3})
+        orchestrator = self._orchestrator(tuner)
+        jobs = orchestrator.run_sync([TuningJobSpec([], name=name) for name in ("slow", "fast", "medium")])
+
+        assert [job.name for job in jobs] == ["fast", "medium", "slow"]
+        assert all(job.succeeded for job in jobs)
+        assert jobs[0].result == "tunedModels/fast"
+        assert jobs[2].polls == 5
+
+    def test_concurrency_cap_and_failures(self):
+        tuner = FakeTuner({name: 2 for name in ("a", "b", "c", "d", "broken")})
+        orchestrator = self._orchestrator(tuner, max_concurrency=2)
+        specs = [TuningJobSpec([], name=name) for name in ("a", "b", "broken", "rejected", "c", "d")]
+        jobs = orchestrator.run_sync(specs)
+
+        assert len(jobs) == 6
+        assert tuner.max_active <= 2
+        failed = {job.name: str(job.error) for job in jobs if not job.succeeded}
+        assert failed == {"broken": "tuning failed", "rejected": "quota exceeded"}
+
+    def test_async_iteration_with_async_callback(self):
+        tuner = FakeTuner({"a": 1, "b": 2})
+        completed = []
+
+        async def record(job):
+            completed.append(job.name)
+
+        async def collect():
+            orchestrator = TuningOrchestrator(tuner, initial_poll_interval=0.001, on_complete=record)
+            return [job.name async for job in orchestrator.run([TuningJobSpec([], name="a"), TuningJobSpec([], name="b")])]
+
+        assert asyncio.run(collect()) == ["a", "b"]
+        assert completed == ["a", "b"]
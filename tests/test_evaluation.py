@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from src.evaluation import Evaluator
+from src.response_cache import ResponseCache
+
+
+class FakeModel:
+    def __init__(self, fail_on=()):
+        self.fail_on = fail_on
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        # Later prompts finish first, to check that order is restored
+        time.sleep(0.02 if "Question 0" in prompt else 0.005)
+        with self.lock:
+            self.active -= 1
+        if any(marker in prompt for marker in self.fail_on):
+            raise RuntimeError("blocked")
+        return SimpleNamespace(text=prompt.upper())
+
+
+class TestEvaluator:
+    @pytest.fixture
+    def test_file(self, tmp_path):
+        file_path = tmp_path / "test.jsonl"
+        with open(file_path, 'w') as f:
+            for idx in range(10):
+                json.dump({"messages": [{"role": "user", "content": f"Question {idx}"},
+                                        {"role": "assistant", "content": f"Answer {idx}"}]}, f)
+                f.write('\n')
+        return str(file_path)
+
+    def test_concurrent_and_ordered(self, test_file):
+        model = FakeModel(fail_on=("Question 3",))
+        results = Evaluator(model, max_in_flight=4).evaluate(test_file)
+
+        assert [result["index"] for result in results] == list(range(10))
+        assert results[0]["expected"] == "Answer 0"
+        assert results[0]["response"] == "<INPUT>\nQUESTION 0\n</INPUT>"
+        assert results[3]["error"] == "blocked"
+        assert 1 < model.peak <= 4
+
+    def test_resumes_partial_run(self, test_file, tmp_path):
+        progress_file = str(tmp_path / "progress.jsonl")
+        evaluator = Evaluator(FakeModel(), max_in_flight=2)
+        stream = evaluator.iter_results(test_file, progress_file)
+        for _ in range(4):
+            next(stream)
+        stream.close()
+        with open(progress_file, 'a') as f:
+            f.write('{"index": 4, "trunc')
+
+        model = FakeModel()
+        results = Evaluator(model, max_in_flight=2).evaluate(test_file, progress_file)
+
+        assert [result["index"] for result in results] == list(range(10))
+        assert len(model.prompts) == 6
+        assert not any("Question 0\n" in prompt for prompt in model.prompts)
+        # A completed run leaves no progress behind for the next one to replay
+        assert not os.path.exists(progress_file)
+
+    def test_resume_retries_errors_and_checks_the_run(self, test_file, tmp_path):
+        progress_file = str(tmp_path / "progress.jsonl")
+        stream = Evaluator(FakeModel(fail_on=("Question 1",)), model_name="tunedModels/a").iter_results(
+            test_file, progress_file)
+        for _ in range(4):
+            next(stream)
+        stream.close()
+
+        model = FakeModel()
+        results = Evaluator(model, model_name="tunedModels/a").evaluate(test_file, progress_file)
+        assert [result["index"] for result in results] == list(range(10))
+        assert all(result["error"] is None for result in results)
+        assert len(model.prompts) == 7
+
+        stream = Evaluator(FakeModel(), model_name="tunedModels/a").iter_results(test_file, progress_file)
+        for _ in range(4):
+            next(stream)
+        stream.close()
+        # Another model does not reuse the first model's results
+        other_model = FakeModel()
+        Evaluator(other_model, model_name="tunedModels/b").evaluate(test_file, progress_file)
+        assert len(other_model.prompts) == 10
+
+    def test_failed_records_keep_the_progress_file(self, test_file, tmp_path):
+        progress_file = str(tmp_path / "progress.jsonl")
+        results = Evaluator(FakeModel(fail_on=("Question 2",))).evaluate(test_file, progress_file)
+        assert [result["index"] for result in results if result["error"]] == [2]
+        assert os.path.exists(progress_file)
+
+        model = FakeModel()
+        results = Evaluator(model).evaluate(test_file, progress_file)
+        assert model.prompts == ["<input>\nQuestion 2\n</input>"]
+        assert all(result["error"] is None for result in results)
+        assert not os.path.exists(progress_file)
+
+    def test_response_cache(self, test_file, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+        config = {"temperature": 0.7, "max_output_tokens": 1024}
+
+        first_model = FakeModel()
+        Evaluator(first_model, model_name="tunedModels/a", generation_config=config, response_cache=cache).evaluate(test_file)
+        assert len(first_model.prompts) == 10
+        assert len(cache) == 10
+
+        warm_model = FakeModel()
+        results = Evaluator(warm_model, model_name="tunedModels/a", generation_config=config,
+                            response_cache=cache).evaluate(test_file)
+        assert warm_model.prompts == []
+        assert results[1]["response"] == "<INPUT>\nQUESTION 1\n</INPUT>"
+
+        other_config_model = FakeModel()
+        Evaluator(other_config_model, model_name="tunedModels/a", generation_config={"temperature": 0.0},
+                  response_cache=cache).evaluate(test_file)
+        assert len(other_config_model.prompts) == 10
+
+        bypass_model = FakeModel()
+        Evaluator(bypass_model, model_name="tunedModels/a", generation_config=config, response_cache=cache,
+                  use_cache=False).evaluate(test_file)
+        assert len(bypass_model.prompts) == 10
+
+
+class TestResponseCache:
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.put(name, "model", f"response {name}")
+            time.sleep(0.001)
+        assert cache.get("a") == "response a"
+        cache.evict()
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "response a"
+
+    def test_byte_limit_and_clear(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=None, max_bytes=25)
+        for name in ("a", "b", "c"):
+            cache.put(name, "model", "x" * 10)
+            time.sleep(0.001)
+        cache.evict()
+        assert cache.get("a") is None and cache.get("c") is not None
+        cache.clear()
+        assert len(cache) == 0
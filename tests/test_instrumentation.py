@@ -0,0 +1,95 @@
+import json
+import pstats
+import pytest
+from src.data_preparation.data_preparator import DataPreparator
+from src.data_preparation.exceptions import InvalidJSONError
+from src.data_preparation.gemini_finetuning_data import GeminiFinetuningData
+from src.instrumentation import RunMetrics, profiling
+from src.model_tuning.api_client import GeminiApiClient
+from src.model_tuning.fake_backend import FakeGeminiBackend
+from src.model_tuning.model_catalog import ModelCatalog
+from src.model_tuning.model_tuner import ModelTuner
+
+RECORD = '{"messages": [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]}\n'
+
+
+class TestRunMetrics:
+    @pytest.fixture(autouse=True)
+    def metrics(self):
+        metrics = RunMetrics.default()
+        metrics.reset()
+        yield metrics
+        metrics.reset()
+
+    def test_spans_counters_and_gauges(self, metrics):
+        with metrics.span('upload'):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.span('upload'):
+                raise RuntimeError("boom")
+        metrics.add_time('read', 0.5, count=10)
+        metrics.incr('records', 3)
+        metrics.incr('records', 2)
+        metrics.set_gauge('queue depth', 7)
+
+        report = metrics.to_dict()
+        assert report['stages']['upload']['count'] == 2
+        assert report['stages']['upload']['errors'] == 1
+        assert report['stages']['read'] == {"count": 10, "seconds": 0.5, "max_seconds": None, "errors": 0}
+        assert report['counters'] == {"records": 5}
+        assert report['gauges'] == {"queue depth": 7}
+
+    def test_exports(self, metrics, tmp_path):
+        metrics.add_time('prepare.read', 0.25, count=4)
+        metrics.incr('prepare.bytes_read', 1024)
+        metrics.write_json(str(tmp_path / "report.json"))
+        metrics.write_prometheus(str(tmp_path / "metrics.prom"))
+
+        assert json.loads((tmp_path / "report.json").read_text())['counters'] == {"prepare.bytes_read": 1024}
+        text = (tmp_path / "metrics.prom").read_text()
+        assert 'gemini_finetuning_stage_duration_seconds_sum{stage="prepare.read"} 0.25' in text
+        assert 'gemini_finetuning_stage_duration_seconds_count{stage="prepare.read"} 4' in text
+        assert "# TYPE gemini_finetuning_prepare_bytes_read_total counter" in text
+        assert "gemini_finetuning_prepare_bytes_read_total 1024" in text
+
+    def test_data_preparation_stages(self, metrics, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        data_file.write_text(RECORD * 3 + "not json\n")
+        with pytest.raises(InvalidJSONError):
+            DataPreparator(str(data_file)).prepare_data()
+
+        report = metrics.to_dict()
+        assert report['stages']['prepare.read']['count'] == 4
+        assert report['stages']['prepare.validate']['count'] == 3
+        assert report['stages']['prepare.format']['count'] == 3
+        assert report['counters']['prepare.bytes_read'] == len(RECORD) * 3 + len("not json\n")
+        assert report['counters']['prepare.records'] == 3
+        assert report['counters']['prepare.errors'] == 1
+
+    def test_parallel_preparation_counts_bytes(self, metrics, tmp_path):
+        data_file = tmp_path / "data.jsonl"
+        data_file.write_text(RECORD * 50)
+        assert len(DataPreparator(str(data_file), workers=2, chunk_size=256).prepare_data()) == 50
+        report = metrics.to_dict()
+        assert report['counters']['prepare.bytes_read'] == len(RECORD) * 50
+        assert report['counters']['prepare.lines_read'] == 50
+        assert report['stages']['prepare.wait_for_workers']['count'] > 1
+
+    def test_tuning_stages(self, metrics):
+        backend = FakeGeminiBackend(tuning_seconds=0.05)
+        with backend.install():
+            tuner = ModelTuner(catalog=ModelCatalog(None), api=GeminiApiClient(), credentials=backend.credentials)
+            operation = tuner.tune_model([GeminiFinetuningData("1", "2")] * 3, name="instrumented")
+            tuner.wait_for_tuning_completion(operation, initial_poll_interval=0.01, max_poll_interval=0.02)
+
+        report = metrics.to_dict()
+        assert {'tune.format', 'tune.submit', 'tune.wait'} <= set(report['stages'])
+        assert report['counters']['tune.records_uploaded'] == 3
+        assert report['counters']['tune.polls'] >= 1
+
+    def test_profiling_hooks(self, metrics, tmp_path):
+        profile_path = str(tmp_path / "run.prof")
+        with profiling(metrics, cprofile_path=profile_path, trace_memory=True):
+            data = [bytes(1000) for _ in range(100)]
+        assert pstats.Stats(profile_path).total_calls > 0
+        assert metrics.to_dict()['gauges']['memory.peak_traced_bytes'] >= 100_000